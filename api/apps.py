@@ -1,4 +1,6 @@
+from PIL import Image
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
@@ -8,3 +10,6 @@ class ApiConfig(AppConfig):
     # connect signals
     def ready(self) -> None:
         from . import signals
+
+        # Pillow refuses to open images with twice as many pixels
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import is_revoked
+
+User = get_user_model()
+
+
+class UserCache:
+    """
+    Per-process cache of active users by id.
+
+    Entries expire after `USER_CACHE_TTL` seconds to pick up users changed
+    by other processes, users saved or deleted in this process are discarded
+    immediately. At most `USER_CACHE_SIZE` users are kept, oldest first out.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # id: (user or None, loaded at)
+        self.users = {}
+
+    def get(self, id):
+        """
+        Returns the active user with `id`, or None.
+        """
+
+        with self.lock:
+            entry = self.users.get(id)
+        if entry is None or time.monotonic() - entry[1] > settings.USER_CACHE_TTL:
+            entry = (
+                User.objects.filter(pk=id, is_active=True).first(),
+                time.monotonic(),
+            )
+            with self.lock:
+                self.users.pop(id, None)
+                self.users[id] = entry
+                if len(self.users) > settings.USER_CACHE_SIZE:
+                    self.users.pop(next(iter(self.users)))
+        return entry[0]
+
+    def discard(self, id):
+        with self.lock:
+            self.users.pop(id, None)
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+
+
+user_cache = UserCache()
+
+
+class ClaimsUser(TokenUser):
+    """
+    User built from signed token claims: `user_id` and `username`.
+    The full `User` instance is available as `user`, from `user_cache`.
+    Permissions are read from `user`, not from claims, so that they're
+    withdrawn from users before their tokens expire.
+    """
+
+    @cached_property
+    def user(self):
+        return user_cache.get(self.id)
+
+    @cached_property
+    def is_staff(self):
+        return self.user is not None and self.user.is_staff
+
+    @cached_property
+    def is_superuser(self):
+        return self.user is not None and self.user.is_superuser
+
+    @cached_property
+    def username(self):
+        # tokens issued before the claim was added
+        if "username" not in self.token:
+            return self.user.get_username() if self.user else ""
+        return self.token["username"]
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication returning a `TOKEN_USER_CLASS` user (`ClaimsUser`)
+    instead of loading the user on every request. Deleted or deactivated
+    users are rejected once their `user_cache` entry expires.
+    Revoked tokens are rejected, see `revocation`.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken(_("Token is revoked"))
+        return token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if user_cache.get(user.id) is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Adds claims read by `ClaimsUser` to issued tokens,
+    access tokens created by refreshes copy them.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.get_username()
+        return token
+
+
+class RevocationTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses to refresh revoked refresh tokens
+    and tokens of deleted or deactivated users.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if is_revoked(refresh):
+            raise InvalidToken(_("Token is revoked"))
+        if user_cache.get(refresh[api_settings.USER_ID_CLAIM]) is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return super().validate(attrs)
@@ -0,0 +1,178 @@
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections, transaction
+from rest_framework.response import Response
+
+# sub-requests with these methods don't write and may run in parallel
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# request metadata passed on to sub-requests, besides headers
+FORWARDED_META = ("REMOTE_ADDR", "SERVER_NAME", "SERVER_PORT")
+
+_executor = None
+_executor_lock = threading.Lock()
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BATCH_MAX_WORKERS, thread_name_prefix="batch"
+            )
+        return _executor
+
+
+def build_request(request, method, path, body=None):
+    """
+    Returns a request for `path` carrying the headers and the
+    already authenticated user of the batch `request`.
+    """
+
+    path, _, query_string = path.partition("?")
+    data = b"" if body is None else json.dumps(body).encode()
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if key.startswith("HTTP_") or key in FORWARDED_META
+    }
+    environ.pop("HTTP_AUTHORIZATION", None)
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": query_string,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(data)),
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.input": io.BytesIO(data),
+            "wsgi.url_scheme": request.scheme,
+        }
+    )
+    sub_request = WSGIRequest(environ)
+    # read by DRF instead of authenticating the request again
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def get_handler():
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            handler = BaseHandler()
+            handler.load_middleware()
+            _handler = handler
+        return _handler
+
+
+def dispatch(request):
+    """
+    Returns the response of a sub-request, through the middleware
+    of `MIDDLEWARE` like requests of the WSGI handler.
+    """
+
+    return get_handler().get_response(request)
+
+
+def get_content_type(response):
+    if response.content_type:
+        return response.content_type
+    renderer = response.accepted_renderer
+    if renderer.charset:
+        return f"{renderer.media_type}; charset={renderer.charset}"
+    return renderer.media_type
+
+
+def encode_response(response):
+    """
+    Returns status, headers and body of a sub-request's response.
+    Data of DRF responses is returned as it is, without rendering it,
+    with the Content-Type it would have been rendered with.
+    """
+
+    if response.streaming:
+        response.close()
+        return {
+            "status": 400,
+            "headers": {},
+            "body": {"detail": "Streaming responses can't be batched."},
+        }
+    headers = dict(response.items())
+    if isinstance(response, Response):
+        body = response.data
+        # set by DRF when rendering, the default of Django until then
+        headers.pop("Content-Type", None)
+        if body is not None:
+            headers["Content-Type"] = get_content_type(response)
+    else:
+        content = response.content
+        if response.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(content) if content else None
+        else:
+            body = content.decode(response.charset, errors="replace")
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def run(request, sub_request):
+    response = dispatch(build_request(request, **sub_request))
+    return encode_response(response)
+
+
+def run_in_thread(request, sub_request):
+    try:
+        return run(request, sub_request)
+    finally:
+        # worker threads keep their own connections otherwise
+        connections.close_all()
+
+
+def run_parallel(request, sub_requests):
+    if len(sub_requests) < 2 or settings.BATCH_MAX_WORKERS < 2:
+        return [run(request, sub_request) for sub_request in sub_requests]
+    return list(get_executor().map(run_in_thread, repeat(request), sub_requests))
+
+
+def execute(request, sub_requests, atomic=False):
+    """
+    Executes `sub_requests` (dicts of method, path and body) as `request`
+    and returns their responses.
+
+    Consecutive read-only sub-requests run in parallel on up to
+    `BATCH_MAX_WORKERS` threads, writes run alone in order, so that reads
+    see writes made before them. With `atomic`, sub-requests run in order
+    in a transaction rolled back at the first failing one, whose response
+    is the last returned.
+    """
+
+    if atomic:
+        responses = []
+        with transaction.atomic():
+            for sub_request in sub_requests:
+                responses.append(run(request, sub_request))
+                if responses[-1]["status"] >= 400:
+                    transaction.set_rollback(True)
+                    break
+        return responses
+
+    responses = []
+    reads = []
+    for sub_request in sub_requests:
+        if sub_request["method"] in READ_METHODS:
+            reads.append(sub_request)
+            continue
+        responses += run_parallel(request, reads)
+        reads = []
+        responses.append(run(request, sub_request))
+    responses += run_parallel(request, reads)
+    return responses
@@ -0,0 +1,207 @@
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from . import leaderboards, related_tags, rollups
+from .imaging import read_image_metadata
+from .models import Photo, Tag, image_header_validator, image_size_validator
+from .similarity import photo_hash_index
+
+User = get_user_model()
+
+
+def read_manifest(path):
+    """
+    Returns rows of a CSV or JSON manifest as dicts with `file`, `title`,
+    `author`, `tags` and `description` keys. CSV tags are separated by commas.
+    """
+
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".json"):
+            rows = json.load(file)
+        else:
+            rows = list(csv.DictReader(file))
+
+    for row in rows:
+        tags = row.get("tags") or []
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        yield {
+            "file": row.get("file") or "",
+            "title": row.get("title") or "",
+            "author": row.get("author") or "",
+            "tags": list(dict.fromkeys(tags)),
+            "description": row.get("description") or None,
+        }
+
+
+def validate_row(row, directory, authors):
+    """
+    Raises `ValidationError` for rows that `POST /api/photos/` would reject,
+    except for the image file which is validated by `store_image`.
+    """
+
+    if not row["file"] or not os.path.isfile(os.path.join(directory, row["file"])):
+        raise ValidationError(f"File not found: '{row['file']}'.")
+    if not row["title"]:
+        raise ValidationError("Title is required.")
+    Photo._meta.get_field("title").run_validators(row["title"])
+    for tag in row["tags"]:
+        Tag._meta.get_field("name").run_validators(tag)
+    if row["author"] not in authors:
+        raise ValidationError(f"Unknown author: '{row['author']}'.")
+
+
+def store_image(path, title):
+    """
+    Validates an image like `ImageField` and saves it to the media storage
+    under the name an upload with `title` would get.
+    Returns `(name, metadata)`, runs in worker processes.
+    """
+
+    image_field = Photo._meta.get_field("image")
+    with open(path, "rb") as file:
+        image = File(file, name=os.path.basename(path))
+        image_size_validator(image)
+        image_header_validator(image)
+        try:
+            with Image.open(image) as opened:
+                opened.verify()
+        except Exception:
+            raise ValidationError("File is not a valid image.")
+        metadata = read_image_metadata(image)
+        name = image_field.generate_filename(Photo(title=title), image.name)
+        name = image_field.storage.save(name, image)
+    return name, metadata
+
+
+def save_photos(stored, authors):
+    """
+    Inserts photos, new tags and photo tags with batched queries.
+    `stored` is a list of `(row, image_name, metadata)` tuples.
+    Returns created photos.
+    """
+
+    created_at = timezone.now()
+    photos = Photo.objects.bulk_create(
+        [
+            Photo(
+                author_id=authors[row["author"]],
+                title=row["title"],
+                description=row["description"],
+                image=name,
+                created_at=created_at,
+                **metadata,
+            )
+            for row, name, metadata in stored
+        ]
+    )
+
+    names = {tag for row, _, _ in stored for tag in row["tags"]}
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=names).values_list("name", "id"))
+    pairs = [
+        (photo.id, tag_ids[name])
+        for photo, (row, _, _) in zip(photos, stored)
+        for name in row["tags"]
+    ]
+    Photo.tags.through.objects.bulk_create(
+        [
+            Photo.tags.through(photo_id=photo_id, tag_id=tag_id)
+            for photo_id, tag_id in pairs
+        ]
+    )
+
+    # `bulk_create` sends no signals, update what signal handlers maintain
+    changes = {}
+    for photo_id, tag_id in pairs:
+        changes.setdefault(photo_id, set()).add(tag_id)
+    leaderboards.add_photos([photo.id for photo in photos])
+    leaderboards.add_tags(pairs)
+    related_tags.add_tags(changes)
+    rollups.record_uploads(photos)
+    hashes = [(photo.phash, photo.id) for photo in photos if photo.phash is not None]
+    transaction.on_commit(lambda: [photo_hash_index.add(*item) for item in hashes])
+    return photos
+
+
+@dataclass
+class ImportResult:
+    """
+    Progress of an import, updated by every batch.
+    """
+
+    imported: int = 0
+    skipped: int = 0
+    failed: list = field(default_factory=list)
+
+    @property
+    def processed(self):
+        return self.imported + self.skipped + len(self.failed)
+
+
+def import_batch(rows, directory, executor, result):
+    """
+    Imports a batch of manifest rows: skips rows whose title already exists,
+    so an interrupted import can be restarted with the same manifest,
+    stores images in parallel with `executor` and saves photos in
+    a single transaction. Failed rows are added to `result.failed`
+    as `(row, message)` tuples.
+    """
+
+    existing = set(
+        Photo.objects.filter(title__in=[row["title"] for row in rows]).values_list(
+            "title", flat=True
+        )
+    )
+    authors = dict(
+        User.objects.filter(username__in={row["author"] for row in rows}).values_list(
+            "username", "id"
+        )
+    )
+
+    pending = []
+    for row in rows:
+        if row["title"] in existing:
+            result.skipped += 1
+            continue
+        try:
+            validate_row(row, directory, authors)
+        except ValidationError as error:
+            result.failed.append((row, " ".join(error.messages)))
+            continue
+        existing.add(row["title"])
+        pending.append(row)
+
+    futures = [
+        executor.submit(store_image, os.path.join(directory, row["file"]), row["title"])
+        for row in pending
+    ]
+    stored = []
+    for row, future in zip(pending, futures):
+        try:
+            name, metadata = future.result()
+        except ValidationError as error:
+            result.failed.append((row, " ".join(error.messages)))
+        except OSError as error:
+            result.failed.append((row, str(error)))
+        else:
+            stored.append((row, name, metadata))
+
+    try:
+        with transaction.atomic():
+            save_photos(stored, authors)
+    except Exception:
+        storage = Photo._meta.get_field("image").storage
+        for _, name, _ in stored:
+            storage.delete(name)
+        raise
+    result.imported += len(stored)
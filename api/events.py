@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import psycopg
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max
+
+from .models import Review
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel of review events when `EVENTS_NOTIFY` is enabled
+CHANNEL = "photo_events"
+# longest payload of a Postgres notification
+NOTIFY_MAX_BYTES = 8000
+# rating of a photo sent with its events
+RATING = {"average_rating": Avg("rating"), "review_count": Count("id")}
+
+
+class Subscriber:
+    """
+    Queue of events of a photo read by an event stream, written from
+    any thread. Clients not keeping up are disconnected by a `None`
+    event, their `EventSource` reconnects.
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+
+    def put(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self.put_nowait, message)
+        except RuntimeError:
+            # loop of a closed stream
+            pass
+
+    def put_nowait(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventHub:
+    """
+    Broadcasts review events to event streams of this process by photo id.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # photo id: set of subscribers
+        self.subscribers = {}
+
+    def subscribe(self, photo_id):
+        subscriber = Subscriber(asyncio.get_running_loop(), settings.EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.setdefault(photo_id, set()).add(subscriber)
+        if settings.EVENTS_NOTIFY:
+            listener.start()
+        return subscriber
+
+    def unsubscribe(self, photo_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(photo_id, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self.subscribers.pop(photo_id, None)
+
+    def has_subscribers(self, photo_id):
+        with self.lock:
+            return photo_id in self.subscribers
+
+    def dispatch(self, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(message["photo_id"], ()))
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+
+class NotifyListener:
+    """
+    Thread receiving events published by all processes with Postgres
+    `NOTIFY` and dispatching them to the hub, started by the first
+    event stream of the process.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="events-listener", daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception("Listening to review events failed")
+                time.sleep(settings.EVENTS_RECONNECT_SECONDS)
+
+    def listen(self):
+        database = settings.DATABASES["default"]
+        with psycopg.connect(
+            dbname=database["NAME"],
+            user=database["USER"],
+            password=database["PASSWORD"],
+            host=database["HOST"],
+            port=database["PORT"] or None,
+            autocommit=True,
+        ) as listen_connection:
+            listen_connection.execute(f"LISTEN {CHANNEL}")
+            for notify in listen_connection.notifies():
+                self.hub.dispatch(json.loads(notify.payload))
+
+
+hub = EventHub()
+listener = NotifyListener(hub)
+
+
+def publish(photo_id, event, review_id, review):
+    """
+    Sends `event` of `review` with the new rating of the photo to event
+    streams of all processes with `NOTIFY`, or of this process only.
+    Skipped when no stream of this process follows the photo, unless
+    events are sent to other processes.
+    """
+
+    if not settings.EVENTS_NOTIFY and not hub.has_subscribers(photo_id):
+        return
+
+    data = {"id": review_id}
+    if event != "review_deleted":
+        data.update(
+            author=review.author.username, rating=review.rating, body=review.body
+        )
+    rating = Review.objects.filter(photo_id=photo_id).aggregate(**RATING)
+    message = {
+        "photo_id": photo_id,
+        "event": event,
+        "data": {"review": data, "photo": rating},
+    }
+    if settings.EVENTS_NOTIFY:
+        payload = json.dumps(message)
+        if len(payload.encode()) > NOTIFY_MAX_BYTES:
+            # clients fetch long reviews themselves
+            message["data"]["review"].pop("body")
+            payload = json.dumps(message)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+    else:
+        hub.dispatch(message)
+
+
+def review_changed(review, event):
+    """
+    Publishes `event` of `review` once the transaction is committed.
+    """
+
+    # ids of deleted instances are cleared after signals
+    photo_id, review_id = review.photo_id, review.pk
+    transaction.on_commit(lambda: publish(photo_id, event, review_id, review))
+
+
+def format_event(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+async def stream(photo_id):
+    """
+    Yields Server-Sent Events of the photo's reviews, with comments
+    every `EVENTS_KEEPALIVE_SECONDS` keeping idle connections open.
+    Streams end after `EVENTS_STREAM_SECONDS` and clients reconnect,
+    Django doesn't stop streams of disconnected clients.
+
+    Streams start with a `snapshot` event of the photo's rating and latest
+    review id, read once subscribed, so that reconnecting clients catch up
+    with reviews written while they were disconnected.
+    """
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    subscriber = hub.subscribe(photo_id)
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MILLISECONDS}\n\n"
+        snapshot = await Review.objects.filter(photo_id=photo_id).aaggregate(
+            latest_review_id=Max("id"), **RATING
+        )
+        latest_review_id = snapshot.pop("latest_review_id")
+        yield format_event(
+            {
+                "event": "snapshot",
+                "data": {"photo": snapshot, "latest_review_id": latest_review_id},
+            }
+        )
+        while True:
+            remaining = started + settings.EVENTS_STREAM_SECONDS - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(
+                    subscriber.get(), min(remaining, settings.EVENTS_KEEPALIVE_SECONDS)
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                break
+            yield format_event(message)
+    finally:
+        hub.unsubscribe(photo_id, subscriber)
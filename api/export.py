@@ -0,0 +1,186 @@
+import csv
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Avg, Count, Q
+
+from .models import Photo, Review
+from .renderers import ORJSONRenderer
+
+PHOTO_FIELDS = [
+    "id",
+    "author",
+    "title",
+    "description",
+    "image",
+    "created_at",
+    "updated_at",
+    "tags",
+    "review_count",
+    "average_rating",
+]
+REVIEW_FIELDS = [
+    "id",
+    "photo_id",
+    "author",
+    "rating",
+    "body",
+    "created_at",
+    "updated_at",
+]
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Yields lists of `chunk_size` rows read with a server-side cursor.
+    """
+
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def changed_since(queryset, updated_since):
+    if updated_since is None:
+        return queryset
+    return queryset.filter(
+        Q(created_at__gte=updated_since) | Q(updated_at__gte=updated_since)
+    )
+
+
+def iter_photos(updated_since=None, chunk_size=1000):
+    """
+    Yields chunks of photos with tags and review aggregates,
+    which are read with one query per chunk.
+    """
+
+    photos = changed_since(Photo.objects.order_by("id"), updated_since).values_list(
+        "id",
+        "author__username",
+        "title",
+        "description",
+        "image",
+        "created_at",
+        "updated_at",
+    )
+    for chunk in iter_chunks(photos, chunk_size):
+        ids = [row[0] for row in chunk]
+        tags = defaultdict(list)
+        for photo_id, name in (
+            Photo.tags.through.objects.filter(photo_id__in=ids)
+            .order_by("id")
+            .values_list("photo_id", "tag__name")
+        ):
+            tags[photo_id].append(name)
+        aggregates = {
+            photo_id: (review_count, average_rating)
+            for photo_id, review_count, average_rating in Review.objects.filter(
+                photo_id__in=ids
+            )
+            .values("photo_id")
+            .annotate(review_count=Count("id"), average_rating=Avg("rating"))
+            .values_list("photo_id", "review_count", "average_rating")
+            .order_by()
+        }
+        yield [
+            dict(
+                zip(
+                    PHOTO_FIELDS,
+                    (*row, tags[row[0]], *aggregates.get(row[0], (0, None))),
+                )
+            )
+            for row in chunk
+        ]
+
+
+def iter_reviews(updated_since=None, chunk_size=1000):
+    """
+    Yields chunks of reviews.
+    """
+
+    reviews = changed_since(Review.objects.order_by("id"), updated_since).values_list(
+        "id",
+        "photo_id",
+        "author__username",
+        "rating",
+        "body",
+        "created_at",
+        "updated_at",
+    )
+    for chunk in iter_chunks(reviews, chunk_size):
+        yield [dict(zip(REVIEW_FIELDS, row)) for row in chunk]
+
+
+RESOURCES = {
+    "photos": (iter_photos, PHOTO_FIELDS),
+    "reviews": (iter_reviews, REVIEW_FIELDS),
+}
+
+
+def encode_ndjson(chunks, fields):
+    """
+    Yields a block of JSON lines per chunk, encoded like API responses.
+    """
+
+    renderer = ORJSONRenderer()
+    for chunk in chunks:
+        yield b"".join(renderer.render(row) + b"\n" for row in chunk)
+
+
+class LineBuffer:
+    """
+    File-like object keeping lines written by `csv.writer`.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def pop(self):
+        data = "".join(self.lines).encode()
+        self.lines.clear()
+        return data
+
+
+def csv_value(value):
+    if isinstance(value, list):
+        return ",".join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(chunks, fields):
+    """
+    Yields a block of CSV lines per chunk after a header line,
+    lists are joined with commas.
+    """
+
+    buffer = LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.pop()
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow([csv_value(value) for value in row.values()])
+        yield buffer.pop()
+
+
+OUTPUTS = {
+    "ndjson": (encode_ndjson, "application/x-ndjson"),
+    "csv": (encode_csv, "text/csv"),
+}
+
+
+def export(resource, output, updated_since=None, chunk_size=1000):
+    """
+    Returns an iterator of encoded blocks of all rows of a resource,
+    holding at most one chunk of rows in memory.
+    """
+
+    iter_rows, fields = RESOURCES[resource]
+    encode, _ = OUTPUTS[output]
+    return encode(iter_rows(updated_since, chunk_size), fields)
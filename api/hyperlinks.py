@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+# integers used in place of url kwargs when building templates
+PLACEHOLDER = "8731562940{}"
+
+
+@lru_cache(maxsize=None)
+def _path_template(view_name, kwarg_names, script_prefix, urlconf):
+    """
+    Reverses `view_name` once and turns the result into a `str.format` template.
+    """
+
+    placeholders = {
+        name: PLACEHOLDER.format(index) for index, name in enumerate(kwarg_names)
+    }
+    path = reverse(view_name, kwargs=placeholders, urlconf=urlconf)
+    path = path.replace("{", "{{").replace("}", "}}")
+    for name, placeholder in placeholders.items():
+        if path.count(placeholder) != 1:
+            raise ValueError(f"Cannot build url template for '{view_name}'.")
+        path = path.replace(placeholder, f"{{{name}}}")
+    return path
+
+
+def get_url_template(view_name, kwarg_names, request=None):
+    """
+    Returns a `str.format` template of `view_name` url with `kwarg_names` fields.
+    Formatting it with integer kwargs gives the same result as DRF's `reverse()`,
+    without entering the url resolver for every object.
+    """
+
+    path = _path_template(
+        view_name, tuple(kwarg_names), get_script_prefix(), get_urlconf()
+    )
+    if request is None:
+        return path
+    return get_absolute_prefix(request) + path
+
+
+def get_absolute_prefix(request):
+    """
+    Returns scheme and host that `request.build_absolute_uri()` puts before paths.
+    """
+
+    return request.build_absolute_uri("/")[:-1]
+
+
+def absolute_url(prefix, url, request):
+    """
+    Returns `request.build_absolute_uri(url)`, skipping it for plain absolute paths.
+    """
+
+    if (
+        url.startswith("/")
+        and not url.startswith("//")
+        and "/./" not in url
+        and "/../" not in url
+    ):
+        return prefix + url
+    return request.build_absolute_uri(url)
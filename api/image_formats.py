@@ -0,0 +1,228 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps, features
+from django.conf import settings
+
+try:
+    # registers the AVIF plugin in Pillow
+    import pillow_avif
+except ImportError:
+    pillow_avif = None
+
+# name: (media type, Pillow format, save options)
+ENCODINGS = {
+    "avif": ("image/avif", "AVIF", {"quality": 60}),
+    "webp": ("image/webp", "WEBP", {"quality": 80, "method": 4}),
+}
+
+# extensions of photos that are encoded in smaller formats
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def is_available(encoding):
+    if encoding == "avif":
+        return pillow_avif is not None
+    return features.check(encoding)
+
+
+def parse_accept(header):
+    """
+    Returns `{media type: quality}` of an `Accept` header.
+    """
+
+    accepted = {}
+    for item in header.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            accepted[media_type.lower()] = quality
+    return accepted
+
+
+def is_negotiated(path):
+    """
+    Returns whether responses for the photo at `path` depend on `Accept`.
+    """
+
+    return bool(settings.MEDIA_ENCODINGS) and (
+        os.path.splitext(path)[1].lower() in SOURCE_EXTENSIONS
+    )
+
+
+def negotiate(header, path):
+    """
+    Returns the name of the preferred encoding of `MEDIA_ENCODINGS` accepted
+    by the client for the photo at `path`, or None to send the original.
+    Only explicitly accepted media types count, wildcards don't tell
+    whether a client can decode a format.
+    """
+
+    if not header or not is_negotiated(path):
+        return None
+    accepted = parse_accept(header)
+    for encoding in settings.MEDIA_ENCODINGS:
+        if accepted.get(ENCODINGS[encoding][0], 0) > 0 and is_available(encoding):
+            return encoding
+    return None
+
+
+def encode(source_path, target_path, encoding):
+    """
+    Writes the photo at `source_path` in `encoding` to `target_path`.
+    An empty file is written when the encoding isn't smaller than the original.
+    """
+
+    _, image_format, options = ENCODINGS[encoding]
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        directory = os.path.dirname(target_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                image.save(file, image_format, **options)
+                if file.tell() >= os.path.getsize(source_path):
+                    file.truncate(0)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class EncodedCache:
+    """
+    Directory of photos encoded in smaller formats, bounded to
+    `MEDIA_ENCODING_CACHE_SIZE` bytes by evicting least recently used files.
+
+    Encodings are missing until generated by a pool of
+    `MEDIA_ENCODING_WORKERS` threads, requests meanwhile get the original.
+    Entries are keyed by the photo's path, size and modification time,
+    so changed or renamed photos are encoded again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        # key: future of encodings in progress
+        self.pending = {}
+        # estimated size of the directory, None until scanned
+        self.size = None
+
+    def entry_path(self, source_path, stat, encoding):
+        key = f"{source_path}:{stat.st_size}:{stat.st_mtime_ns}"
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(
+            settings.MEDIA_ENCODING_CACHE_DIR, digest[:2], f"{digest}.{encoding}"
+        )
+
+    def get(self, source_path, stat, encoding):
+        """
+        Returns the path of the encoded photo, or None when it's not smaller
+        than the original or not generated yet, in which case it's scheduled.
+        """
+
+        path = self.entry_path(source_path, stat, encoding)
+        try:
+            if os.path.getsize(path) == 0:
+                return None
+            # last use time for eviction
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            self.schedule(source_path, path, encoding)
+            return None
+
+    def schedule(self, source_path, path, encoding):
+        with self.lock:
+            if path in self.pending:
+                return
+            if len(self.pending) >= settings.MEDIA_ENCODING_QUEUE_SIZE:
+                return
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=settings.MEDIA_ENCODING_WORKERS,
+                    thread_name_prefix="media-encoding",
+                )
+            self.pending[path] = self.executor.submit(
+                self.generate, source_path, path, encoding
+            )
+
+    def generate(self, source_path, path, encoding):
+        try:
+            try:
+                encode(source_path, path, encoding)
+            except Exception:
+                # photos that can't be encoded are sent as they are
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "wb").close()
+            self.added(os.path.getsize(path))
+        finally:
+            with self.lock:
+                self.pending.pop(path, None)
+
+    def added(self, size):
+        with self.lock:
+            if self.size is not None:
+                self.size += size
+            if (
+                self.size is not None
+                and self.size <= settings.MEDIA_ENCODING_CACHE_SIZE
+            ):
+                return
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes least recently used files until the directory fits in
+        `MEDIA_ENCODING_CACHE_SIZE`, re-reading sizes written by all processes.
+        """
+
+        entries = []
+        for directory, _, files in os.walk(settings.MEDIA_ENCODING_CACHE_DIR):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= settings.MEDIA_ENCODING_CACHE_SIZE:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self.lock:
+            self.size = total
+
+    def join(self):
+        """
+        Waits for encodings in progress.
+        """
+
+        with self.lock:
+            futures = list(self.pending.values())
+        for future in futures:
+            future.result()
+
+
+encoded_cache = EncodedCache()
@@ -0,0 +1,110 @@
+import base64
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from PIL import Image, UnidentifiedImageError, features
+
+# longest side of the placeholder preview in pixels
+PLACEHOLDER_SIZE = 16
+
+# number of bits of perceptual hashes
+HASH_BITS = 64
+
+
+def make_placeholder(image):
+    """
+    Returns a tiny, low-quality preview of `image` as a data URI.
+    """
+
+    # lets JPEG decoder downscale while decoding
+    image.draft("RGB", (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+    preview = image.convert("RGB")
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+
+    buffer = BytesIO()
+    if features.check("webp"):
+        preview.save(buffer, "WEBP", quality=30)
+        media_type = "image/webp"
+    else:
+        preview.save(buffer, "JPEG", quality=30)
+        media_type = "image/jpeg"
+    return f"data:{media_type};base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+def dhash(image):
+    """
+    Returns 64-bit difference hash of `image`, a perceptual hash that stays
+    close in Hamming distance for resized, re-encoded or slightly cropped images.
+    """
+
+    image.draft("L", (64, 64))
+    pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            right = pixels[row * 9 + column + 1]
+            value = (value << 1) | (left > right)
+    return to_signed(value)
+
+
+def to_signed(value):
+    """
+    Maps an unsigned 64-bit hash to the range of `BigIntegerField`.
+    """
+
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def hamming_distance(a, b):
+    """
+    Returns number of different bits of two 64-bit hashes.
+    """
+
+    return ((a ^ b) & ((1 << HASH_BITS) - 1)).bit_count()
+
+
+def read_image_header(file):
+    """
+    Returns `(format, width, height)` of an image file, parsing only its header
+    without decoding pixels. Raises `ValueError` for files that are not
+    readable images and `Image.DecompressionBombError` for images with more
+    than twice `Image.MAX_IMAGE_PIXELS` pixels.
+    """
+
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            return image.format, image.width, image.height
+    except (UnidentifiedImageError, OSError, SyntaxError) as error:
+        raise ValueError(str(error))
+    finally:
+        file.seek(0)
+
+
+def read_image_metadata(file):
+    """
+    Returns dimensions, format, byte size, placeholder and perceptual hash
+    of an image file as `Photo` field values. Only `image_size` is returned for files
+    that are not readable images. Raises `ValidationError` for images with more
+    than twice `IMAGE_MAX_PIXELS` pixels, which aren't decoded.
+    """
+
+    metadata = {"image_size": file.size}
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            metadata["width"], metadata["height"] = image.size
+            metadata["image_format"] = image.format
+            metadata["placeholder"] = make_placeholder(image)
+            metadata["phash"] = dhash(image)
+    except (UnidentifiedImageError, OSError, ValueError):
+        pass
+    except Image.DecompressionBombError:
+        raise ValidationError(
+            f"Maximum image size is {settings.IMAGE_MAX_PIXELS} pixels."
+        )
+    finally:
+        file.seek(0)
+    return metadata
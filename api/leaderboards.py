@@ -0,0 +1,164 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast
+
+from .models import LeaderboardEntry, Photo, Review
+
+
+def get_prior():
+    """
+    Returns `(weight, mean)` of the prior used by Bayesian averages.
+    """
+
+    return settings.LEADERBOARD_PRIOR_WEIGHT, settings.LEADERBOARD_PRIOR_MEAN
+
+
+def bayesian_score(review_count, rating_sum):
+    """
+    Returns Bayesian average of ratings, an average pulled towards
+    the prior mean until a photo collects enough reviews.
+    """
+
+    weight, mean = get_prior()
+    return (weight * mean + rating_sum) / (weight + review_count)
+
+
+def add_photo(photo_id):
+    """
+    Adds a new photo to the global leaderboard.
+    """
+
+    add_photos([photo_id])
+
+
+def add_photos(photo_ids):
+    """
+    Adds new photos to the global leaderboard with a single query.
+    """
+
+    score = bayesian_score(0, 0)
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(photo_id=photo_id, score=score) for photo_id in photo_ids]
+    )
+
+
+def add_tags(pairs):
+    """
+    Adds photos to leaderboards of tags, `pairs` are `(photo_id, tag_id)` tuples.
+    Scores are copied from the global leaderboard.
+    """
+
+    photo_ids = {photo_id for photo_id, _ in pairs}
+    global_entries = {
+        entry.photo_id: entry
+        for entry in LeaderboardEntry.objects.filter(
+            photo_id__in=photo_ids, tag__isnull=True
+        )
+    }
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(
+                photo_id=photo_id,
+                tag_id=tag_id,
+                review_count=global_entries[photo_id].review_count,
+                rating_sum=global_entries[photo_id].rating_sum,
+                score=global_entries[photo_id].score,
+            )
+            for photo_id, tag_id in pairs
+            if photo_id in global_entries
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_tags(photo_ids=None, tag_ids=None):
+    """
+    Removes photos from leaderboards of tags, filtered by photos, tags or both.
+    """
+
+    entries = LeaderboardEntry.objects.filter(tag__isnull=False)
+    if photo_ids is not None:
+        entries = entries.filter(photo_id__in=photo_ids)
+    if tag_ids is not None:
+        entries = entries.filter(tag_id__in=tag_ids)
+    entries.delete()
+
+
+def record_rating(photo_id, count_delta, sum_delta):
+    """
+    Applies a review change to all leaderboard entries of a photo
+    with a single UPDATE.
+    """
+
+    weight, mean = get_prior()
+    review_count = Cast(F("review_count"), FloatField()) + count_delta
+    rating_sum = Cast(F("rating_sum"), FloatField()) + sum_delta
+    LeaderboardEntry.objects.filter(photo_id=photo_id).update(
+        review_count=F("review_count") + count_delta,
+        rating_sum=F("rating_sum") + sum_delta,
+        score=(Value(weight * mean) + rating_sum)
+        / (Value(float(weight)) + review_count),
+    )
+
+
+def get_top(tag=None, limit=10):
+    """
+    Returns the top `limit` entries of the global or a tag leaderboard.
+    """
+
+    if tag is None:
+        entries = LeaderboardEntry.objects.filter(tag__isnull=True)
+    else:
+        entries = LeaderboardEntry.objects.filter(tag=tag)
+    return entries.order_by("-score", "-review_count", "photo_id")[:limit]
+
+
+def bulk_create_in_batches(entries, batch_size=5000):
+    """
+    Saves entries from an iterator without loading all of them into memory.
+    """
+
+    created = 0
+    while batch := list(islice(entries, batch_size)):
+        created += len(LeaderboardEntry.objects.bulk_create(batch))
+    return created
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recomputes all leaderboards from reviews.
+    Returns number of created entries.
+    """
+
+    LeaderboardEntry.objects.all().delete()
+
+    stats = {
+        row["photo_id"]: (row["review_count"], row["rating_sum"])
+        for row in Review.objects.values("photo_id").annotate(
+            review_count=Count("id"), rating_sum=Sum("rating")
+        )
+    }
+
+    def entry(photo_id, tag_id=None):
+        review_count, rating_sum = stats.get(photo_id, (0, 0))
+        return LeaderboardEntry(
+            photo_id=photo_id,
+            tag_id=tag_id,
+            review_count=review_count,
+            rating_sum=rating_sum,
+            score=bayesian_score(review_count, rating_sum),
+        )
+
+    photo_ids = Photo.objects.values_list("id", flat=True)
+    created = bulk_create_in_batches(
+        entry(photo_id) for photo_id in photo_ids.iterator(chunk_size=5000)
+    )
+    pairs = Photo.tags.through.objects.values_list("photo_id", "tag_id")
+    created += bulk_create_in_batches(
+        entry(photo_id, tag_id) for photo_id, tag_id in pairs.iterator(chunk_size=5000)
+    )
+    return created
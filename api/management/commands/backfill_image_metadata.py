@@ -0,0 +1,67 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.imaging import read_image_metadata
+from api.models import Photo
+
+METADATA_FIELDS = [
+    "width",
+    "height",
+    "image_format",
+    "image_size",
+    "placeholder",
+    "phash",
+]
+
+
+class Command(BaseCommand):
+    help = "Stores image metadata of photos uploaded before it was extracted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of photos updated with a single query.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute metadata of all photos, not only missing ones.",
+        )
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.only("id", "image").order_by("id")
+        if not options["all"]:
+            photos = photos.filter(Q(image_size__isnull=True) | Q(phash__isnull=True))
+
+        batch = []
+        updated = missing = 0
+        for photo in photos.iterator(chunk_size=options["batch_size"]):
+            try:
+                with photo.image.open("rb") as file:
+                    metadata = read_image_metadata(file)
+            except FileNotFoundError:
+                missing += 1
+                continue
+            except ValidationError as error:
+                self.stderr.write(f"Photo {photo.id}: {error.messages[0]}")
+                continue
+            for field, value in metadata.items():
+                setattr(photo, field, value)
+            batch.append(photo)
+
+            if len(batch) >= options["batch_size"]:
+                updated += self.save(batch)
+        updated += self.save(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated {updated} photos, {missing} files missing.")
+        )
+
+    def save(self, batch):
+        Photo.objects.bulk_update(batch, METADATA_FIELDS)
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,62 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import serializers
+from api.models import Photo, Review, Tag
+
+
+class Command(BaseCommand):
+    help = "Compares list serializers with their `.values()` based counterparts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=10,
+            help="Number of serializations per serializer.",
+        )
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get("/api/", SERVER_NAME="localhost"))
+        context = {"request": request}
+        cases = [
+            (
+                Photo.objects.annotate(average_rating=Avg("reviews__rating")),
+                serializers.PhotoListSerializer,
+                serializers.PhotoListValuesSerializer,
+            ),
+            (
+                Review.objects.all(),
+                serializers.ReviewListSerializer,
+                serializers.ReviewListValuesSerializer,
+            ),
+            (
+                Tag.objects.annotate(number_of_photos=Count("photos")),
+                serializers.TagSerializer,
+                serializers.TagValuesSerializer,
+            ),
+        ]
+
+        for queryset, serializer_class, values_serializer_class in cases:
+            queryset = queryset.order_by("id")
+            expected = serializer_class(queryset, many=True, context=context).data
+            if values_serializer_class(queryset, context=context).data != expected:
+                self.stderr.write(f"{values_serializer_class.__name__} output differs.")
+
+            seconds = timeit.timeit(
+                lambda: serializer_class(queryset, many=True, context=context).data,
+                number=options["number"],
+            )
+            values_seconds = timeit.timeit(
+                lambda: values_serializer_class(queryset, context=context).data,
+                number=options["number"],
+            )
+            self.stdout.write(
+                f"{serializer_class.__name__}: {seconds:.3f} s, "
+                f"{values_serializer_class.__name__}: {values_seconds:.3f} s, "
+                f"speedup {seconds / values_seconds:.2f}x ({len(expected)} rows)"
+            )
@@ -0,0 +1,48 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Photo
+from api.renderers import ORJSONRenderer
+from api.serializers import PhotoListSerializer
+
+
+class Command(BaseCommand):
+    help = "Compares JSONRenderer and ORJSONRenderer on PhotoListSerializer output."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--copies",
+            type=int,
+            default=1,
+            help="Repeat the photo list to simulate larger responses.",
+        )
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=100,
+            help="Number of renders per renderer.",
+        )
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.annotate(average_rating=Avg("reviews__rating"))
+        data = PhotoListSerializer(photos, many=True, context={"request": None}).data
+        data = data * options["copies"]
+        number = options["number"]
+
+        results = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            name = type(renderer).__name__
+            seconds = timeit.timeit(lambda: renderer.render(data), number=number)
+            results[name] = seconds
+            self.stdout.write(
+                f"{name}: {seconds / number * 1000:.3f} ms per render "
+                f"({len(data)} photos)"
+            )
+
+        if JSONRenderer().render(data) != ORJSONRenderer().render(data):
+            self.stderr.write("Renderers produced different output.")
+        speedup = results["JSONRenderer"] / results["ORJSONRenderer"]
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {speedup:.2f}x"))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Stores photos most often rated alike by the same reviewers "
+        "as recommendations of every photo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--neighbors",
+            type=int,
+            default=settings.RECOMMENDATION_NEIGHBORS,
+            help="Number of recommended photos stored per photo.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of photos whose similarities are computed at once.",
+        )
+
+    def handle(self, *args, **options):
+        created = recommendations.rebuild(
+            k=options["neighbors"], chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stored {created} neighbors."))
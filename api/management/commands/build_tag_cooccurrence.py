@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import related_tags
+
+
+class Command(BaseCommand):
+    help = "Recomputes tag co-occurrence counts used by related tags."
+
+    def handle(self, *args, **options):
+        created = related_tags.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Stored {created} tag pairs."))
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api import export
+
+
+class Command(BaseCommand):
+    help = "Writes all photos or reviews as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=list(export.RESOURCES))
+        parser.add_argument("--output", choices=list(export.OUTPUTS), default="ndjson")
+        parser.add_argument(
+            "--updated-since",
+            help="Export only rows created or updated since an ISO 8601 datetime.",
+        )
+        parser.add_argument(
+            "--file", help="File to write to, standard output by default."
+        )
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options["updated_since"]:
+            updated_since = parse_datetime(options["updated_since"])
+            if updated_since is None:
+                raise CommandError("--updated-since must be an ISO 8601 datetime.")
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        blocks = export.export(
+            options["resource"],
+            options["output"],
+            updated_since=updated_since,
+            chunk_size=settings.EXPORT_CHUNK_SIZE,
+        )
+        if options["file"]:
+            with open(options["file"], "wb") as file:
+                file.writelines(blocks)
+        else:
+            for block in blocks:
+                self.stdout.write(block.decode(), ending="")
@@ -0,0 +1,79 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk_import import ImportResult, import_batch, read_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a directory of images described by a CSV or JSON manifest "
+        "with 'file', 'title', 'author', 'tags' and 'description' columns. "
+        "Photos with titles that already exist are skipped, so an interrupted "
+        "import can be restarted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory with the image files.")
+        parser.add_argument(
+            "--manifest",
+            help="Manifest path, 'manifest.csv' or 'manifest.json' "
+            "in the directory by default.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes validating and storing images.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of photos inserted in a single transaction.",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        manifest = options["manifest"] or self.find_manifest(directory)
+        rows = list(read_manifest(manifest))
+
+        result = ImportResult()
+        started = time.monotonic()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as executor:
+            batches = iter(rows)
+            while batch := list(islice(batches, options["batch_size"])):
+                reported = len(result.failed)
+                import_batch(batch, directory, executor, result)
+                for row, message in result.failed[reported:]:
+                    self.stderr.write(f"{row['file']}: {message}")
+                self.report(result, len(rows), started)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.imported} photos, skipped {result.skipped} "
+                f"existing, {len(result.failed)} failed."
+            )
+        )
+
+    def find_manifest(self, directory):
+        for name in ("manifest.csv", "manifest.json"):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+        raise CommandError(f"No manifest.csv or manifest.json in {directory}.")
+
+    def report(self, result, total, started):
+        elapsed = time.monotonic() - started
+        rate = result.processed / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{result.processed}/{total} rows, {result.imported} imported, "
+            f"{result.skipped} skipped, {len(result.failed)} failed "
+            f"({rate:.1f} rows/s)"
+        )
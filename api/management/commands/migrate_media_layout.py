@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.models import Photo
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves photo files to the sharded directory layout when MEDIA_SHARDING "
+        "is enabled, or back to the flat layout otherwise. Photos are served "
+        "from either layout while files are moved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of files moved between pauses.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches, to limit disk load.",
+        )
+
+    def handle(self, *args, **options):
+        storage = Photo._meta.get_field("image").storage
+        layout = "sharded" if settings.MEDIA_SHARDING else "flat"
+        moved = 0
+        for count in storage.migrate_layout(batch_size=options["batch_size"]):
+            moved += count
+            self.stdout.write(f"Moved {moved} files")
+            time.sleep(options["pause"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Moved {moved} files to the {layout} layout.")
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import revocation
+
+
+class Command(BaseCommand):
+    help = "Deletes revocations of tokens that have expired since."
+
+    def handle(self, *args, **options):
+        deleted = revocation.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} token revocations."))
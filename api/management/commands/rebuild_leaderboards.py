@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recomputes global and tag leaderboards from reviews."
+
+    def handle(self, *args, **options):
+        created = leaderboards.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Created {created} leaderboard entries."))
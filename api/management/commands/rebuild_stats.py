@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import rollups
+
+
+class Command(BaseCommand):
+    help = "Recomputes hourly and daily stats buckets from photos and reviews."
+
+    def handle(self, *args, **options):
+        created = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Stored {created} stats buckets."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from api import media_gc
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds files under media/photos/ referenced by no photo and records "
+        "them for `sweep_media`, and lists photos whose file is missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-seconds",
+            type=int,
+            default=3600,
+            help="Minimum age of orphaned files, newer files may belong "
+            "to uploads in progress.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list orphaned files.",
+        )
+
+    def handle(self, *args, **options):
+        orphans, dangling = media_gc.reconcile(
+            grace_seconds=options["grace_seconds"], dry_run=options["dry_run"]
+        )
+        for name in orphans:
+            self.stdout.write(f"Orphaned file: {name}")
+        for id in dangling:
+            self.stderr.write(f"Missing file of photo {id}")
+        action = "Found" if options["dry_run"] else "Recorded"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {len(orphans)} orphaned files, "
+                f"{len(dangling)} photos with missing files."
+            )
+        )
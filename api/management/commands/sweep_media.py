@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api import media_gc
+
+
+class Command(BaseCommand):
+    help = "Deletes media files of deleted photos, recorded as tombstones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of tombstones processed at once.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = media_gc.sweep(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} media files."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds reviews created since the last run to trending scores of photos "
+        "and recomputes scores of photos whose reviews were updated or deleted. "
+        "Meant to be run periodically, e.g. every few minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of reviews processed in a single transaction.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Recompute scores from all reviews, "
+            "needed after changing trending settings.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            trending.reset_scores()
+        recomputed = trending.recompute_changed_scores()
+        processed = trending.update_scores(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {processed} reviews, recomputed {recomputed} photos."
+            )
+        )
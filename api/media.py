@@ -0,0 +1,209 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from . import image_formats
+from .image_formats import encoded_cache
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# one year, the longest value recommended for `max-age`
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class RangeFile:
+    """
+    File-like object that reads at most `length` bytes of `file`,
+    starting at `start`.
+
+    Exposes `fileno()` and `tell()` so that WSGI servers can send
+    the range with `sendfile` through `wsgi.file_wrapper`.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Returns `(start, end)` of a single byte range, `None` when the header
+    should be ignored and raises `ValueError` when the range is unsatisfiable.
+    """
+
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range, last N bytes
+        length = int(last)
+        if not length:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+def cache_headers(response, path):
+    """
+    Sets long-lived immutable caching for content-versioned file names.
+    """
+
+    pattern = getattr(settings, "MEDIA_IMMUTABLE_PATTERN", None)
+    if pattern and re.search(pattern, os.path.basename(path)):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=getattr(settings, "MEDIA_MAX_AGE", 3600)
+        )
+
+
+def offload_response(path, full_path, content_type):
+    """
+    Returns an empty response telling the front proxy to send the file,
+    or `None` when offloading is not configured.
+    """
+
+    header = getattr(settings, "MEDIA_OFFLOAD_HEADER", None)
+    if not header:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if header == "X-Accel-Redirect":
+        response[header] = settings.MEDIA_OFFLOAD_PREFIX + path
+    else:
+        response[header] = full_path
+    return response
+
+
+@require_safe
+def serve_photo(request, path):
+    """
+    Serves an uploaded photo from `MEDIA_ROOT`.
+
+    Supports conditional and single byte range requests, sends files
+    with `FileResponse` so that WSGI servers can use `sendfile`,
+    or hands them to a front proxy when `MEDIA_OFFLOAD_HEADER` is set.
+    JPEG and PNG photos are sent as WebP or AVIF to clients accepting
+    them, once encoded, see `image_formats.EncodedCache`.
+    """
+
+    try:
+        # photos may be stored in sharded directories, see `storage.PhotoStorage`
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404()
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404()
+    if not os.path.isfile(full_path):
+        raise Http404()
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    negotiated = image_formats.is_negotiated(path)
+    encoding = image_formats.negotiate(request.headers.get("Accept"), path)
+    etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    last_modified = int(stat.st_mtime)
+    size = stat.st_size
+    pending = False
+    if encoding:
+        encoded_path = encoded_cache.get(full_path, stat, encoding)
+        pending = encoded_path is None
+        if encoded_path:
+            # validators of the original, the encoding's mtime tracks its use
+            full_path = encoded_path
+            etag = f"{etag}-{encoding}"
+            size = os.path.getsize(full_path)
+            content_type = image_formats.ENCODINGS[encoding][0]
+    etag = quote_etag(etag)
+
+    def finalize(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Accept-Ranges"] = "bytes"
+        if negotiated:
+            patch_vary_headers(response, ["Accept"])
+        if pending:
+            # the encoding is sent once made, don't cache the original for long
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=getattr(settings, "MEDIA_ENCODING_PENDING_MAX_AGE", 60),
+            )
+        else:
+            cache_headers(response, path)
+        return response
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return finalize(response)
+
+    stored_path = os.path.relpath(full_path, default_storage.location)
+    response = offload_response(
+        stored_path.replace(os.sep, "/"), full_path, content_type
+    )
+    if response is not None:
+        return finalize(response)
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (
+        if_range is None or if_range in (etag, http_date(last_modified))
+    ):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return finalize(response)
+
+    file = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(file, start, length), status=206, content_type=content_type
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return finalize(response)
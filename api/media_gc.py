@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import MediaTombstone, Photo
+from .storage import unshard
+
+
+def get_storage():
+    return Photo._meta.get_field("image").storage
+
+
+def record_deleted(names):
+    """
+    Records files of deleted photos for `sweep`. Tombstones are inserted
+    in the transaction deleting the photos: they're committed with it,
+    and files are kept when it rolls back.
+    """
+
+    MediaTombstone.objects.bulk_create(
+        [MediaTombstone(name=name) for name in names if name]
+    )
+
+
+def sweep(batch_size=500):
+    """
+    Deletes files recorded by tombstones in batches, skipping files
+    referenced by a photo again. Returns the number of deleted files.
+    """
+
+    storage = get_storage()
+    deleted = 0
+    while True:
+        tombstones = list(
+            MediaTombstone.objects.order_by("id").values_list("id", "name")[:batch_size]
+        )
+        if not tombstones:
+            return deleted
+        names = {name for _, name in tombstones}
+        referenced = set(
+            Photo.objects.filter(image__in=names).values_list("image", flat=True)
+        )
+        for name in names - referenced:
+            storage.delete(name)
+            deleted += 1
+        MediaTombstone.objects.filter(id__in=[id for id, _ in tombstones]).delete()
+
+
+def list_files(directory):
+    """
+    Yields names of all files under a storage directory.
+    """
+
+    storage = get_storage()
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield f"{directory}/{name}"
+    for name in directories:
+        yield from list_files(f"{directory}/{name}")
+
+
+def reconcile(grace_seconds=3600, dry_run=False):
+    """
+    Mark and sweep: marks files referenced by photos, records tombstones
+    for other files under `photos/` older than `grace_seconds` (files
+    of uploads still in progress are newer) and finds photos whose file
+    is missing. Returns `(orphaned file names, dangling photo ids)`.
+    """
+
+    storage = get_storage()
+    marked = set(Photo.objects.values_list("image", flat=True).iterator())
+    marked |= set(MediaTombstone.objects.values_list("name", flat=True).iterator())
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+
+    orphans = []
+    if storage.exists("photos"):
+        for name in map(unshard, list_files("photos")):
+            if name not in marked and storage.get_modified_time(name) < cutoff:
+                orphans.append(name)
+    if not dry_run:
+        record_deleted(orphans)
+
+    dangling = [
+        id
+        for id, name in Photo.objects.values_list("id", "image").iterator()
+        if not name or not storage.exists(name)
+    ]
+    return orphans, dangling
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_alter_photo_created_at_alter_photo_updated_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="photo",
+            name="height",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="image_format",
+            field=models.CharField(editable=False, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="image_size",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="placeholder",
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="width",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
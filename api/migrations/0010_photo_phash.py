@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_photo_image_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="photo",
+            name="phash",
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_leaderboardentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("value", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="trending_score",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+    ]
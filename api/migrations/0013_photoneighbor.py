@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-18 23:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_trending"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PhotoNeighbor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "neighbor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.photo",
+                    ),
+                ),
+                (
+                    "photo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbors",
+                        to="api.photo",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="photoneighbor",
+            index=models.Index(
+                fields=["photo", "-score"], name="photo_neighbor_rank_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="photoneighbor",
+            constraint=models.UniqueConstraint(
+                fields=("photo", "neighbor"), name="unique_photo_neighbor"
+            ),
+        ),
+    ]
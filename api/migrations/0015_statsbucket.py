@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-18 23:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_tagcooccurrence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatsBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("uploads", models.PositiveIntegerField(default=0)),
+                ("reviews", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                ("rating_1", models.PositiveIntegerField(default=0)),
+                ("rating_2", models.PositiveIntegerField(default=0)),
+                ("rating_3", models.PositiveIntegerField(default=0)),
+                ("rating_4", models.PositiveIntegerField(default=0)),
+                ("rating_5", models.PositiveIntegerField(default=0)),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats_buckets",
+                        to="api.tag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="statsbucket",
+            constraint=models.UniqueConstraint(
+                fields=("granularity", "tag", "start"), name="unique_stats_bucket_tag"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="statsbucket",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tag__isnull", True)),
+                fields=("granularity", "start"),
+                name="unique_stats_bucket_global",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_statsbucket"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="photo",
+            name="updated_at",
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+    ]
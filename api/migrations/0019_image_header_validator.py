@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 23:57
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_media_tombstone"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="photo",
+            name="image",
+            field=models.ImageField(
+                upload_to=api.models.save_image,
+                validators=[
+                    api.models.image_size_validator,
+                    api.models.image_header_validator,
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_image_header_validator"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tokenrevocation",
+            name="revoked_at",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
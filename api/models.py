@@ -1,3 +1,5 @@
+from PIL import Image
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -7,6 +9,8 @@ from django.core.validators import (
     MaxValueValidator,
 )
 
+from .imaging import read_image_header
+
 User = get_user_model()
 
 
@@ -30,6 +34,36 @@ def image_size_validator(image):
         raise ValidationError(f"Maximum image size is {size_limit}")
 
 
+def image_header_validator(image):
+    """
+    Raise `ValidationError` when image format is not in `IMAGE_ALLOWED_FORMATS`
+    or its dimensions exceed `IMAGE_MAX_WIDTH`, `IMAGE_MAX_HEIGHT` or
+    `IMAGE_MAX_PIXELS`. Only the image header is read, pixels are not decoded.
+    """
+
+    try:
+        image_format, width, height = read_image_header(image)
+    except Image.DecompressionBombError:
+        raise ValidationError(
+            f"Maximum image size is {settings.IMAGE_MAX_PIXELS} pixels."
+        )
+    except ValueError:
+        raise ValidationError("File is not a valid image.")
+
+    if image_format not in settings.IMAGE_ALLOWED_FORMATS:
+        allowed = ", ".join(settings.IMAGE_ALLOWED_FORMATS)
+        raise ValidationError(f"Unsupported image format, allowed formats: {allowed}.")
+    if width > settings.IMAGE_MAX_WIDTH or height > settings.IMAGE_MAX_HEIGHT:
+        raise ValidationError(
+            f"Maximum image dimensions are "
+            f"{settings.IMAGE_MAX_WIDTH}x{settings.IMAGE_MAX_HEIGHT} pixels."
+        )
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f"Maximum image size is {settings.IMAGE_MAX_PIXELS} pixels."
+        )
+
+
 def tag_name_validator(name: str):
     """
     Raise `ValidationError` when provided tag name contains non-alphabetic characters.
@@ -45,7 +79,7 @@ class BaseModel(models.Model):
     """
 
     created_at = models.DateTimeField(db_index=True, editable=False)
-    updated_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(null=True, db_index=True)
 
     def save(self, *args, **kwargs):
         """
@@ -80,11 +114,26 @@ class Photo(BaseModel):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="photos", editable=False
     )
-    image = models.ImageField(upload_to=save_image, validators=[image_size_validator])
+    image = models.ImageField(
+        upload_to=save_image, validators=[image_size_validator, image_header_validator]
+    )
     title = models.CharField(max_length=50, unique=True)
     tags = models.ManyToManyField(Tag, related_name="photos")
     description = models.TextField(null=True, blank=True)
 
+    # image metadata, extracted once at upload, see `signals.image_metadata_extract`
+    # (`width_field` and `height_field` are not used, they reopen unreadable
+    # images every time a model instance is created)
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
+    image_format = models.CharField(max_length=10, null=True, editable=False)
+    image_size = models.PositiveIntegerField(null=True, editable=False)
+    placeholder = models.TextField(null=True, editable=False)
+    # perceptual hash for near-duplicate search, see `similarity.PhotoHashIndex`
+    phash = models.BigIntegerField(null=True, db_index=True, editable=False)
+    # log2 of the time-decayed review score, see `trending`
+    trending_score = models.FloatField(null=True, db_index=True, editable=False)
+
 
 class Review(BaseModel):
     author = models.ForeignKey(
@@ -98,3 +147,172 @@ class Review(BaseModel):
         ]
     )
     body = models.TextField(null=True, blank=True)
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Precomputed Bayesian average rating of a photo,
+    in the global leaderboard (`tag` is null) or in the leaderboard of a tag.
+    Maintained incrementally, see `leaderboards`.
+    """
+
+    photo = models.ForeignKey(
+        Photo, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, null=True, related_name="leaderboard_entries"
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tag", "-score", "-review_count", "photo"],
+                name="leaderboard_rank_idx",
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["photo", "tag"], name="unique_leaderboard_photo_tag"
+            ),
+            models.UniqueConstraint(
+                fields=["photo"],
+                condition=models.Q(tag__isnull=True),
+                name="unique_leaderboard_photo_global",
+            ),
+        ]
+
+
+class JobWatermark(models.Model):
+    """
+    Position up to which a periodic job processed its input,
+    e.g. id of the last processed review.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.value}"
+
+
+class TrendingChange(models.Model):
+    """
+    Photo whose reviews were updated or deleted, its trending score
+    is recomputed by `trending.recompute_changed_scores`.
+    """
+
+    # not a foreign key, changes are recorded while photos are deleted
+    photo_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return str(self.photo_id)
+
+
+class PhotoNeighbor(models.Model):
+    """
+    Photo rated similarly by the same reviewers, see `recommendations`.
+    """
+
+    photo = models.ForeignKey(Photo, on_delete=models.CASCADE, related_name="neighbors")
+    neighbor = models.ForeignKey(Photo, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["photo", "-score"], name="photo_neighbor_rank_idx")
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["photo", "neighbor"], name="unique_photo_neighbor"
+            )
+        ]
+
+
+class TagCooccurrence(models.Model):
+    """
+    Number of photos tagged with both `tag` and `other`, stored for both
+    orders of a pair. Rows with `tag` equal to `other` hold number of photos
+    with the tag. Maintained incrementally, see `related_tags`.
+    """
+
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="cooccurrences")
+    other = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tag", "other"], name="unique_tag_cooccurrence"
+            )
+        ]
+
+
+class StatsBucket(models.Model):
+    """
+    Numbers of uploads and reviews created within an hour or a day,
+    globally (`tag` is null) or for photos with a tag.
+    Maintained incrementally, see `rollups`.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+    GRANULARITY_CHOICES = [(HOUR, "Hour"), (DAY, "Day")]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    start = models.DateTimeField()
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, null=True, related_name="stats_buckets"
+    )
+    uploads = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # histogram of ratings
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "tag", "start"], name="unique_stats_bucket_tag"
+            ),
+            models.UniqueConstraint(
+                fields=["granularity", "start"],
+                condition=models.Q(tag__isnull=True),
+                name="unique_stats_bucket_global",
+            ),
+        ]
+
+
+class TokenRevocation(models.Model):
+    """
+    Revoked JWT, `key` is "jti:<jti>" for a single token or "user:<id>"
+    for all tokens of a user issued before `revoked_at`, see `revocation`.
+    """
+
+    key = models.CharField(max_length=100, unique=True)
+    revoked_at = models.DateTimeField(db_index=True)
+    # time after which revoked tokens are expired anyway and the row can be deleted
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class MediaTombstone(models.Model):
+    """
+    Media file of a deleted photo, deleted later by `media_gc.sweep`.
+    """
+
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,95 @@
+import numpy as np
+from scipy import sparse
+
+from django.db import transaction
+
+from .models import PhotoNeighbor, Review
+
+
+def load_ratings(chunk_size=100_000):
+    """
+    Returns `(photo_ids, author_ids, ratings)` arrays of all reviews,
+    read with a server-side cursor and without building model instances.
+    """
+
+    rows = Review.objects.values_list("photo_id", "author_id", "rating").order_by()
+    dtype = np.dtype(
+        [("photo", np.int64), ("author", np.int64), ("rating", np.float32)]
+    )
+    data = np.fromiter(rows.iterator(chunk_size=chunk_size), dtype=dtype)
+    return data["photo"], data["author"], data["rating"]
+
+
+def build_matrix(photo_ids, author_ids, ratings):
+    """
+    Returns `(ids, matrix)`, a sparse photos x reviewers matrix of ratings
+    minus the mean rating of their reviewer, with rows scaled to unit
+    length, and photo ids of its rows. Photos are similar when reviewers
+    rated them both above or both below their usual rating, not merely
+    because they rated both.
+    """
+
+    ids, rows = np.unique(photo_ids, return_inverse=True)
+    _, columns = np.unique(author_ids, return_inverse=True)
+    counts = np.bincount(columns)
+    means = np.bincount(columns, weights=ratings) / np.maximum(counts, 1)
+    centered = (ratings - means[columns]).astype(np.float32)
+    matrix = sparse.csr_matrix(
+        (centered, (rows, columns)), shape=(len(ids), columns.max(initial=-1) + 1)
+    )
+    # ratings of reviewers rating all photos alike
+    matrix.eliminate_zeros()
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    return ids, sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def top_neighbors(matrix, k, chunk_size=1000):
+    """
+    Yields `(row, neighbor_rows, scores)` with the `k` most cosine-similar
+    rows of every row. Similarities are computed for `chunk_size` rows at
+    a time, which bounds memory by the number of photos sharing reviewers
+    with the chunk rather than by the square of all photos.
+    """
+
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], chunk_size):
+        similarities = matrix[start : start + chunk_size].dot(transposed).tocsr()
+        for offset in range(similarities.shape[0]):
+            row = start + offset
+            begin, end = similarities.indptr[offset], similarities.indptr[offset + 1]
+            neighbors = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            keep = (neighbors != row) & (scores > 0)
+            neighbors, scores = neighbors[keep], scores[keep]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                neighbors, scores = neighbors[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            yield row, neighbors[order], scores[order]
+
+
+@transaction.atomic
+def rebuild(k=20, chunk_size=1000, batch_size=5000):
+    """
+    Replaces stored neighbors of all photos with the `k` photos whose
+    ratings by the same reviewers have the highest cosine similarity.
+    Returns number of stored neighbors.
+    """
+
+    ids, matrix = build_matrix(*load_ratings())
+    PhotoNeighbor.objects.all().delete()
+
+    created = 0
+    batch = []
+    for row, neighbors, scores in top_neighbors(matrix, k, chunk_size):
+        photo_id = int(ids[row])
+        batch.extend(
+            PhotoNeighbor(photo_id=photo_id, neighbor_id=int(neighbor), score=score)
+            for neighbor, score in zip(ids[neighbors], scores.tolist())
+        )
+        if len(batch) >= batch_size:
+            created += len(PhotoNeighbor.objects.bulk_create(batch))
+            batch = []
+    created += len(PhotoNeighbor.objects.bulk_create(batch))
+    return created
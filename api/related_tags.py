@@ -0,0 +1,182 @@
+from collections import Counter, defaultdict
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Photo, TagCooccurrence
+
+
+def pair_filter(pairs):
+    """
+    Returns a `Q` object matching rows of given `(tag_id, other_id)` pairs.
+    """
+
+    return reduce(
+        or_, (Q(tag_id=tag_id, other_id=other_id) for tag_id, other_id in pairs)
+    )
+
+
+def count_changes(changes, sign):
+    """
+    Returns co-occurrence count deltas of tags added to (`sign` 1)
+    or removed from (`sign` -1) photos, `changes` maps photo ids to sets
+    of changed tag ids. Photo tags are read from the database, so it must
+    be called after tags are added and before they are removed; changed
+    tags not attached to a photo are ignored.
+    """
+
+    current = defaultdict(set)
+    for photo_id, tag_id in Photo.tags.through.objects.filter(
+        photo_id__in=changes
+    ).values_list("photo_id", "tag_id"):
+        current[photo_id].add(tag_id)
+
+    deltas = Counter()
+    for photo_id, changed in changes.items():
+        tags = current[photo_id]
+        pairs = set()
+        for tag_id in changed & tags:
+            pairs.add((tag_id, tag_id))
+            for other_id in tags - {tag_id}:
+                pairs.add((tag_id, other_id))
+                pairs.add((other_id, tag_id))
+        for pair in pairs:
+            deltas[pair] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Adds deltas to stored counts, creating missing rows
+    and deleting rows whose count would drop to zero.
+    """
+
+    pairs_by_delta = defaultdict(list)
+    for pair, delta in deltas.items():
+        if delta:
+            pairs_by_delta[delta].append(pair)
+
+    for delta, pairs in pairs_by_delta.items():
+        rows = TagCooccurrence.objects.filter(pair_filter(pairs))
+        if delta > 0:
+            TagCooccurrence.objects.bulk_create(
+                [
+                    TagCooccurrence(tag_id=tag_id, other_id=other_id)
+                    for tag_id, other_id in pairs
+                ],
+                ignore_conflicts=True,
+            )
+        else:
+            rows.filter(count__lte=-delta).delete()
+        rows.update(count=F("count") + delta)
+
+
+def add_tags(changes):
+    """
+    Counts tags added to photos, `changes` maps photo ids to sets of tag ids.
+    """
+
+    apply_deltas(count_changes(changes, 1))
+
+
+def remove_tags(changes):
+    """
+    Uncounts tags about to be removed from photos,
+    `changes` maps photo ids to sets of tag ids.
+    """
+
+    apply_deltas(count_changes(changes, -1))
+
+
+def get_photo_count():
+    """
+    Returns the number of photos, cached for `RELATED_TAGS_PHOTO_COUNT_TTL`
+    seconds, lifts barely change with photos uploaded meanwhile.
+    """
+
+    return cache.get_or_set(
+        "related_tags:photo_count",
+        Photo.objects.count,
+        settings.RELATED_TAGS_PHOTO_COUNT_TTL,
+    )
+
+
+def get_related(tag, limit=10, min_count=2):
+    """
+    Returns tags most often used together with `tag`, relative to
+    their overall frequency, ranked by lift:
+    P(both tags) / (P(tag) * P(other tag)), where lift > 1
+    means the tags occur together more often than by chance.
+    """
+
+    counts = dict(
+        TagCooccurrence.objects.filter(tag=tag, count__gte=min_count)
+        .exclude(other=tag)
+        .values_list("other_id", "count")
+    )
+    if not counts:
+        return []
+
+    totals = {
+        tag_id: (name, count)
+        for tag_id, name, count in TagCooccurrence.objects.filter(
+            tag_id__in=[tag.id, *counts], other_id=F("tag_id")
+        ).values_list("tag_id", "tag__name", "count")
+    }
+    photo_count = get_photo_count()
+    _, tag_count = totals[tag.id]
+
+    related = []
+    for other_id, count in counts.items():
+        name, other_count = totals[other_id]
+        related.append(
+            {
+                "name": name,
+                "count": count,
+                "lift": count * photo_count / (tag_count * other_count),
+            }
+        )
+    related.sort(key=lambda item: (-item["lift"], -item["count"], item["name"]))
+    return related[:limit]
+
+
+@transaction.atomic
+def rebuild(batch_size=5000):
+    """
+    Recomputes all counts from the photo tags table with a single sparse
+    product of the photos x tags incidence matrix with its transpose.
+    Returns number of stored rows.
+    """
+
+    rows = Photo.tags.through.objects.values_list("photo_id", "tag_id").order_by()
+    dtype = np.dtype([("photo", np.int64), ("tag", np.int64)])
+    data = np.fromiter(rows.iterator(chunk_size=100_000), dtype=dtype)
+    photo_ids, photo_rows = np.unique(data["photo"], return_inverse=True)
+    tag_ids, tag_columns = np.unique(data["tag"], return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(data), dtype=np.int64), (photo_rows, tag_columns)),
+        shape=(len(photo_ids), len(tag_ids)),
+    )
+    counts = incidence.T.dot(incidence).tocoo()
+
+    TagCooccurrence.objects.all().delete()
+    entries = (
+        TagCooccurrence(tag_id=tag_id, other_id=other_id, count=count)
+        for tag_id, other_id, count in zip(
+            tag_ids[counts.row].tolist(),
+            tag_ids[counts.col].tolist(),
+            counts.data.tolist(),
+        )
+    )
+    created = 0
+    while batch := list(islice(entries, batch_size)):
+        created += len(TagCooccurrence.objects.bulk_create(batch))
+    return created
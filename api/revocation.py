@@ -0,0 +1,230 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocation
+
+
+class BloomFilter:
+    """
+    Set of strings answering membership with no false negatives
+    and `error_rate` false positives when holding `capacity` items.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        # double hashing: hash_count positions from two 64-bit hashes
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        if key in self:
+            # keys added again aren't counted twice
+            return
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(key)
+        )
+
+
+class RevocationFilter:
+    """
+    Per-process Bloom filter of `TokenRevocation` keys.
+
+    Rows revoked since the last sync are added at most every
+    `REVOCATION_SYNC_SECONDS`, revocations made in this process immediately.
+    Rows revoked up to `REVOCATION_SYNC_OVERLAP` seconds before the last
+    sync are read again, in case they were committed after it.
+    The filter is rebuilt after `REVOCATION_FILTER_TTL` seconds to drop
+    expired rows, or with a larger capacity once it's full.
+
+    Syncs query the database outside the lock, by a single thread, and
+    swap the new filter in. Other threads keep checking the previous filter
+    meanwhile. Keys revoked during a rebuild are added to both filters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # held by the thread syncing the filter
+        self.sync_lock = threading.Lock()
+        self.filter = None
+        self.synced_until = None
+        self.built_at = 0.0
+        self.synced_at = 0.0
+        # keys revoked while the filter is rebuilt
+        self.changes = None
+
+    def build(self, capacity):
+        with self.lock:
+            self.changes = []
+        try:
+            started = timezone.now()
+            rows = TokenRevocation.objects.filter(expires_at__gt=started)
+            bloom = BloomFilter(
+                max(capacity, 2 * rows.count()), settings.REVOCATION_FILTER_ERROR_RATE
+            )
+            for key in rows.values_list("key", flat=True):
+                bloom.add(key)
+        except BaseException:
+            with self.lock:
+                self.changes = None
+            raise
+        with self.lock:
+            for key in self.changes:
+                bloom.add(key)
+            self.changes = None
+            self.filter, self.synced_until = bloom, started
+            self.built_at = self.synced_at = time.monotonic()
+
+    def load(self):
+        started = timezone.now()
+        overlap = timedelta(seconds=settings.REVOCATION_SYNC_OVERLAP)
+        keys = list(
+            TokenRevocation.objects.filter(
+                revoked_at__gte=self.synced_until - overlap
+            ).values_list("key", flat=True)
+        )
+        with self.lock:
+            for key in keys:
+                self.filter.add(key)
+            self.synced_until = started
+            self.synced_at = time.monotonic()
+
+    def is_stale(self):
+        now = time.monotonic()
+        return (
+            self.filter is None
+            or now - self.built_at > settings.REVOCATION_FILTER_TTL
+            or now - self.synced_at > settings.REVOCATION_SYNC_SECONDS
+        )
+
+    def sync(self):
+        if not self.is_stale():
+            return
+        # without a filter, wait for the thread building it
+        if not self.sync_lock.acquire(blocking=self.filter is None):
+            return
+        try:
+            now = time.monotonic()
+            if (
+                self.filter is None
+                or now - self.built_at > settings.REVOCATION_FILTER_TTL
+            ):
+                self.build(settings.REVOCATION_FILTER_CAPACITY)
+            elif now - self.synced_at > settings.REVOCATION_SYNC_SECONDS:
+                self.load()
+                if self.filter.count > self.filter.capacity:
+                    self.build(2 * self.filter.capacity)
+        finally:
+            self.sync_lock.release()
+
+    def might_contain(self, keys):
+        """
+        Returns keys that may be revoked, others are certainly not.
+        """
+
+        self.sync()
+        with self.lock:
+            if self.filter is None:
+                # cleared since the sync
+                return list(keys)
+            return [key for key in keys if key in self.filter]
+
+    def add(self, key):
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(key)
+            if self.changes is not None:
+                self.changes.append(key)
+
+    def clear(self):
+        with self.lock:
+            self.filter = None
+
+
+revocation_filter = RevocationFilter()
+
+
+def token_keys(token):
+    return [
+        f"jti:{token[api_settings.JTI_CLAIM]}",
+        f"user:{token[api_settings.USER_ID_CLAIM]}",
+    ]
+
+
+def is_revoked(token):
+    """
+    Returns whether a validated token was revoked. Queries the database
+    only for tokens matched by the Bloom filter.
+    """
+
+    keys = revocation_filter.might_contain(token_keys(token))
+    if not keys:
+        return False
+    revocations = dict(
+        TokenRevocation.objects.filter(key__in=keys).values_list("key", "revoked_at")
+    )
+    jti_key, user_key = token_keys(token)
+    if jti_key in revocations:
+        return True
+    # `iat` has a precision of one second, tokens issued within the second
+    # of a revocation of all tokens of the user are revoked as well
+    return user_key in revocations and token["iat"] <= revocations[user_key].timestamp()
+
+
+def revoke(key, expires_at):
+    TokenRevocation.objects.update_or_create(
+        key=key, defaults={"revoked_at": timezone.now(), "expires_at": expires_at}
+    )
+    transaction.on_commit(lambda: revocation_filter.add(key))
+
+
+def revoke_token(token):
+    """
+    Revokes a single access or refresh token.
+    """
+
+    expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+    revoke(f"jti:{token[api_settings.JTI_CLAIM]}", expires_at)
+
+
+def revoke_user(user_id):
+    """
+    Revokes all tokens of a user issued until now.
+    """
+
+    lifetime = max(
+        api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME
+    )
+    revoke(f"user:{user_id}", timezone.now() + lifetime)
+
+
+def purge_expired():
+    """
+    Deletes revocations of tokens that expired anyway, returns their number.
+    """
+
+    deleted, _ = TokenRevocation.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,272 @@
+from collections import Counter, defaultdict
+from datetime import timezone
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncDay, TruncHour
+
+from .models import Photo, Review, StatsBucket
+
+RATINGS = range(1, 6)
+COUNTERS = ["uploads", "reviews", "rating_sum", *(f"rating_{r}" for r in RATINGS)]
+TRUNCATE = {StatsBucket.HOUR: TruncHour, StatsBucket.DAY: TruncDay}
+
+
+def bucket_start(moment, granularity):
+    """
+    Returns start of the UTC hour or day containing `moment`.
+    """
+
+    moment = moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == StatsBucket.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def bucket_keys(moment, tag_ids):
+    """
+    Returns `(granularity, tag_id, start)` keys of buckets containing `moment`,
+    `None` in `tag_ids` stands for global buckets.
+    """
+
+    return [
+        (granularity, tag_id, bucket_start(moment, granularity))
+        for granularity in TRUNCATE
+        for tag_id in tag_ids
+    ]
+
+
+def key_filter(keys):
+    """
+    Returns a `Q` object matching buckets of given keys.
+    """
+
+    return reduce(
+        or_,
+        (
+            Q(granularity=granularity, tag_id=tag_id, start=start)
+            for granularity, tag_id, start in keys
+        ),
+    )
+
+
+def add_upload(deltas, created_at, tag_ids, sign=1):
+    for key in bucket_keys(created_at, tag_ids):
+        deltas[key]["uploads"] += sign
+
+
+def add_review(deltas, created_at, rating, tag_ids, sign=1):
+    for key in bucket_keys(created_at, tag_ids):
+        counters = deltas[key]
+        counters["reviews"] += sign
+        counters["rating_sum"] += sign * rating
+        counters[f"rating_{rating}"] += sign
+
+
+def apply_deltas(deltas):
+    """
+    Adds counter deltas to buckets, `deltas` maps bucket keys to `Counter`s.
+    Buckets getting the same deltas are updated with a single query,
+    buckets left empty are deleted.
+    """
+
+    keys_by_changes = defaultdict(list)
+    for key, counters in deltas.items():
+        changes = tuple(sorted(item for item in counters.items() if item[1]))
+        if changes:
+            keys_by_changes[changes].append(key)
+
+    emptied = []
+    for changes, keys in keys_by_changes.items():
+        if any(delta > 0 for _, delta in changes):
+            StatsBucket.objects.bulk_create(
+                [
+                    StatsBucket(granularity=granularity, tag_id=tag_id, start=start)
+                    for granularity, tag_id, start in keys
+                ],
+                ignore_conflicts=True,
+            )
+        if any(delta < 0 for _, delta in changes):
+            emptied.extend(keys)
+        StatsBucket.objects.filter(key_filter(keys)).update(
+            **{
+                field: Greatest(F(field) + delta, 0) if delta < 0 else F(field) + delta
+                for field, delta in changes
+            }
+        )
+    if emptied:
+        StatsBucket.objects.filter(key_filter(emptied), uploads=0, reviews=0).delete()
+
+
+def get_tag_ids(photo_id):
+    return list(
+        Photo.tags.through.objects.filter(photo_id=photo_id).values_list(
+            "tag_id", flat=True
+        )
+    )
+
+
+def record_upload(photo, sign=1):
+    """
+    Counts a created (`sign` 1) or deleted (`sign` -1) photo,
+    must be called while the photo is still tagged.
+    """
+
+    record_uploads([photo], sign)
+
+
+def record_uploads(photos, sign=1):
+    """
+    Counts created (`sign` 1) or deleted (`sign` -1) photos,
+    must be called while the photos are still tagged.
+    """
+
+    tag_ids = defaultdict(list)
+    for photo_id, tag_id in Photo.tags.through.objects.filter(
+        photo_id__in=[photo.id for photo in photos]
+    ).values_list("photo_id", "tag_id"):
+        tag_ids[photo_id].append(tag_id)
+
+    deltas = defaultdict(Counter)
+    for photo in photos:
+        add_upload(deltas, photo.created_at, [None, *tag_ids[photo.id]], sign)
+    apply_deltas(deltas)
+
+
+def record_review(review, sign=1):
+    """
+    Counts a created (`sign` 1) or deleted (`sign` -1) review,
+    must be called while its photo is still tagged.
+    """
+
+    deltas = defaultdict(Counter)
+    tag_ids = [None, *get_tag_ids(review.photo_id)]
+    add_review(deltas, review.created_at, review.rating, tag_ids, sign)
+    apply_deltas(deltas)
+
+
+def record_rating_change(review, previous_rating):
+    """
+    Moves an updated review to another rating, in buckets of its creation time.
+    """
+
+    deltas = defaultdict(Counter)
+    tag_ids = [None, *get_tag_ids(review.photo_id)]
+    add_review(deltas, review.created_at, previous_rating, tag_ids, -1)
+    add_review(deltas, review.created_at, review.rating, tag_ids)
+    apply_deltas(deltas)
+
+
+def record_tags(changes, sign=1):
+    """
+    Counts photos and their reviews in buckets of tags added to (`sign` 1)
+    or about to be removed from (`sign` -1) the photos, `changes` maps
+    photo ids to sets of tag ids. Tags not attached to a photo are ignored.
+    """
+
+    current = defaultdict(set)
+    for photo_id, tag_id in Photo.tags.through.objects.filter(
+        photo_id__in=changes
+    ).values_list("photo_id", "tag_id"):
+        current[photo_id].add(tag_id)
+    reviews = defaultdict(list)
+    for photo_id, created_at, rating in Review.objects.filter(
+        photo_id__in=changes
+    ).values_list("photo_id", "created_at", "rating"):
+        reviews[photo_id].append((created_at, rating))
+
+    deltas = defaultdict(Counter)
+    photos = Photo.objects.filter(id__in=changes).values_list("id", "created_at")
+    for photo_id, created_at in photos:
+        tag_ids = changes[photo_id] & current[photo_id]
+        if not tag_ids:
+            continue
+        add_upload(deltas, created_at, tag_ids, sign)
+        for review_created_at, rating in reviews[photo_id]:
+            add_review(deltas, review_created_at, rating, tag_ids, sign)
+    apply_deltas(deltas)
+
+
+def get_buckets(granularity, since, until, tag=None):
+    """
+    Returns buckets starting within `[since, until)` in chronological order,
+    buckets without uploads and reviews are omitted.
+    """
+
+    rows = (
+        StatsBucket.objects.filter(
+            granularity=granularity, tag=tag, start__gte=since, start__lt=until
+        )
+        .order_by("start")
+        .values_list("start", *COUNTERS)
+    )
+    buckets = []
+    for start, uploads, reviews, rating_sum, *histogram in rows:
+        buckets.append(
+            {
+                "start": start,
+                "uploads": uploads,
+                "reviews": reviews,
+                "rating_sum": rating_sum,
+                "average_rating": rating_sum / reviews if reviews else None,
+                "ratings": dict(zip(map(str, RATINGS), histogram)),
+            }
+        )
+    return buckets
+
+
+@transaction.atomic
+def rebuild(batch_size=5000):
+    """
+    Recomputes all buckets with `GROUP BY` queries over photos and reviews.
+    Returns number of stored buckets.
+    """
+
+    StatsBucket.objects.all().delete()
+
+    buckets = {}
+
+    def bucket(granularity, tag_id, start):
+        key = (granularity, tag_id, start)
+        if key not in buckets:
+            buckets[key] = StatsBucket(
+                granularity=granularity, tag_id=tag_id, start=start
+            )
+        return buckets[key]
+
+    review_counters = {
+        "reviews": Count("id"),
+        "rating_sum": Sum("rating"),
+        **{f"rating_{r}": Count("id", filter=Q(rating=r)) for r in RATINGS},
+    }
+    photo_tags = Photo.tags.through.objects
+    for granularity, trunc in TRUNCATE.items():
+        photos = Photo.objects.annotate(start=trunc("created_at", tzinfo=timezone.utc))
+        tagged_photos = photo_tags.annotate(
+            start=trunc("photo__created_at", tzinfo=timezone.utc)
+        )
+        for rows, fields in [(photos, ["start"]), (tagged_photos, ["start", "tag_id"])]:
+            for row in rows.values(*fields).annotate(uploads=Count("id")).order_by():
+                entry = bucket(granularity, row.get("tag_id"), row["start"])
+                entry.uploads = row["uploads"]
+
+        reviews = Review.objects.annotate(
+            start=trunc("created_at", tzinfo=timezone.utc)
+        )
+        tag_reviews = reviews.filter(photo__tags__isnull=False).annotate(
+            tag_id=F("photo__tags")
+        )
+        for rows, fields in [(reviews, ["start"]), (tag_reviews, ["start", "tag_id"])]:
+            for row in rows.values(*fields).annotate(**review_counters).order_by():
+                entry = bucket(granularity, row.get("tag_id"), row["start"])
+                for field in review_counters:
+                    setattr(entry, field, row[field])
+
+    entries = iter(buckets.values())
+    created = 0
+    while batch := list(islice(entries, batch_size)):
+        created += len(StatsBucket.objects.bulk_create(batch))
+    return created
@@ -1,61 +1,344 @@
+import asyncio
+from collections import OrderedDict
+from datetime import timedelta
+
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Avg, Prefetch
+from django.urls import Resolver404, resolve
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.reverse import reverse
+from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .hyperlinks import absolute_url, get_absolute_prefix, get_url_template
+from .export import OUTPUTS, RESOURCES
+from .imaging import dhash
+from .models import (
+    Photo,
+    StatsBucket,
+    Tag,
+    Review,
+    image_header_validator,
+    image_size_validator,
+)
+from .rollups import bucket_start
+from .similarity import photo_hash_index
+
+User = get_user_model()
+
+# annotation of photos with the average rating of their reviews
+AVERAGE_RATING = Avg("reviews__rating")
+
+
+class TemplatedHyperlinkMixin:
+    """
+    Mixin for hyperlinked fields that builds urls by formatting a template
+    reversed once per request, instead of calling `reverse()` for every object.
+    Objects with non-integer url kwargs fall back to `reverse()`.
+    """
+
+    # url kwarg name -> object attribute, defaults to `lookup_url_kwarg: lookup_field`
+    url_kwargs = None
 
-from .models import Photo, Tag, Review
+    def get_url_kwargs(self, obj):
+        url_kwargs = self.url_kwargs or {self.lookup_url_kwarg: self.lookup_field}
+        return {name: getattr(obj, attr) for name, attr in url_kwargs.items()}
+
+    def get_url_template(self, view_name, url_kwargs, request):
+        cached_request, template = getattr(self, "_url_template", (None, None))
+        if template is None or cached_request is not request:
+            template = get_url_template(view_name, url_kwargs, request)
+            self._url_template = (request, template)
+        return template
+
+    def get_url(self, obj, view_name, request, format):
+        url_kwargs = self.get_url_kwargs(obj)
+        if (
+            format
+            or getattr(request, "versioning_scheme", None) is not None
+            or not all(type(value) is int for value in url_kwargs.values())
+        ):
+            return reverse(view_name, kwargs=url_kwargs, request=request, format=format)
+        template = self.get_url_template(view_name, url_kwargs, request)
+        return template.format(**url_kwargs)
+
+
+class TemplatedHyperlinkedRelatedField(
+    TemplatedHyperlinkMixin, serializers.HyperlinkedRelatedField
+):
+    """
+    `HyperlinkedRelatedField` that formats urls from a precompiled template.
+    """
+
+
+class TemplatedHyperlinkedIdentityField(
+    TemplatedHyperlinkMixin, serializers.HyperlinkedIdentityField
+):
+    """
+    `HyperlinkedIdentityField` that formats urls from a precompiled template.
+    """
 
 
-class ReviewRelatedHyperLink(serializers.HyperlinkedRelatedField):
+class ReviewRelatedHyperLink(TemplatedHyperlinkedRelatedField):
     """
     Custom `HyperlinkedRelatedField` class for `Review` instances
     that require `photo_id` in their url.
     """
 
     view_name = "review-detail"
-
-    def get_url(self, obj, view_name, request, format):
-        url_kwargs = {
-            "photo_id": obj.photo.id,
-            "pk": obj.id,
-        }
-        return reverse(
-            view_name,
-            kwargs=url_kwargs,
-            request=request,
-            format=format,
-        )
+    url_kwargs = {"photo_id": "photo_id", "pk": "pk"}
 
 
-class ReviewIdHyperLink(serializers.HyperlinkedIdentityField):
+class ReviewIdHyperLink(TemplatedHyperlinkedIdentityField):
     """
     Custom `HyperlinkedIdentityField` class for `Review` instances
     that require `photo_id` in their url.
     """
 
-    def get_url(self, obj, view_name, request, format):
-        url_kwargs = {
-            "photo_id": obj.photo.id,
-            "pk": obj.id,
-        }
-        return reverse(
-            view_name,
-            kwargs=url_kwargs,
-            request=request,
-            format=format,
+    url_kwargs = {"photo_id": "photo_id", "pk": "pk"}
+
+
+class ImageHeaderField(serializers.ImageField):
+    """
+    Image field rejecting files too large, in unsupported formats or with
+    too many pixels from their size and header, before Pillow verifies them.
+    """
+
+    def to_internal_value(self, data):
+        file = serializers.FileField.to_internal_value(self, data)
+        try:
+            image_size_validator(file)
+            image_header_validator(file)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.messages)
+        return super().to_internal_value(data)
+
+
+class FieldQuery:
+    """
+    Columns, related objects and annotations read by a serializer field.
+    """
+
+    def __init__(self, only=(), select_related=(), prefetch_related=(), annotate=None):
+        self.only = list(only)
+        self.select_related = list(select_related)
+        self.prefetch_related = list(prefetch_related)
+        self.annotate = dict(annotate or {})
+
+    def extend(self, other):
+        self.only += other.only
+        self.select_related += other.select_related
+        self.prefetch_related += other.prefetch_related
+        self.annotate.update(other.annotate)
+
+    def prefixed(self, prefix):
+        """
+        Returns the query of a related object selected as `prefix`.
+        """
+
+        return FieldQuery(
+            only=[f"{prefix}__{name}" for name in self.only],
+            select_related=[prefix]
+            + [f"{prefix}__{name}" for name in self.select_related],
         )
 
+    def apply(self, queryset):
+        if self.annotate:
+            queryset = queryset.annotate(**self.annotate)
+        if self.select_related:
+            queryset = queryset.select_related(*dict.fromkeys(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset.only(*dict.fromkeys(self.only))
+
+
+class SparseFieldsMixin:
+    """
+    Model serializer mixin taking `fields`, names of the only fields to return,
+    and `expand`, names of `expandable_fields` relations returned as nested
+    objects. `prepare_queryset()` reads only what these fields need:
+    model columns of their source, related objects of dotted sources and
+    relations, or their `field_queries`.
+    """
+
+    # relation name -> serializer class of expanded objects
+    expandable_fields = {}
+    # field name -> FieldQuery, for fields not reading their source column
+    field_queries = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        unknown = set(expand) - set(self.expandable_fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"expand": f"Unknown relations: {', '.join(sorted(unknown))}."}
+            )
+        self.expanded = list(expand)
+        model = self.Meta.model
+        for name in self.expanded:
+            relation = model._meta.get_field(name)
+            self.fields[name] = self.expandable_fields[name](
+                many=relation.many_to_many or relation.one_to_many, read_only=True
+            )
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError(
+                    {"fields": f"Unknown fields: {', '.join(sorted(unknown))}."}
+                )
+            for name in set(self.fields) - set(fields) - set(self.expanded):
+                self.fields.pop(name)
+
+    def get_field_query(self, name, field, model):
+        if name in self.expanded:
+            return self.get_expanded_query(name, field, model)
+        if name in self.field_queries:
+            return self.field_queries[name]
+        if field.source == "*":
+            return FieldQuery()
+        path = field.source.split(".")
+        try:
+            model_field = model._meta.get_field(path[0])
+        except FieldDoesNotExist:
+            return FieldQuery()
+        if model_field.many_to_many or model_field.one_to_many:
+            return FieldQuery(prefetch_related=[path[0]])
+        if len(path) > 1:
+            return FieldQuery(select_related=[path[0]], only=["__".join(path)])
+        return FieldQuery(only=[path[0]])
+
+    def get_expanded_query(self, name, field, model):
+        relation = model._meta.get_field(name)
+        nested = getattr(field, "child", field)
+        if relation.many_to_many or relation.one_to_many:
+            query = nested.get_query(relation.related_model)
+            if relation.one_to_many:
+                # needed to assign prefetched objects to their photo
+                query.only.append(relation.field.name)
+            queryset = query.apply(relation.related_model._default_manager.all())
+            return FieldQuery(prefetch_related=[Prefetch(name, queryset=queryset)])
+        return nested.get_query(relation.related_model).prefixed(name)
+
+    def get_query(self, model, also=()):
+        """
+        Returns the `FieldQuery` of all fields, and of `field_queries`
+        named in `also`, such as annotations used for ordering.
+        """
+
+        query = FieldQuery(only=[model._meta.pk.name])
+        for name, field in self.fields.items():
+            query.extend(self.get_field_query(name, field, model))
+        for name in also:
+            if name in self.field_queries and name not in self.fields:
+                query.extend(self.field_queries[name])
+        return query
+
+    def prepare_queryset(self, queryset, also=()):
+        return self.get_query(queryset.model, also).apply(queryset)
+
+
+class UserSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    User serializer for expanded authors.
+    """
+
+    class Meta:
+        model = User
+        fields = ["id", "username"]
+
+
+class TagSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Tag serializer for expanded photo tags.
+    """
+
+    class Meta:
+        model = Tag
+        fields = ["id", "name"]
+
+
+class PhotoSummarySerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
+    """
+    Photo serializer for expanded review photos.
+    """
+
+    serializer_url_field = TemplatedHyperlinkedIdentityField
+
+    class Meta:
+        model = Photo
+        fields = ["id", "url", "title", "image"]
+
+
+class ReviewListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Review serializer for list action, also used for reviews expanded in photos.
+    """
+
+    author = serializers.CharField(source="author.username")
+    url = ReviewIdHyperLink(view_name="review-detail")
+
+    expandable_fields = {
+        "author": UserSummarySerializer,
+        "photo": PhotoSummarySerializer,
+    }
+    field_queries = {"url": FieldQuery(only=["photo"])}
+
+    class Meta:
+        model = Review
+        fields = ["id", "url", "author", "rating", "body"]
+
 
 class PhotoCreateSerializer(serializers.ModelSerializer):
     """
     Photo serializer for create action.
     """
 
-    image = serializers.ImageField(required=True)
+    image = ImageHeaderField(required=True)
     tags = serializers.ListField(write_only=True, required=False)
 
     class Meta:
         model = Photo
         fields = ["id", "image", "title", "description", "tags"]
 
+    def validate_image(self, image):
+        """
+        Looks for near-duplicates of the image depending on `PHOTO_DUPLICATE_POLICY`:
+        "reject" fails validation, "warn" lists them in the response.
+        """
+
+        policy = getattr(settings, "PHOTO_DUPLICATE_POLICY", "allow")
+        if policy == "allow":
+            return image
+
+        image.seek(0)
+        with Image.open(image) as opened:
+            phash = dhash(opened)
+        image.seek(0)
+        matches = photo_hash_index.search(
+            phash, getattr(settings, "PHOTO_DUPLICATE_DISTANCE", 6)
+        )
+        self.near_duplicates = sorted(id for _, id in matches)
+
+        if self.near_duplicates and policy == "reject":
+            ids = ", ".join(str(id) for id in self.near_duplicates)
+            raise serializers.ValidationError(
+                f"Image is a near-duplicate of photos: {ids}."
+            )
+        return image
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if getattr(self, "near_duplicates", None):
+            data["near_duplicates"] = self.near_duplicates
+        return data
+
     def create(self, validated_data):
         """
         Creates photo object and assigns provided tags to it.
@@ -71,7 +354,21 @@ class PhotoCreateSerializer(serializers.ModelSerializer):
         return photo
 
 
-class PhotoDetailSerializer(serializers.ModelSerializer):
+PHOTO_EXPANDABLE_FIELDS = {
+    "author": UserSummarySerializer,
+    "tags": TagSummarySerializer,
+    "reviews": ReviewListSerializer,
+}
+PHOTO_FIELD_QUERIES = {
+    "average_rating": FieldQuery(annotate={"average_rating": AVERAGE_RATING}),
+    # review urls only need ids
+    "reviews": FieldQuery(
+        prefetch_related=[Prefetch("reviews", queryset=Review.objects.only("photo"))]
+    ),
+}
+
+
+class PhotoDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Photo serializer for retrieve action.
     """
@@ -83,6 +380,9 @@ class PhotoDetailSerializer(serializers.ModelSerializer):
     created_at = serializers.DateTimeField(format="%d.%m.%Y %H:%M:%S")
     updated_at = serializers.DateTimeField(format="%d.%m.%Y %H:%M:%S")
 
+    expandable_fields = PHOTO_EXPANDABLE_FIELDS
+    field_queries = PHOTO_FIELD_QUERIES
+
     class Meta:
         model = Photo
         fields = [
@@ -99,14 +399,19 @@ class PhotoDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class PhotoListSerializer(serializers.HyperlinkedModelSerializer):
+class PhotoListSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """
     Photo serializer for list action.
     """
 
+    serializer_url_field = TemplatedHyperlinkedIdentityField
+
     author = serializers.CharField(source="author.username")
     average_rating = serializers.FloatField()
 
+    expandable_fields = PHOTO_EXPANDABLE_FIELDS
+    field_queries = PHOTO_FIELD_QUERIES
+
     class Meta:
         model = Photo
         fields = [
@@ -116,6 +421,11 @@ class PhotoListSerializer(serializers.HyperlinkedModelSerializer):
             "title",
             "image",
             "average_rating",
+            "width",
+            "height",
+            "image_format",
+            "image_size",
+            "placeholder",
         ]
 
 
@@ -152,7 +462,7 @@ class TagSerializer(serializers.ModelSerializer):
     Tag serializer for list action.
     """
 
-    photos = serializers.HyperlinkedRelatedField(
+    photos = TemplatedHyperlinkedRelatedField(
         many=True, read_only=True, view_name="photo-detail"
     )
     number_of_photos = serializers.IntegerField()
@@ -172,31 +482,21 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         fields = ["id", "rating", "body"]
 
 
-class ReviewListSerializer(serializers.ModelSerializer):
-    """
-    Review serializer for list action.
-    """
-
-    author = serializers.CharField(source="author.username")
-    url = ReviewIdHyperLink(view_name="review-detail")
-
-    class Meta:
-        model = Review
-        fields = ["id", "url", "author", "rating", "body"]
-
-
-class ReviewDetailSerializer(serializers.ModelSerializer):
+class ReviewDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Review serializer for retrieve action.
     """
 
     author = serializers.CharField(source="author.username")
-    photo = serializers.HyperlinkedRelatedField(
-        read_only=True, view_name="photo-detail"
-    )
+    photo = TemplatedHyperlinkedRelatedField(read_only=True, view_name="photo-detail")
     created_at = serializers.DateTimeField(format="%d.%m.%Y %H:%M:%S")
     updated_at = serializers.DateTimeField(format="%d.%m.%Y %H:%M:%S")
 
+    expandable_fields = {
+        "author": UserSummarySerializer,
+        "photo": PhotoSummarySerializer,
+    }
+
     class Meta:
         model = Review
         fields = [
@@ -220,3 +520,303 @@ class ReviewPatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ["rating", "body"]
+
+
+class ValuesListSerializer:
+    """
+    Read-only serializer for list actions.
+
+    Fetches only `values` columns with `.values_list()` and maps rows to output
+    dicts, without building model instances. Subclasses return the same data
+    as the model serializer they replace. Without `values`, the `fields`
+    columns are fetched and returned as they are.
+    """
+
+    fields = []
+    values = []
+
+    def __init__(self, queryset, context=None):
+        self.queryset = queryset
+        self.context = context or {}
+
+    @property
+    def request(self):
+        return self.context.get("request")
+
+    def get_row_mapper(self):
+        """
+        Returns a function mapping a `values` row to a tuple of `fields` values,
+        rows are left as they are by default.
+        """
+
+        return tuple
+
+    def get_rows(self):
+        return self.queryset.values_list(*(self.values or self.fields))
+
+    @property
+    def data(self):
+        fields = self.fields
+        map_row = self.get_row_mapper()
+        return ReturnList(
+            [OrderedDict(zip(fields, map_row(row))) for row in self.get_rows()],
+            serializer=self,
+        )
+
+    def get_file_url(self, model_field):
+        """
+        Returns a function giving the same url as DRF's `FileField`
+        for a file name stored in `model_field`.
+        """
+
+        storage = model_field.storage
+        request = self.request
+        prefix = get_absolute_prefix(request) if request is not None else None
+
+        def file_url(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            if request is None:
+                return url
+            return absolute_url(prefix, url, request)
+
+        return file_url
+
+
+class PhotoListValuesSerializer(ValuesListSerializer):
+    """
+    `.values()` based counterpart of `PhotoListSerializer`.
+    """
+
+    fields = PhotoListSerializer.Meta.fields
+    values = [
+        "id",
+        "author__username",
+        "title",
+        "image",
+        "average_rating",
+        "width",
+        "height",
+        "image_format",
+        "image_size",
+        "placeholder",
+    ]
+
+    def get_row_mapper(self):
+        url = get_url_template("photo-detail", ["pk"], self.request)
+        image_url = self.get_file_url(Photo._meta.get_field("image"))
+
+        def map_row(row):
+            id, author, title, image, average_rating, *metadata = row
+            return (
+                id,
+                url.format(pk=id),
+                author,
+                title,
+                image_url(image),
+                None if average_rating is None else float(average_rating),
+                *metadata,
+            )
+
+        return map_row
+
+
+class ReviewListValuesSerializer(ValuesListSerializer):
+    """
+    `.values()` based counterpart of `ReviewListSerializer`.
+    """
+
+    fields = ReviewListSerializer.Meta.fields
+    values = ["id", "photo_id", "author__username", "rating", "body"]
+
+    def get_row_mapper(self):
+        url = get_url_template("review-detail", ["photo_id", "pk"], self.request)
+
+        def map_row(row):
+            id, photo_id, author, rating, body = row
+            return (id, url.format(photo_id=photo_id, pk=id), author, rating, body)
+
+        return map_row
+
+
+class TagValuesSerializer(ValuesListSerializer):
+    """
+    `.values()` based counterpart of `TagSerializer`.
+    Photo urls of all tags are fetched with a single query.
+    """
+
+    fields = TagSerializer.Meta.fields
+    values = ["id", "name", "number_of_photos"]
+
+    def get_rows(self):
+        rows = list(super().get_rows())
+        through = Photo.tags.through.objects.filter(tag_id__in=[row[0] for row in rows])
+        pairs = through.order_by("id").values_list("tag_id", "photo_id")
+
+        self.photo_ids = {}
+        for tag_id, photo_id in pairs:
+            self.photo_ids.setdefault(tag_id, []).append(photo_id)
+        return rows
+
+    def get_row_mapper(self):
+        url = get_url_template("photo-detail", ["pk"], self.request)
+
+        def map_row(row):
+            id, name, number_of_photos = row
+            photos = [url.format(pk=pk) for pk in self.photo_ids.get(id, [])]
+            return (id, name, number_of_photos, photos)
+
+        return map_row
+
+
+class LeaderboardValuesSerializer(ValuesListSerializer):
+    """
+    Serializer for leaderboard entries, reads photo data
+    with the entries in a single query.
+    """
+
+    fields = [
+        "id",
+        "url",
+        "author",
+        "title",
+        "image",
+        "average_rating",
+        "review_count",
+        "score",
+    ]
+    values = [
+        "photo_id",
+        "photo__author__username",
+        "photo__title",
+        "photo__image",
+        "review_count",
+        "rating_sum",
+        "score",
+    ]
+
+    def get_row_mapper(self):
+        url = get_url_template("photo-detail", ["pk"], self.request)
+        image_url = self.get_file_url(Photo._meta.get_field("image"))
+
+        def map_row(row):
+            id, author, title, image, review_count, rating_sum, score = row
+            return (
+                id,
+                url.format(pk=id),
+                author,
+                title,
+                image_url(image),
+                rating_sum / review_count if review_count else None,
+                review_count,
+                score,
+            )
+
+        return map_row
+
+
+class StatsQuerySerializer(serializers.Serializer):
+    """
+    Validates query parameters of the stats endpoint. The requested
+    time range defaults to `STATS_DEFAULT_BUCKETS` buckets ending now.
+    """
+
+    granularity = serializers.ChoiceField(
+        choices=StatsBucket.GRANULARITY_CHOICES, default=StatsBucket.DAY
+    )
+    tag = serializers.CharField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if data["granularity"] == StatsBucket.HOUR:
+            step = timedelta(hours=1)
+        else:
+            step = timedelta(days=1)
+        until = data.get("until") or timezone.now()
+        since = data.get("since") or until - step * settings.STATS_DEFAULT_BUCKETS
+        # include the bucket containing `since`
+        since = bucket_start(since, data["granularity"])
+
+        if since >= until:
+            raise serializers.ValidationError("'since' must be earlier than 'until'.")
+        if (until - since) / step > settings.STATS_MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"At most {settings.STATS_MAX_BUCKETS} buckets can be requested."
+            )
+        data["since"], data["until"] = since, until
+        return data
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Validates query parameters of the export endpoint.
+    """
+
+    resource = serializers.ChoiceField(choices=list(RESOURCES), default="photos")
+    output = serializers.ChoiceField(choices=list(OUTPUTS), default="ndjson")
+    updated_since = serializers.DateTimeField(required=False)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    Validates a sub-request of a batch.
+    """
+
+    method = serializers.ChoiceField(
+        choices=["GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"]
+    )
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        path = value.partition("?")[0]
+        if not path.startswith("/api/"):
+            raise serializers.ValidationError("Only API paths can be batched.")
+        if path.rstrip("/") == reverse("batch").rstrip("/"):
+            raise serializers.ValidationError("Batches can't be nested.")
+        try:
+            match = resolve(path)
+        except Resolver404:
+            # answered with a 404 response
+            return value
+        if asyncio.iscoroutinefunction(match.func):
+            raise serializers.ValidationError(
+                "Asynchronous views, such as event streams, can't be batched."
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Validates the sub-requests of a batch, at most `BATCH_MAX_REQUESTS`.
+    """
+
+    requests = BatchRequestSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests can be batched."
+            )
+        return value
+
+
+class LogoutSerializer(serializers.Serializer):
+    """
+    Validates the refresh token revoked on logout, which must belong
+    to the authenticated user.
+    """
+
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error))
+        if token.get(api_settings.USER_ID_CLAIM) != self.context["request"].user.id:
+            raise serializers.ValidationError("Token belongs to another user.")
+        return token
@@ -1,17 +1,31 @@
-import os
-
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+
+from . import events, leaderboards, media_gc, related_tags, rollups, trending
+from .authentication import user_cache
+from .imaging import read_image_metadata
+from .models import Photo, Review
+from .similarity import photo_hash_index
 
-from .models import Photo
+User = get_user_model()
 
 
 @receiver(post_delete, sender=Photo)
 def image_delete_from_media(sender, instance, **kwargs):
     """
-    Deletes image file from /media directory when Photo instance is deleted.
+    Records image file of deleted Photo instance for deletion
+    from /media directory by `sweep_media` command.
     """
-    instance.image.delete(save=False)
+
+    media_gc.record_deleted([instance.image.name])
 
 
 @receiver(pre_save, sender=Photo)
@@ -22,12 +36,271 @@ def image_rename_after_patch(sender, instance, **kwargs):
 
     # perform action only on existing instances
     if instance.pk:
-        old_name = sender.objects.get(pk=instance.id).image.url
+        old_name = sender.objects.get(pk=instance.id).image.name
         ext = old_name.split(".")[-1]
         title = instance.title.replace(" ", "_")
-        new_name = f"media/photos/{title}.{ext}"
+        new_name = f"photos/{title}.{ext}"
 
         # perform action only when title changed
-        if os.path.isfile(old_name[1:]) and new_name != old_name[-1]:
-            os.rename(old_name[1:], new_name)
-            instance.image = new_name.replace("media/", "", 1)
+        storage = instance.image.storage
+        if new_name != old_name and storage.exists(old_name):
+            instance.image = storage.move(old_name, new_name)
+
+
+@receiver(pre_save, sender=Photo)
+def image_metadata_extract(sender, instance, **kwargs):
+    """
+    Stores dimensions, format, size and placeholder of a newly uploaded image.
+    """
+
+    # perform action only on files that are not saved in storage yet
+    if instance.image and not instance.image._committed:
+        for field, value in read_image_metadata(instance.image).items():
+            setattr(instance, field, value)
+
+
+@receiver(post_save, sender=Photo)
+def photo_hash_index_add(sender, instance, created, **kwargs):
+    """
+    Adds perceptual hash of a new photo to the near-duplicate index.
+    """
+
+    if created and instance.phash is not None:
+        transaction.on_commit(lambda: photo_hash_index.add(instance.phash, instance.id))
+
+
+@receiver(post_delete, sender=Photo)
+def photo_hash_index_remove(sender, instance, **kwargs):
+    """
+    Removes perceptual hash of a deleted photo from the near-duplicate index.
+    """
+
+    if instance.phash is not None:
+        photo_id = instance.id
+        transaction.on_commit(lambda: photo_hash_index.remove(instance.phash, photo_id))
+
+
+@receiver(post_save, sender=Photo)
+def leaderboard_photo_created(sender, instance, created, **kwargs):
+    """
+    Adds a new photo to the global leaderboard.
+    """
+
+    if created:
+        leaderboards.add_photo(instance.id)
+
+
+@receiver(m2m_changed, sender=Photo.tags.through)
+def leaderboard_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps tag leaderboards in sync with tags of photos.
+    """
+
+    if action == "post_add":
+        if reverse:
+            pairs = [(photo_id, instance.id) for photo_id in pk_set]
+        else:
+            pairs = [(instance.id, tag_id) for tag_id in pk_set]
+        leaderboards.add_tags(pairs)
+    elif action == "post_remove":
+        if reverse:
+            leaderboards.remove_tags(photo_ids=pk_set, tag_ids=[instance.id])
+        else:
+            leaderboards.remove_tags(photo_ids=[instance.id], tag_ids=pk_set)
+    elif action == "pre_clear":
+        if reverse:
+            leaderboards.remove_tags(tag_ids=[instance.id])
+        else:
+            leaderboards.remove_tags(photo_ids=[instance.id])
+
+
+def get_tag_changes(instance, action, reverse, pk_set):
+    """
+    Returns changed tags of `m2m_changed` on photo tags
+    as a dict mapping photo ids to sets of tag ids.
+    """
+
+    if action == "pre_clear":
+        if reverse:
+            pk_set = instance.photos.values_list("id", flat=True)
+        else:
+            pk_set = instance.tags.values_list("id", flat=True)
+    if reverse:
+        return {photo_id: {instance.id} for photo_id in pk_set}
+    return {instance.id: set(pk_set)}
+
+
+@receiver(m2m_changed, sender=Photo.tags.through)
+def tag_cooccurrence_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps tag co-occurrence counts in sync with tags of photos.
+    """
+
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+
+    changes = get_tag_changes(instance, action, reverse, pk_set)
+
+    if action == "post_add":
+        related_tags.add_tags(changes)
+    else:
+        related_tags.remove_tags(changes)
+
+
+@receiver(pre_delete, sender=Photo)
+def tag_cooccurrence_photo_deleted(sender, instance, **kwargs):
+    """
+    Uncounts tags of a deleted photo, photo tags are deleted
+    without sending `m2m_changed`.
+    """
+
+    tag_ids = set(instance.tags.values_list("id", flat=True))
+    if tag_ids:
+        related_tags.remove_tags({instance.id: tag_ids})
+
+
+@receiver(pre_save, sender=Review)
+def review_rating_before_update(sender, instance, **kwargs):
+    """
+    Remembers the stored rating of an updated review.
+    """
+
+    # perform action only on existing instances
+    if instance.pk:
+        ratings = sender.objects.filter(pk=instance.pk).values_list("rating", flat=True)
+        instance.previous_rating = ratings.first()
+
+
+@receiver(post_save, sender=Review)
+def leaderboard_review_saved(sender, instance, created, **kwargs):
+    """
+    Updates leaderboard scores of the reviewed photo.
+    """
+
+    if created:
+        leaderboards.record_rating(instance.photo_id, 1, instance.rating)
+        return
+
+    previous_rating = getattr(instance, "previous_rating", None)
+    if previous_rating is not None and previous_rating != instance.rating:
+        leaderboards.record_rating(
+            instance.photo_id, 0, instance.rating - previous_rating
+        )
+
+
+@receiver(post_delete, sender=Review)
+def leaderboard_review_deleted(sender, instance, **kwargs):
+    """
+    Updates leaderboard scores of the photo of a deleted review.
+    """
+
+    leaderboards.record_rating(instance.photo_id, -1, -instance.rating)
+
+
+@receiver(post_save, sender=Photo)
+def rollups_photo_created(sender, instance, created, **kwargs):
+    """
+    Counts an upload in stats buckets.
+    """
+
+    if created:
+        rollups.record_upload(instance)
+
+
+@receiver(pre_delete, sender=Photo)
+def rollups_photo_deleted(sender, instance, **kwargs):
+    """
+    Uncounts an upload from stats buckets, before photo tags are deleted.
+    """
+
+    rollups.record_upload(instance, sign=-1)
+
+
+@receiver(m2m_changed, sender=Photo.tags.through)
+def rollups_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Moves photos and their reviews between stats buckets of tags.
+    """
+
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+
+    changes = get_tag_changes(instance, action, reverse, pk_set)
+
+    rollups.record_tags(changes, sign=1 if action == "post_add" else -1)
+
+
+@receiver(post_save, sender=Review)
+def rollups_review_saved(sender, instance, created, **kwargs):
+    """
+    Counts a new review or a changed rating in stats buckets.
+    """
+
+    if created:
+        rollups.record_review(instance)
+        return
+
+    previous_rating = getattr(instance, "previous_rating", None)
+    if previous_rating is not None and previous_rating != instance.rating:
+        rollups.record_rating_change(instance, previous_rating)
+
+
+@receiver(pre_delete, sender=Review)
+def rollups_review_deleted(sender, instance, **kwargs):
+    """
+    Uncounts a review from stats buckets, before photo tags are deleted.
+    """
+
+    rollups.record_review(instance, sign=-1)
+
+
+@receiver(post_save, sender=Review)
+def trending_review_updated(sender, instance, created, **kwargs):
+    """
+    Marks the trending score of the photo of a re-rated review for recomputing.
+    """
+
+    previous_rating = getattr(instance, "previous_rating", None)
+    if (
+        not created
+        and previous_rating is not None
+        and previous_rating != instance.rating
+    ):
+        trending.record_change(instance)
+
+
+@receiver(post_delete, sender=Review)
+def trending_review_deleted(sender, instance, **kwargs):
+    """
+    Marks the trending score of the photo of a deleted review for recomputing.
+    """
+
+    trending.record_change(instance)
+
+
+@receiver(post_save, sender=Review)
+def events_review_saved(sender, instance, created, **kwargs):
+    """
+    Publishes a created or updated review to event streams of its photo.
+    """
+
+    events.review_changed(instance, "review_created" if created else "review_updated")
+
+
+@receiver(post_delete, sender=Review)
+def events_review_deleted(sender, instance, **kwargs):
+    """
+    Publishes a deleted review to event streams of its photo.
+    """
+
+    events.review_changed(instance, "review_deleted")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_cache_discard(sender, instance, **kwargs):
+    """
+    Discards the user from the per-process user cache.
+    """
+
+    user_cache.discard(instance.pk)
@@ -0,0 +1,154 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .imaging import hamming_distance
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree of 64-bit hashes with Hamming distance metric.
+
+    Searching for hashes within a small distance visits only subtrees
+    that can contain them, instead of comparing against every hash.
+    """
+
+    def __init__(self):
+        # node: [hash, set of ids, {distance: child node}]
+        self.root = None
+        self.size = 0
+
+    def add(self, value, id):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, {id}, {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].add(id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, {id}, {}]
+                return
+            node = child
+
+    def remove(self, value, id):
+        """
+        Removes `id` from the node of `value`, empty nodes are kept as routing nodes.
+        """
+
+        node = self.root
+        while node is not None:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                if id in node[1]:
+                    node[1].discard(id)
+                    self.size -= 1
+                return
+            node = node[2].get(distance)
+
+    def search(self, value, max_distance):
+        """
+        Returns `(distance, id)` pairs of hashes within `max_distance` of `value`.
+        """
+
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, id) for id in node[1])
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+
+class PhotoHashIndex:
+    """
+    Per-process BK-tree of `Photo.phash` values.
+
+    Built from the database on first use and rebuilt after
+    `PHOTO_HASH_INDEX_TTL` seconds to pick up photos uploaded by other
+    processes. Photos saved and deleted in this process are applied immediately.
+
+    Rebuilds run outside the lock by a single thread and swap the new
+    tree in, other threads keep searching the expired tree meanwhile.
+    Changes made during a rebuild are applied to both trees.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # held by the thread building the tree
+        self.build_lock = threading.Lock()
+        self.tree = None
+        self.built_at = 0.0
+        # (method, value, id) of changes made while the tree is built
+        self.changes = None
+
+    def build(self):
+        from .models import Photo
+
+        with self.lock:
+            self.changes = []
+        tree = BKTree()
+        try:
+            rows = Photo.objects.filter(phash__isnull=False).values_list("id", "phash")
+            for id, phash in rows.iterator(chunk_size=5000):
+                tree.add(phash, id)
+        except BaseException:
+            with self.lock:
+                self.changes = None
+            raise
+        with self.lock:
+            for method, value, id in self.changes:
+                getattr(tree, method)(value, id)
+            self.changes = None
+            self.tree, self.built_at = tree, time.monotonic()
+        return tree
+
+    def get_tree(self):
+        ttl = getattr(settings, "PHOTO_HASH_INDEX_TTL", 300)
+        tree = self.tree
+        if tree is not None and time.monotonic() - self.built_at <= ttl:
+            return tree
+        # without a tree, wait for the thread building it
+        if not self.build_lock.acquire(blocking=tree is None):
+            return tree
+        try:
+            tree = self.tree
+            if tree is None or time.monotonic() - self.built_at > ttl:
+                tree = self.build()
+            return tree
+        finally:
+            self.build_lock.release()
+
+    def search(self, value, max_distance):
+        tree = self.get_tree()
+        with self.lock:
+            return tree.search(value, max_distance)
+
+    def apply(self, method, value, id):
+        with self.lock:
+            if self.tree is not None:
+                getattr(self.tree, method)(value, id)
+            if self.changes is not None:
+                self.changes.append((method, value, id))
+
+    def add(self, value, id):
+        self.apply("add", value, id)
+
+    def remove(self, value, id):
+        self.apply("remove", value, id)
+
+    def clear(self):
+        with self.lock:
+            self.tree = None
+
+
+photo_hash_index = PhotoHashIndex()
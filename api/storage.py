@@ -0,0 +1,131 @@
+import hashlib
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+SHARDED_DIRECTORY = "photos"
+
+
+def shard(name):
+    """
+    Returns the sharded name of a file in `photos/`: `photos/ab/cd/<file>`
+    where `abcd` starts the MD5 of the file name, spreading files over
+    65536 directories. Other names are returned unchanged.
+    """
+
+    directory, basename = posixpath.split(name)
+    if directory != SHARDED_DIRECTORY:
+        return name
+    digest = hashlib.md5(basename.encode()).hexdigest()
+    return f"{directory}/{digest[:2]}/{digest[2:4]}/{basename}"
+
+
+def unshard(name):
+    """
+    Returns the name a sharded file is stored under in the database.
+    """
+
+    parts = name.split("/")
+    if len(parts) == 4 and parts[0] == SHARDED_DIRECTORY:
+        return f"{SHARDED_DIRECTORY}/{parts[3]}"
+    return name
+
+
+class PhotoStorage(FileSystemStorage):
+    """
+    File system storage keeping files of `photos/` in the sharded layout
+    of `shard` when `MEDIA_SHARDING` is enabled, or flat otherwise.
+
+    Names (stored in the database and used in urls) are the flat ones,
+    files are looked up in the other layout when missing from the current
+    one, so they can be moved by `migrate_media_layout` while served.
+    """
+
+    def layouts(self, name):
+        if settings.MEDIA_SHARDING:
+            return shard(name), name
+        return name, shard(name)
+
+    def path(self, name):
+        current, previous = self.layouts(name)
+        path = super().path(current)
+        if current != previous and not os.path.lexists(path):
+            previous_path = super().path(previous)
+            if os.path.lexists(previous_path):
+                return previous_path
+        return path
+
+    def _save(self, name, content):
+        # `FileSystemStorage` returns the name of the sharded path
+        return unshard(super()._save(name, content))
+
+    def _open(self, name, mode="rb"):
+        try:
+            return super()._open(name, mode)
+        except FileNotFoundError:
+            # moved by the layout migration since `path` was called
+            return super()._open(name, mode)
+
+    def move(self, old_name, new_name):
+        """
+        Renames a file and returns its new name, `new_name` or an available
+        name derived from it like for uploads when a file already has it.
+        Existing files are never overwritten.
+        """
+
+        old_path = self.path(old_name)
+        while True:
+            new_name = self.get_available_name(new_name)
+            new_path = super().path(self.layouts(new_name)[0])
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            try:
+                # unlike renames, links fail when the target exists
+                os.link(old_path, new_path)
+            except FileExistsError:
+                # created since `get_available_name` checked it
+                continue
+            break
+        os.remove(old_path)
+        return new_name
+
+    def misplaced_files(self):
+        """
+        Yields names of `photos/` files stored in the other layout.
+        """
+
+        root = super().path(SHARDED_DIRECTORY)
+        if not os.path.isdir(root):
+            return
+        if settings.MEDIA_SHARDING:
+            for entry in os.scandir(root):
+                if entry.is_file():
+                    yield f"{SHARDED_DIRECTORY}/{entry.name}"
+            return
+        for directory, _, files in os.walk(root):
+            relative = os.path.relpath(directory, root).replace(os.sep, "/")
+            if relative.count("/") == 1:
+                for file in files:
+                    yield f"{SHARDED_DIRECTORY}/{file}"
+
+    def migrate_layout(self, batch_size=1000):
+        """
+        Moves `photos/` files to the current layout, yields numbers
+        of files moved by every batch. Files are never overwritten.
+        """
+
+        moved = 0
+        for name in self.misplaced_files():
+            current, previous = self.layouts(name)
+            current_path = super().path(current)
+            if os.path.lexists(current_path):
+                continue
+            os.makedirs(os.path.dirname(current_path), exist_ok=True)
+            os.replace(super().path(previous), current_path)
+            moved += 1
+            if moved == batch_size:
+                yield moved
+                moved = 0
+        if moved:
+            yield moved
@@ -0,0 +1,46 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse
+
+# bytes read at once from files streamed asynchronously
+ASYNC_FILE_BLOCK_SIZE = 256 * 1024
+
+
+async def aiterate(iterator):
+    """
+    Yields items of a synchronous iterator, each read in the thread
+    of the request, which holds its database connection.
+    """
+
+    next_item = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while (item := await next_item(iterator, done)) is not done:
+        yield item
+
+
+class AsyncStreamingMiddleware:
+    """
+    Streams synchronous streaming responses, such as exports and
+    `FileResponse`, asynchronously when served by ASGI.
+
+    Django reads synchronous iterators of streaming responses whole into
+    memory before sending them through ASGI, they're read a block at a
+    time instead. WSGI responses are left alone, so that `FileResponse`
+    can still be sent with `sendfile`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            isinstance(request, ASGIRequest)
+            and response.streaming
+            and not response.is_async
+        ):
+            if isinstance(response, FileResponse):
+                # read by its iterator, fewer blocks make fewer thread switches
+                response.block_size = ASYNC_FILE_BLOCK_SIZE
+            response.streaming_content = aiterate(response.streaming_content)
+        return response
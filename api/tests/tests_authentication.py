@@ -0,0 +1,123 @@
+import os
+from PIL import Image
+from io import BytesIO
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from ..authentication import ClaimsUser, user_cache
+from ..models import Photo
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class ClaimsAuthenticationTestCase(APITestCase):
+    def setUp(self) -> None:
+        user_cache.clear()
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.other = User.objects.create_user(
+            username="otherUser",
+            email="otheremail@test.com",
+            password="testpassword123",
+        )
+        self.photo = Photo.objects.create(
+            author=self.u, image=create_image(), title="test title"
+        )
+        self.url = f"/api/photos/{self.photo.id}/"
+
+    def tearDown(self) -> None:
+        user_cache.clear()
+        if os.path.isfile("media/photos/test_title.png"):
+            os.remove("media/photos/test_title.png")
+
+    def get_token(self, username):
+        r = self.client.post(
+            "/api/auth/token/",
+            {"username": username, "password": "testpassword123"},
+        )
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return r.data["access"]
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_token_claims(self):
+        token = AccessToken(self.get_token("testUser"))
+        self.assertEqual(token["user_id"], self.u.id)
+        self.assertEqual(token["username"], "testUser")
+        # permissions are read from the user
+        self.assertNotIn("is_staff", token)
+
+    def test_no_user_query(self):
+        self.authenticate(self.get_token("testUser"))
+        self.client.patch(self.url, {"description": "first"})
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.patch(self.url, {"description": "second"})
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [query for query in queries if 'FROM "auth_user"' in query["sql"]]
+        )
+
+    def test_author_permission(self):
+        self.authenticate(self.get_token("otherUser"))
+        r = self.client.patch(self.url, {"description": "test"})
+        self.assertEqual(r.status_code, status.HTTP_403_FORBIDDEN)
+
+        r = self.client.post(f"{self.url}reviews/", {"rating": 4})
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.photo.reviews.get().author, self.other)
+        r = self.client.post(f"{self.url}reviews/", {"rating": 4})
+        self.assertEqual(r.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_inactive_user(self):
+        self.authenticate(self.get_token("testUser"))
+        self.u.is_active = False
+        self.u.save()
+        r = self.client.patch(self.url, {"description": "test"})
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_demoted_staff(self):
+        self.u.is_staff = True
+        self.u.save()
+        self.authenticate(self.get_token("testUser"))
+        r = self.client.get("/api/metrics/db-pool/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.u.is_staff = False
+        self.u.save()
+        r = self.client.get("/api/metrics/db-pool/")
+        self.assertEqual(r.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_inactive_user(self):
+        r = self.client.post(
+            "/api/auth/token/",
+            {"username": "testUser", "password": "testpassword123"},
+        )
+        self.u.is_active = False
+        self.u.save()
+        r = self.client.post("/api/auth/token/refresh/", {"refresh": r.data["refresh"]})
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_without_username(self):
+        token = AccessToken()
+        token["user_id"] = self.u.id
+        user = ClaimsUser(token)
+        self.assertEqual(user.username, "testUser")
+        self.assertEqual(user.user, self.u)
@@ -0,0 +1,193 @@
+import os
+from unittest import mock
+from PIL import Image
+from io import BytesIO
+from rest_framework.test import APIClient, APITestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+
+from .. import batch
+from ..throttling import CostThrottle
+from ..models import Photo, Review
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+@override_settings(BATCH_MAX_WORKERS=1)
+class BatchTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(
+            username="testUser1",
+            email="testemail1@test.com",
+            password="testpassword123",
+        )
+        self.u = User.objects.create_user(
+            username="testUser2",
+            email="testemail2@test.com",
+            password="testpassword123",
+        )
+        self.photo = Photo.objects.create(
+            author=self.author, image=create_image(), title="test title"
+        )
+        self.user = APIClient()
+        self.user.force_authenticate(user=self.u)
+        self.url = "/api/batch/"
+        self.reviews_url = f"/api/photos/{self.photo.id}/reviews/"
+
+    def tearDown(self) -> None:
+        if os.path.isfile("media/photos/test_title.png"):
+            os.remove("media/photos/test_title.png")
+
+    def test_batch(self):
+        r = self.client.post(
+            self.url,
+            {
+                "requests": [
+                    {"method": "GET", "path": f"/api/photos/{self.photo.id}/"},
+                    {"method": "GET", "path": "/api/photos/?fields=title"},
+                    {"method": "GET", "path": "/api/photos/0/"},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        photo, photos, missing = r.data["responses"]
+        self.assertEqual(photo["status"], 200)
+        self.assertEqual(photo["headers"]["Content-Type"], "application/json")
+        self.assertEqual(photo["body"]["title"], "test title")
+        self.assertEqual(photos["body"], [{"title": "test title"}])
+        self.assertEqual(missing["status"], 404)
+
+    def test_shared_authentication(self):
+        r = self.user.post(
+            self.url,
+            {
+                "requests": [
+                    {
+                        "method": "POST",
+                        "path": self.reviews_url,
+                        "body": {"rating": 5, "body": "test body"},
+                    },
+                    {"method": "GET", "path": self.reviews_url},
+                ]
+            },
+            format="json",
+        )
+        created, reviews = r.data["responses"]
+        self.assertEqual(created["status"], 201)
+        # reads run after earlier writes
+        self.assertEqual(len(reviews["body"]), 1)
+        self.assertEqual(reviews["body"][0]["author"], "testUser2")
+
+        # anonymous sub-requests are anonymous
+        r = self.client.post(
+            self.url,
+            {"requests": [{"method": "POST", "path": self.reviews_url, "body": {}}]},
+            format="json",
+        )
+        self.assertEqual(r.data["responses"][0]["status"], 403)
+
+    def test_atomic(self):
+        requests = [
+            {
+                "method": "POST",
+                "path": self.reviews_url,
+                "body": {"rating": 5, "body": "test body"},
+            },
+            # second review of the same photo
+            {"method": "POST", "path": self.reviews_url, "body": {"rating": 4}},
+            {"method": "GET", "path": self.reviews_url},
+        ]
+        r = self.user.post(self.url, {"requests": requests}, format="json")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["status"] for r in r.data["responses"]], [201, 403, 200])
+        Review.objects.all().delete()
+
+        r = self.user.post(
+            self.url, {"requests": requests, "atomic": True}, format="json"
+        )
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([r["status"] for r in r.data["responses"]], [201, 403])
+        self.assertFalse(Review.objects.exists())
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_validation(self):
+        for requests in (
+            [],
+            [{"method": "GET", "path": "/admin/"}],
+            [{"method": "POST", "path": "/api/batch/"}],
+            [{"method": "GET", "path": "/api/photos/"}] * 3,
+            [{"method": "GET", "path": f"/api/photos/{self.photo.id}/events/"}],
+        ):
+            r = self.client.post(self.url, {"requests": requests}, format="json")
+            self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THROTTLE_ENABLED=True)
+    @mock.patch.object(CostThrottle, "timer", return_value=1000.0)
+    def test_middleware(self, timer):
+        cache.clear()
+        requests = [{"method": "GET", "path": "/api/photos/"}] * 2
+        r = self.user.post(self.url, {"requests": requests}, format="json")
+        # each sub-request is charged 2 tokens, after the batch's one
+        self.assertEqual(
+            [r["headers"]["RateLimit-Remaining"] for r in r.data["responses"]],
+            ["297", "295"],
+        )
+        self.assertEqual(r["RateLimit-Remaining"], "295")
+
+    def test_streaming_response(self):
+        r = self.user.post(
+            self.url,
+            {"requests": [{"method": "GET", "path": "/api/export/"}]},
+            format="json",
+        )
+        self.assertEqual(r.data["responses"][0]["status"], 400)
+
+
+@override_settings(BATCH_MAX_WORKERS=2)
+class ParallelBatchTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.photo = Photo.objects.create(
+            author=u, image=create_image(), title="test title"
+        )
+        self.user = APIClient()
+        self.user.force_authenticate(user=u)
+
+    def tearDown(self) -> None:
+        if os.path.isfile("media/photos/test_title.png"):
+            os.remove("media/photos/test_title.png")
+
+    def test_parallel_reads(self):
+        requests = [
+            {"method": "GET", "path": f"/api/photos/{self.photo.id}/"},
+            {"method": "GET", "path": "/api/tags/"},
+            {"method": "PATCH", "path": f"/api/photos/{self.photo.id}/", "body": {}},
+            {"method": "GET", "path": "/api/photos/"},
+        ]
+        with mock.patch.object(
+            batch, "run_in_thread", wraps=batch.run_in_thread
+        ) as run_in_thread:
+            r = self.user.post("/api/batch/", {"requests": requests}, format="json")
+        self.assertEqual(
+            [r["status"] for r in r.data["responses"]], [200, 200, 200, 200]
+        )
+        # only the two reads before the write ran in parallel
+        self.assertEqual(run_in_thread.call_count, 2)
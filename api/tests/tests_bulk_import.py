@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+from PIL import Image
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from ..models import LeaderboardEntry, Photo, StatsBucket, Tag, TagCooccurrence
+
+User = get_user_model()
+
+
+def create_image_file(path, color=(255, 0, 0)):
+    Image.new("RGB", (100, 100), color=color).save(path, "png")
+
+
+class ImportPhotosTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.directory = tempfile.mkdtemp()
+        for id in range(3):
+            create_image_file(
+                os.path.join(self.directory, f"image{id}.png"), color=(id * 80, 0, 0)
+            )
+        with open(os.path.join(self.directory, "broken.png"), "wb") as file:
+            file.write(b"not an image")
+        self.rows = [
+            ["image0.png", "import title 0", "testUser", "nature,forest", "first"],
+            ["image1.png", "import title 1", "testUser", "nature", ""],
+            ["image2.png", "import title 2", "testUser", "", "third"],
+        ]
+
+    def tearDown(self) -> None:
+        for photo in Photo.objects.all():
+            photo.image.delete(save=False)
+        shutil.rmtree(self.directory)
+
+    def write_csv(self, rows):
+        lines = ["file,title,author,tags,description"]
+        lines += [",".join(f'"{value}"' for value in row) for row in rows]
+        with open(os.path.join(self.directory, "manifest.csv"), "w") as file:
+            file.write("\n".join(lines))
+
+    def import_photos(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_photos",
+            self.directory,
+            "--workers",
+            "2",
+            "--batch-size",
+            "2",
+            *args,
+            stdout=out,
+            stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        self.write_csv(self.rows)
+        out, err = self.import_photos()
+        self.assertIn("Imported 3 photos, skipped 0 existing, 0 failed.", out)
+        self.assertIn("2/3 rows", out)
+        self.assertEqual(err, "")
+
+        photo = Photo.objects.get(title="import title 0")
+        self.assertEqual(photo.author.username, "testUser")
+        self.assertEqual(photo.description, "first")
+        self.assertEqual(photo.image.name, "photos/import_title_0.png")
+        self.assertTrue(os.path.isfile(photo.image.path))
+        self.assertIsNotNone(photo.created_at)
+        self.assertEqual((photo.width, photo.height), (100, 100))
+        self.assertIsNotNone(photo.phash)
+        self.assertEqual(
+            sorted(photo.tags.values_list("name", flat=True)), ["forest", "nature"]
+        )
+        self.assertIsNone(Photo.objects.get(title="import title 1").description)
+
+        # tables maintained by signals for photos created through the API
+        self.assertEqual(LeaderboardEntry.objects.filter(tag=None).count(), 3)
+        self.assertEqual(LeaderboardEntry.objects.filter(tag__name="nature").count(), 2)
+        nature = Tag.objects.get(name="nature")
+        self.assertEqual(TagCooccurrence.objects.get(tag=nature, other=nature).count, 2)
+        bucket = StatsBucket.objects.get(granularity=StatsBucket.DAY, tag=None)
+        self.assertEqual(bucket.uploads, 3)
+
+    def test_import_json(self):
+        manifest = os.path.join(self.directory, "photos.json")
+        with open(manifest, "w") as file:
+            json.dump(
+                [
+                    {
+                        "file": "image0.png",
+                        "title": "import title 0",
+                        "author": "testUser",
+                        "tags": ["nature", "nature"],
+                    }
+                ],
+                file,
+            )
+        out, _ = self.import_photos("--manifest", manifest)
+        self.assertIn("Imported 1 photos", out)
+        photo = Photo.objects.get()
+        self.assertEqual(list(photo.tags.values_list("name", flat=True)), ["nature"])
+
+    def test_resume(self):
+        self.write_csv(self.rows[:1])
+        self.import_photos()
+        self.write_csv(self.rows)
+        out, _ = self.import_photos()
+        self.assertIn("Imported 2 photos, skipped 1 existing, 0 failed.", out)
+        self.assertEqual(Photo.objects.count(), 3)
+
+    def test_invalid_rows(self):
+        self.write_csv(
+            [
+                ["broken.png", "import broken", "testUser", "", ""],
+                ["missing.png", "import missing", "testUser", "", ""],
+                ["image0.png", "import author", "nobody", "", ""],
+                ["image1.png", "import tag", "testUser", "bad tag", ""],
+                self.rows[2],
+            ]
+        )
+        out, err = self.import_photos()
+        self.assertIn("Imported 1 photos, skipped 0 existing, 4 failed.", out)
+        self.assertIn("broken.png: File is not a valid image.", err)
+        self.assertIn("missing.png: File not found", err)
+        self.assertIn("image0.png: Unknown author: 'nobody'.", err)
+        self.assertIn("image1.png: Tag name must contain only alphabetic", err)
+        self.assertEqual(
+            list(Photo.objects.values_list("title", flat=True)), ["import title 2"]
+        )
+        self.assertFalse(os.path.isfile("media/photos/import_broken.png"))
@@ -0,0 +1,136 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.backends.postgresql import base as postgresql
+from django.test import SimpleTestCase
+from psycopg import pq
+from rest_framework.test import APIClient, APITestCase
+from rest_framework import status
+
+from core.db import pool
+from core.db.base import DatabaseWrapper
+from core.db.pool import ConnectionPool
+
+User = get_user_model()
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def test_connections_reused(self):
+        pool = ConnectionPool("test", min_size=1, max_size=2, timeout=0.01)
+        first = pool.getconn(mock.Mock)
+        second = pool.getconn(mock.Mock)
+        stats = pool.stats()
+        self.assertEqual(stats["in_use"], 2)
+        self.assertEqual(stats["utilization"], 1.0)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(mock.Mock), first)
+        pool.putconn(second, reusable=False)
+        second.close.assert_called_once()
+        stats = pool.stats()
+        self.assertEqual((stats["opened"], stats["closed"], stats["size"]), (2, 1, 1))
+
+    def test_timeout_when_exhausted(self):
+        pool = ConnectionPool("test", max_size=1, timeout=0.01)
+        pool.getconn(mock.Mock)
+        self.assertIsNone(pool.getconn(mock.Mock))
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiting_for_given_back_connection(self):
+        pool = ConnectionPool("test", max_size=1, timeout=5)
+        connection = pool.getconn(mock.Mock)
+        threading.Timer(0.05, pool.putconn, [connection]).start()
+        self.assertIs(pool.getconn(mock.Mock), connection)
+        self.assertGreater(pool.stats()["wait_time_max"], 0)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool("test", max_size=1, timeout=0.01)
+        with self.assertRaises(ValueError):
+            pool.getconn(mock.Mock(side_effect=ValueError))
+        self.assertIsNotNone(pool.getconn(mock.Mock))
+
+    def test_unusable_connection_replaced(self):
+        pool = ConnectionPool("test", max_size=1)
+        broken = pool.getconn(mock.Mock)
+        pool.putconn(broken)
+        connection = pool.getconn(mock.Mock, check=lambda connection: False)
+        self.assertIsNot(connection, broken)
+        broken.close.assert_called_once()
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+
+    def test_idle_connections_closed(self):
+        pool = ConnectionPool("test", min_size=1, max_idle=0)
+        connections = [pool.getconn(mock.Mock) for _ in range(3)]
+        for connection in connections:
+            pool.putconn(connection)
+        # the two least recently used are closed, `min_size` are kept
+        self.assertIs(pool.getconn(mock.Mock), connections[2])
+        self.assertEqual(pool.stats()["closed"], 2)
+
+    def test_unbounded_pool(self):
+        pool = ConnectionPool("test")
+        for _ in range(10):
+            pool.getconn(mock.Mock)
+        self.assertEqual(pool.stats()["peak"], 10)
+        self.assertIsNone(pool.stats()["utilization"])
+
+
+class PooledDatabaseWrapperTestCase(SimpleTestCase):
+    def connect(self, *args, **kwargs):
+        connection = mock.MagicMock(closed=False, broken=False)
+        connection.info.transaction_status = pq.TransactionStatus.IDLE
+        connection.info.server_version = 140000
+        connection.info.parameter_status.return_value = "UTC"
+        return connection
+
+    def test_connections_outlive_threads(self):
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "CONN_MAX_AGE": 60,
+            "OPTIONS": {"pool": {"max_size": 2, "timeout": 0.01}},
+        }
+
+        def request():
+            wrapper = DatabaseWrapper(settings_dict, "pooled")
+            wrapper.ensure_connection()
+            # at the end of the request
+            wrapper.close_if_unusable_or_obsolete()
+
+        with mock.patch.object(
+            postgresql.DatabaseWrapper, "get_new_connection", side_effect=self.connect
+        ) as get_new_connection, mock.patch.dict(pool._pools):
+            for _ in range(3):
+                thread = threading.Thread(target=request)
+                thread.start()
+                thread.join()
+            stats = pool.get_pool("pooled", {}).stats()
+        self.assertEqual(get_new_connection.call_count, 1)
+        self.assertEqual((stats["in_use"], stats["idle"]), (0, 1))
+
+
+class DatabasePoolStatsViewTestCase(APITestCase):
+    def setUp(self) -> None:
+        admin = User.objects.create_superuser(
+            username="admin",
+            email="admin@test.com",
+            password="adminpassword123",
+        )
+        user = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.admin = APIClient()
+        self.admin.force_authenticate(user=admin)
+        self.user = APIClient()
+        self.user.force_authenticate(user=user)
+        self.url = "/api/metrics/db-pool/"
+
+    def test_admin_can_read_stats(self):
+        r = self.admin.get(self.url)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_non_admin_cant_read_stats(self):
+        r = self.user.get(self.url)
+        self.assertEqual(r.status_code, status.HTTP_403_FORBIDDEN)
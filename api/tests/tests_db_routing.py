@@ -0,0 +1,79 @@
+import time
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from core.db.routers import (
+    PrimaryReplicaRouter,
+    ReplicaRoutingMiddleware,
+    use_replica,
+)
+from ..models import Photo
+from ..views import PhotoViewSet
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_SECONDS=5)
+class PrimaryReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_from_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Photo), "default")
+
+    def test_reads_from_replica_when_allowed(self):
+        token = use_replica.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Photo), "replica_0")
+            self.assertEqual(self.router.db_for_write(Photo), "default")
+        finally:
+            use_replica.reset(token)
+
+    def test_no_migrations_on_replica(self):
+        self.assertTrue(self.router.allow_migrate("default", "api"))
+        self.assertFalse(self.router.allow_migrate("replica_0", "api"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingMiddlewareTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        self.viewset_view = PhotoViewSet.as_view({"get": "list", "post": "create"})
+        self.used_replica = None
+
+    def process(self, request, view=None):
+        view = view or self.viewset_view
+
+        # mimics the handler calling `process_view` before the view
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            self.used_replica = use_replica.get()
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request)
+
+    def test_safe_viewset_request_uses_replica(self):
+        self.process(self.factory.get("/api/photos/"))
+        self.assertTrue(self.used_replica)
+        self.assertFalse(use_replica.get())
+
+    def test_write_uses_primary_and_pins_client(self):
+        response = self.process(self.factory.post("/api/photos/"))
+        self.assertFalse(self.used_replica)
+        self.assertIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        request = self.factory.get("/api/photos/")
+        request.COOKIES[ReplicaRoutingMiddleware.cookie_name] = str(time.time() + 5)
+        self.process(request)
+        self.assertFalse(self.used_replica)
+
+    def test_expired_pin_uses_replica(self):
+        request = self.factory.get("/api/photos/")
+        request.COOKIES[ReplicaRoutingMiddleware.cookie_name] = str(time.time() - 1)
+        self.process(request)
+        self.assertTrue(self.used_replica)
+
+    def test_non_viewset_request_uses_primary(self):
+        self.process(self.factory.get("/"), view=lambda request: HttpResponse())
+        self.assertFalse(self.used_replica)
@@ -0,0 +1,185 @@
+import json
+import os
+from unittest import mock
+from PIL import Image
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from .. import events
+from ..models import Photo, Review
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class EventsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(
+            username="testUser1",
+            email="testemail1@test.com",
+            password="testpassword123",
+        )
+        self.u = User.objects.create_user(
+            username="testUser2",
+            email="testemail2@test.com",
+            password="testpassword123",
+        )
+        self.photo = Photo.objects.create(
+            author=self.author, image=create_image(), title="test title"
+        )
+
+    def tearDown(self) -> None:
+        if os.path.isfile("media/photos/test_title.png"):
+            os.remove("media/photos/test_title.png")
+
+
+class ReviewEventsTestCase(EventsTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        patcher = mock.patch.object(events.hub, "dispatch")
+        self.dispatch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_review_events(self):
+        with mock.patch.object(events.hub, "has_subscribers", return_value=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                review = Review.objects.create(
+                    author=self.u, photo=self.photo, rating=4, body="test body"
+                )
+            message = self.dispatch.call_args.args[0]
+            self.assertEqual(message["photo_id"], self.photo.id)
+            self.assertEqual(message["event"], "review_created")
+            self.assertEqual(
+                message["data"],
+                {
+                    "review": {
+                        "id": review.id,
+                        "author": "testUser2",
+                        "rating": 4,
+                        "body": "test body",
+                    },
+                    "photo": {"average_rating": 4.0, "review_count": 1},
+                },
+            )
+
+            with self.captureOnCommitCallbacks(execute=True):
+                review.rating = 2
+                review.save()
+            message = self.dispatch.call_args.args[0]
+            self.assertEqual(message["event"], "review_updated")
+            self.assertEqual(message["data"]["photo"]["average_rating"], 2.0)
+
+            review_id = review.id
+            with self.captureOnCommitCallbacks(execute=True):
+                review.delete()
+            message = self.dispatch.call_args.args[0]
+            self.assertEqual(message["event"], "review_deleted")
+            self.assertEqual(
+                message["data"],
+                {
+                    "review": {"id": review_id},
+                    "photo": {"average_rating": None, "review_count": 0},
+                },
+            )
+
+    def test_without_subscribers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(author=self.u, photo=self.photo, rating=4)
+        self.dispatch.assert_not_called()
+
+    def test_rolled_back(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                Review.objects.create(author=self.u, photo=self.photo, rating=4)
+                raise ValueError()
+        self.assertEqual(callbacks, [])
+
+    @override_settings(EVENTS_NOTIFY=True)
+    def test_notify(self):
+        with mock.patch.object(events, "connection") as connection:
+            with self.captureOnCommitCallbacks(execute=True):
+                Review.objects.create(
+                    author=self.u, photo=self.photo, rating=4, body="a" * 10000
+                )
+        cursor = connection.cursor.return_value.__enter__.return_value
+        query, (channel, payload) = cursor.execute.call_args.args
+        self.assertEqual(channel, events.CHANNEL)
+        message = json.loads(payload)
+        self.assertEqual(message["event"], "review_created")
+        # too long for a notification
+        self.assertNotIn("body", message["data"]["review"])
+        self.dispatch.assert_not_called()
+
+
+class EventStreamTestCase(EventsTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.review = Review.objects.create(author=self.u, photo=self.photo, rating=4)
+
+    async def test_stream(self):
+        url = f"/api/photos/{self.photo.id}/events/"
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+        self.assertTrue(events.hub.has_subscribers(self.photo.id))
+        snapshot = {
+            "photo": {"average_rating": 4.0, "review_count": 1},
+            "latest_review_id": self.review.id,
+        }
+        self.assertEqual(
+            await anext(chunks),
+            f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n".encode(),
+        )
+
+        data = {"review": {"id": 1}, "photo": {"average_rating": None}}
+        events.hub.dispatch(
+            {"photo_id": self.photo.id, "event": "review_deleted", "data": data}
+        )
+        self.assertEqual(
+            await anext(chunks),
+            f"event: review_deleted\ndata: {json.dumps(data)}\n\n".encode(),
+        )
+
+        with override_settings(EVENTS_KEEPALIVE_SECONDS=0):
+            self.assertEqual(await anext(chunks), b": keepalive\n\n")
+
+        with override_settings(EVENTS_STREAM_SECONDS=0):
+            with self.assertRaises(StopAsyncIteration):
+                await anext(chunks)
+        self.assertFalse(events.hub.has_subscribers(self.photo.id))
+
+    @override_settings(EVENTS_QUEUE_SIZE=1)
+    async def test_slow_client(self):
+        response = await self.async_client.get(f"/api/photos/{self.photo.id}/events/")
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        await anext(chunks)
+        for _ in range(3):
+            events.hub.dispatch(
+                {"photo_id": self.photo.id, "event": "review_deleted", "data": {}}
+            )
+        # the stream ends
+        with self.assertRaises(StopAsyncIteration):
+            await anext(chunks)
+        self.assertFalse(events.hub.has_subscribers(self.photo.id))
+
+    async def test_missing_photo(self):
+        response = await self.async_client.get("/api/photos/0/events/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+
+from ..models import Photo, Review, Tag
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+# small chunks to export in several blocks
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        reviewer = User.objects.create_user(
+            username="reviewer",
+            email="reviewer@test.com",
+            password="reviewer123",
+        )
+        nature = Tag.objects.create(name="nature")
+        forest = Tag.objects.create(name="forest")
+        self.photos = [
+            Photo.objects.create(
+                author=self.u,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            for id in range(3)
+        ]
+        self.photos[0].tags.add(nature, forest)
+        self.photos[2].tags.add(forest)
+        self.review = Review.objects.create(
+            author=reviewer, photo=self.photos[0], rating=4, body="good, test photo"
+        )
+        Review.objects.create(author=self.u, photo=self.photos[2], rating=2)
+        self.user = APIClient()
+        self.user.force_authenticate(user=self.u)
+        self.url = "/api/export/"
+
+    def tearDown(self) -> None:
+        for id in range(3):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def get_lines(self, params):
+        r = self.user.get(self.url, params)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return b"".join(r.streaming_content).decode().splitlines()
+
+    def test_photos_ndjson(self):
+        r = self.user.get(self.url)
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="photos.ndjson"', r["Content-Disposition"])
+        rows = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [p.id for p in self.photos])
+        self.assertEqual(
+            rows[0],
+            {
+                "id": self.photos[0].id,
+                "author": "testUser",
+                "title": "test title 0",
+                "description": "test description 0",
+                "image": "photos/test_title_0.png",
+                "created_at": self.photos[0]
+                .created_at.isoformat()
+                .replace("+00:00", "Z"),
+                "updated_at": None,
+                "tags": ["nature", "forest"],
+                "review_count": 1,
+                "average_rating": 4.0,
+            },
+        )
+        self.assertEqual(rows[1]["tags"], [])
+        self.assertEqual(rows[1]["review_count"], 0)
+        self.assertIsNone(rows[1]["average_rating"])
+
+    def test_reviews_csv(self):
+        lines = self.get_lines({"resource": "reviews", "output": "csv"})
+        rows = list(csv.DictReader(lines))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["author"], "reviewer")
+        self.assertEqual(rows[0]["body"], "good, test photo")
+        self.assertEqual(rows[0]["rating"], "4")
+        self.assertEqual(rows[0]["created_at"], self.review.created_at.isoformat())
+
+    def test_photos_csv_tags(self):
+        lines = self.get_lines({"output": "csv"})
+        rows = list(csv.DictReader(lines))
+        self.assertEqual(rows[0]["tags"], "nature,forest")
+        self.assertEqual(rows[1]["tags"], "")
+
+    def test_updated_since(self):
+        old = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        Photo.objects.exclude(id=self.photos[1].id).update(created_at=old)
+        Photo.objects.filter(id=self.photos[2].id).update(
+            updated_at=datetime(2023, 6, 1, tzinfo=timezone.utc)
+        )
+        lines = self.get_lines({"updated_since": "2023-05-01T00:00:00Z"})
+        ids = [json.loads(line)["id"] for line in lines]
+        self.assertEqual(ids, [self.photos[1].id, self.photos[2].id])
+
+    async def test_streamed_by_asgi(self):
+        r = await self.async_client.get(
+            self.url,
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.u)}"},
+        )
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        # read a block at a time, not whole before being sent
+        self.assertTrue(r.is_async)
+        blocks = [block async for block in r.streaming_content]
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(len(b"".join(blocks).splitlines()), 3)
+
+    def test_invalid_query(self):
+        r = self.user.get(self.url, {"output": "xml"})
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthorized_request(self):
+        r = self.client.get(self.url)
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command("export", "reviews", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["rating"], 2)
+
+        out = StringIO()
+        call_command(
+            "export", "photos", "--updated-since", "2100-01-01T00:00:00", stdout=out
+        )
+        self.assertEqual(out.getvalue(), "")
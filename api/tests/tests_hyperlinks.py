@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from .. import hyperlinks
+from ..models import Photo, Review
+from ..serializers import (
+    ReviewIdHyperLink,
+    ReviewRelatedHyperLink,
+    TemplatedHyperlinkedRelatedField,
+)
+
+
+class TemplatedHyperlinkTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.request = Request(APIRequestFactory().get("/api/photos/"))
+        self.reviews = [Review(id=id, photo_id=id * 7) for id in range(1, 50)]
+        hyperlinks._path_template.cache_clear()
+
+    def test_related_field_matches_reverse(self):
+        field = TemplatedHyperlinkedRelatedField(
+            read_only=True, view_name="photo-detail"
+        )
+        drf_field = serializers.HyperlinkedRelatedField(
+            read_only=True, view_name="photo-detail"
+        )
+        for request in (None, self.request):
+            for id in (1, 25, 10**12):
+                photo = Photo(id=id)
+                self.assertEqual(
+                    field.get_url(photo, "photo-detail", request, None),
+                    drf_field.get_url(photo, "photo-detail", request, None),
+                )
+
+    def test_review_links_match_reverse(self):
+        for field in (
+            ReviewRelatedHyperLink(read_only=True),
+            ReviewIdHyperLink(view_name="review-detail"),
+        ):
+            for request in (None, self.request):
+                for review in self.reviews:
+                    expected = reverse(
+                        "review-detail",
+                        kwargs={"photo_id": review.photo_id, "pk": review.id},
+                        request=request,
+                    )
+                    url = field.get_url(review, "review-detail", request, None)
+                    self.assertEqual(url, expected)
+
+    def test_resolver_used_once(self):
+        field = ReviewRelatedHyperLink(read_only=True)
+        with mock.patch.object(
+            hyperlinks, "reverse", wraps=hyperlinks.reverse
+        ) as reverse_mock:
+            for review in self.reviews:
+                field.get_url(review, "review-detail", self.request, None)
+        self.assertEqual(reverse_mock.call_count, 1)
+
+    def test_non_integer_kwargs_use_reverse(self):
+        field = TemplatedHyperlinkedRelatedField(
+            read_only=True, view_name="tag-detail", lookup_field="name"
+        )
+        tag = mock.Mock(name="tag")
+        tag.name = "zażółć"
+        self.assertEqual(
+            field.get_url(tag, "tag-detail", None, None),
+            reverse("tag-detail", kwargs={"name": "zażółć"}),
+        )
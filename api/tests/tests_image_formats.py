@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from PIL import Image
+from io import BytesIO
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from ..image_formats import encoded_cache, negotiate, parse_accept
+
+BROWSER_ACCEPT = "image/avif,image/webp,image/apng,image/*,*/*;q=0.8"
+
+
+class NegotiationTestCase(TestCase):
+    def test_parse_accept(self):
+        self.assertEqual(
+            parse_accept("image/webp;q=0.5, image/*"),
+            {"image/webp": 0.5, "image/*": 1.0},
+        )
+
+    @override_settings(MEDIA_ENCODINGS=["webp"])
+    def test_negotiate(self):
+        self.assertEqual(negotiate(BROWSER_ACCEPT, "photos/test.jpg"), "webp")
+        self.assertIsNone(negotiate("image/*,*/*", "photos/test.jpg"))
+        self.assertIsNone(negotiate("image/webp;q=0", "photos/test.jpg"))
+        self.assertIsNone(negotiate(BROWSER_ACCEPT, "photos/test.gif"))
+        self.assertIsNone(negotiate(None, "photos/test.jpg"))
+
+
+class EncodedPhotoTestCase(TestCase):
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_ENCODINGS=["webp"],
+            MEDIA_ENCODING_CACHE_DIR=os.path.join(self.media_root, "encoded"),
+        )
+        self.settings_override.enable()
+        os.makedirs(os.path.join(self.media_root, "photos"))
+        for id in range(2):
+            # noisy image, larger as PNG than as WebP
+            Image.effect_noise((200, 200), 50 + id).convert("RGB").save(
+                os.path.join(self.media_root, "photos", f"test_{id}.png")
+            )
+        self.url = "/media/photos/test_0.png"
+
+    def tearDown(self) -> None:
+        encoded_cache.join()
+        encoded_cache.size = None
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def get(self, url=None, accept=BROWSER_ACCEPT):
+        r = self.client.get(url or self.url, headers={"Accept": accept})
+        r.body = b"".join(r.streaming_content) if r.streaming else r.content
+        return r
+
+    def test_encoded_after_first_request(self):
+        r = self.get()
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r["Content-Type"], "image/png")
+        self.assertEqual(r["Vary"], "Accept")
+        # not cached for long while the encoding is made
+        self.assertEqual(r["Cache-Control"], "public, max-age=60")
+        original = r.body
+        encoded_cache.join()
+
+        r = self.get()
+        self.assertEqual(r["Content-Type"], "image/webp")
+        self.assertEqual(r["Vary"], "Accept")
+        self.assertNotEqual(r["Cache-Control"], "public, max-age=60")
+        self.assertLess(len(r.body), len(original))
+        with Image.open(BytesIO(r.body)) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (200, 200))
+
+        # clients not accepting WebP get the original
+        r = self.get(accept="image/png,image/*")
+        self.assertEqual(r["Content-Type"], "image/png")
+        self.assertEqual(r.body, original)
+
+    def test_conditional_request(self):
+        self.get()
+        encoded_cache.join()
+        etag = self.get()["ETag"]
+        r = self.client.get(
+            self.url, headers={"Accept": BROWSER_ACCEPT, "If-None-Match": etag}
+        )
+        self.assertEqual(r.status_code, status.HTTP_304_NOT_MODIFIED)
+        r = self.client.get(
+            self.url, headers={"Accept": "image/png", "If-None-Match": etag}
+        )
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_bounded_cache(self):
+        self.get()
+        encoded_cache.join()
+        size = self.get()["Content-Length"]
+        with override_settings(MEDIA_ENCODING_CACHE_SIZE=int(size)):
+            self.get("/media/photos/test_1.png")
+            encoded_cache.join()
+            # the least recently used encoding was evicted
+            self.assertEqual(self.get()["Content-Type"], "image/png")
+            encoded_cache.join()
+        self.assertEqual(self.get()["Content-Type"], "image/webp")
@@ -0,0 +1,103 @@
+import os
+import struct
+import zlib
+from unittest import mock
+from PIL import Image, ImageFile
+from io import BytesIO
+from rest_framework.test import APIClient, APITestCase
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+
+from ..imaging import read_image_metadata
+from ..models import Photo
+
+User = get_user_model()
+
+
+def create_image(format="png", size=(100, 100)):
+    image = Image.new("RGB", size, color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, format)
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        f"test_image.{format}", image_file.read(), content_type=f"image/{format}"
+    )
+
+
+def create_png_bomb(width, height):
+    """
+    Returns a small PNG whose header claims `width` x `height` pixels.
+    """
+
+    data = create_image().read()
+    header = struct.pack(">II", width, height) + data[24:29]
+    crc = struct.pack(">I", zlib.crc32(b"IHDR" + header))
+    data = data[:16] + header + crc + data[33:]
+    return SimpleUploadedFile("test_image.png", data, content_type="image/png")
+
+
+class ImageHeaderValidationTestCase(APITestCase):
+    def setUp(self) -> None:
+        u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.user = APIClient()
+        self.user.force_authenticate(user=u)
+        self.url = "/api/photos/"
+
+    def tearDown(self) -> None:
+        if os.path.isfile("media/photos/test_title.png"):
+            os.remove("media/photos/test_title.png")
+
+    def upload(self, image):
+        return self.user.post(self.url, {"title": "test title", "image": image})
+
+    def test_valid_image(self):
+        r = self.upload(create_image())
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(IMAGE_MAX_WIDTH=50)
+    def test_max_dimensions(self):
+        # rejected before pixels are decoded
+        with mock.patch.object(ImageFile.ImageFile, "load") as load:
+            r = self.upload(create_image())
+        load.assert_not_called()
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Maximum image dimensions are 50x12000", str(r.data["image"]))
+        self.assertFalse(Photo.objects.exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=5000)
+    def test_max_pixels(self):
+        r = self.upload(create_image())
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Maximum image size is 5000 pixels", str(r.data["image"]))
+
+    def test_decompression_bomb(self):
+        r = self.upload(create_png_bomb(100000, 100000))
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Maximum image size is", str(r.data["image"]))
+
+    def test_unsupported_format(self):
+        r = self.upload(create_image(format="bmp"))
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unsupported image format", str(r.data["image"]))
+
+    def test_not_an_image(self):
+        image = SimpleUploadedFile("test_image.png", b"not an image")
+        r = self.upload(image)
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReadImageMetadataTestCase(SimpleTestCase):
+    def test_decompression_bomb(self):
+        with self.assertRaisesMessage(ValidationError, "Maximum image size is"):
+            read_image_metadata(create_png_bomb(100000, 100000))
+
+    def test_not_an_image(self):
+        image = SimpleUploadedFile("test_image.png", b"not an image")
+        self.assertEqual(read_image_metadata(image), {"image_size": 12})
@@ -0,0 +1,177 @@
+import os
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APIClient, APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+
+from .. import leaderboards
+from ..models import LeaderboardEntry, Photo, Review, Tag
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+@override_settings(LEADERBOARD_PRIOR_WEIGHT=2, LEADERBOARD_PRIOR_MEAN=3.0)
+class LeaderboardTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.reviewers = [
+            User.objects.create_user(
+                username=f"reviewer{id}",
+                email=f"reviewer{id}@test.com",
+                password="reviewer123",
+            )
+            for id in range(3)
+        ]
+        self.t = Tag.objects.create(name="test")
+        self.photos = []
+        for id in range(3):
+            p = Photo.objects.create(
+                author=self.author,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            self.photos.append(p)
+        self.photos[0].tags.add(self.t)
+        self.photos[1].tags.add(self.t)
+
+    def tearDown(self) -> None:
+        for id in range(3):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def review(self, photo, reviewer, rating):
+        return Review.objects.create(
+            author=self.reviewers[reviewer], photo=photo, rating=rating
+        )
+
+    def assertMatchesRebuild(self):
+        def entries():
+            return sorted(
+                LeaderboardEntry.objects.values_list(
+                    "photo_id", "tag_id", "review_count", "rating_sum", "score"
+                ),
+                key=lambda row: (row[0], row[1] or 0),
+            )
+
+        incremental = entries()
+        leaderboards.rebuild()
+        rebuilt = entries()
+        self.assertEqual(len(incremental), len(rebuilt))
+        for row, expected in zip(incremental, rebuilt):
+            self.assertEqual(row[:4], expected[:4])
+            self.assertAlmostEqual(row[4], expected[4])
+
+    def test_bayesian_score(self):
+        self.assertEqual(leaderboards.bayesian_score(0, 0), 3.0)
+        # a single 5 star review doesn't beat many 4 star reviews
+        self.assertLess(
+            leaderboards.bayesian_score(1, 5), leaderboards.bayesian_score(10, 40)
+        )
+
+    def test_entries_created_with_photos_and_tags(self):
+        self.assertEqual(LeaderboardEntry.objects.filter(tag=None).count(), 3)
+        self.assertEqual(LeaderboardEntry.objects.filter(tag=self.t).count(), 2)
+
+    def test_incremental_updates_match_rebuild(self):
+        r = self.review(self.photos[0], 0, 5)
+        self.review(self.photos[0], 1, 2)
+        self.review(self.photos[1], 0, 4)
+        self.review(self.photos[2], 2, 1)
+        self.assertMatchesRebuild()
+
+        r.rating = 1
+        r.save()
+        self.assertMatchesRebuild()
+
+        r.delete()
+        self.photos[2].tags.add(self.t)
+        self.photos[0].tags.remove(self.t)
+        self.assertMatchesRebuild()
+
+        self.t.photos.clear()
+        self.assertMatchesRebuild()
+
+    def test_global_top(self):
+        self.review(self.photos[0], 0, 5)
+        self.review(self.photos[1], 0, 5)
+        self.review(self.photos[1], 1, 5)
+        self.review(self.photos[2], 0, 1)
+
+        r = self.client.get("/api/photos/top/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in r.data],
+            [self.photos[1].id, self.photos[0].id, self.photos[2].id],
+        )
+        first = r.data[0]
+        self.assertEqual(
+            first["url"], f"http://testserver/api/photos/{self.photos[1].id}/"
+        )
+        self.assertEqual(first["author"], "testUser")
+        self.assertEqual(
+            first["image"], "http://testserver/media/photos/test_title_1.png"
+        )
+        self.assertEqual(first["average_rating"], 5.0)
+        self.assertEqual(first["review_count"], 2)
+        self.assertAlmostEqual(first["score"], (2 * 3.0 + 10) / 4)
+
+    def test_top_limit(self):
+        r = self.client.get("/api/photos/top/", {"limit": 1})
+        self.assertEqual(len(r.data), 1)
+        with self.settings(RESULTS_MAX_LIMIT=2):
+            r = self.client.get("/api/photos/top/", {"limit": 50})
+        self.assertEqual(len(r.data), 2)
+
+    def test_tag_top(self):
+        self.review(self.photos[2], 0, 5)
+        self.review(self.photos[1], 0, 4)
+
+        r = self.client.get(f"/api/tags/{self.t.name}/top/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in r.data],
+            [self.photos[1].id, self.photos[0].id],
+        )
+
+    def test_tag_top_not_found(self):
+        r = self.client.get("/api/tags/missing/top/")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_review_through_api(self):
+        user = APIClient()
+        user.force_authenticate(user=self.reviewers[0])
+        url = f"/api/photos/{self.photos[0].id}/reviews/"
+        r = user.post(url, {"rating": 5})
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        user.patch(f"{url}{r.data['id']}/", {"rating": 4})
+
+        entry = LeaderboardEntry.objects.get(photo=self.photos[0], tag=None)
+        self.assertEqual((entry.review_count, entry.rating_sum), (1, 4))
+        self.assertAlmostEqual(entry.score, (2 * 3.0 + 4) / 3)
+
+    def test_rebuild_command(self):
+        self.review(self.photos[0], 0, 5)
+        LeaderboardEntry.objects.all().delete()
+        call_command("rebuild_leaderboards", stdout=StringIO())
+        self.assertEqual(LeaderboardEntry.objects.count(), 5)
+        entry = LeaderboardEntry.objects.get(photo=self.photos[0], tag=self.t)
+        self.assertEqual((entry.review_count, entry.rating_sum), (1, 5))
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+
+class ServePhotoTestCase(TestCase):
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.content = bytes(range(256)) * 4
+        self.name = "photos/test_media_file.png"
+        self.path = os.path.join(settings.MEDIA_ROOT, self.name)
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "wb") as f:
+            f.write(self.content)
+        self.url = f"/media/{self.name}"
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def get(self, url=None, **headers):
+        r = self.client.get(url or self.url, headers=headers)
+        if r.streaming:
+            r.body = b"".join(r.streaming_content)
+        return r
+
+    def test_full_file(self):
+        r = self.get()
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.body, self.content)
+        self.assertEqual(r["Content-Type"], "image/png")
+        self.assertEqual(r["Content-Length"], str(len(self.content)))
+        self.assertEqual(r["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", r)
+
+    def test_byte_range(self):
+        r = self.get(Range="bytes=10-19")
+        self.assertEqual(r.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(r.body, self.content[10:20])
+        self.assertEqual(r["Content-Length"], "10")
+        self.assertEqual(r["Content-Range"], f"bytes 10-19/{len(self.content)}")
+
+    async def test_streamed_by_asgi(self):
+        r = await self.async_client.get(self.url, headers={"Range": "bytes=10-19"})
+        self.assertEqual(r.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(r.is_async)
+        body = b"".join([part async for part in r.streaming_content])
+        self.assertEqual(body, self.content[10:20])
+
+    def test_open_and_suffix_ranges(self):
+        r = self.get(Range="bytes=1000-")
+        self.assertEqual(r.body, self.content[1000:])
+        r = self.get(Range="bytes=-24")
+        self.assertEqual(r.body, self.content[-24:])
+
+    def test_unsatisfiable_range(self):
+        r = self.get(Range="bytes=5000-6000")
+        self.assertEqual(r.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(r["Content-Range"], f"bytes */{len(self.content)}")
+
+    def test_if_range_mismatch_returns_full_file(self):
+        r = self.get(Range="bytes=0-9", **{"If-Range": '"outdated"'})
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.body, self.content)
+
+    def test_not_modified(self):
+        etag = self.get()["ETag"]
+        r = self.get(**{"If-None-Match": etag})
+        self.assertEqual(r.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_file(self):
+        r = self.get("/media/photos/missing.png")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_post_not_allowed(self):
+        r = self.client.post(self.url)
+        self.assertEqual(r.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_cache_headers(self):
+        self.assertNotIn("immutable", self.get()["Cache-Control"])
+        name = "photos/photo.0123456789abcdef.png"
+        with open(os.path.join(settings.MEDIA_ROOT, name), "wb") as f:
+            f.write(self.content)
+        self.assertIn("immutable", self.get(f"/media/{name}")["Cache-Control"])
+
+    @override_settings(MEDIA_OFFLOAD_HEADER="X-Accel-Redirect")
+    def test_accel_redirect(self):
+        r = self.get()
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(r.content, b"")
+
+    @override_settings(MEDIA_OFFLOAD_HEADER="X-Sendfile")
+    def test_sendfile(self):
+        r = self.get()
+        self.assertEqual(r["X-Sendfile"], self.path)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from PIL import Image
+from io import BytesIO, StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from ..media_gc import reconcile, sweep
+from ..models import MediaTombstone, Photo
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class MediaGarbageCollectionTestCase(TestCase):
+    def setUp(self) -> None:
+        # reconciliation deletes all unknown files under photos/
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.photos = [
+            Photo.objects.create(
+                author=self.u, image=create_image(), title=f"test title {id}"
+            )
+            for id in range(3)
+        ]
+        self.orphan = os.path.join(self.media_root, "photos", "orphan.png")
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def path(self, id):
+        return os.path.join(self.media_root, "photos", f"test_title_{id}.png")
+
+    def test_cascade_delete(self):
+        self.u.delete()
+        self.assertEqual(MediaTombstone.objects.count(), 3)
+        self.assertTrue(os.path.isfile(self.path(0)))
+
+        self.assertEqual(sweep(batch_size=2), 3)
+        self.assertFalse(MediaTombstone.objects.exists())
+        for id in range(3):
+            self.assertFalse(os.path.isfile(self.path(id)))
+
+    def test_rolled_back_delete(self):
+        try:
+            with transaction.atomic():
+                self.photos[0].delete()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(MediaTombstone.objects.exists())
+        sweep()
+        self.assertTrue(os.path.isfile(self.photos[0].image.path))
+
+    def test_referenced_file_not_deleted(self):
+        MediaTombstone.objects.create(name=self.photos[0].image.name)
+        self.assertEqual(sweep(), 0)
+        self.assertTrue(os.path.isfile(self.photos[0].image.path))
+        self.assertFalse(MediaTombstone.objects.exists())
+
+    def test_reconcile(self):
+        Image.new("RGB", (10, 10)).save(self.orphan, "png")
+        Photo.objects.filter(id=self.photos[1].id).update(image="photos/missing.png")
+
+        orphans, dangling = reconcile(grace_seconds=3600)
+        self.assertNotIn("photos/orphan.png", orphans)
+
+        orphans, dangling = reconcile(grace_seconds=0, dry_run=True)
+        self.assertIn("photos/orphan.png", orphans)
+        self.assertIn("photos/test_title_1.png", orphans)
+        self.assertNotIn("photos/test_title_0.png", orphans)
+        self.assertEqual(dangling, [self.photos[1].id])
+        self.assertFalse(MediaTombstone.objects.exists())
+
+        out, err = StringIO(), StringIO()
+        call_command("reconcile_media", "--grace-seconds", "0", stdout=out, stderr=err)
+        self.assertIn("Orphaned file: photos/orphan.png", out.getvalue())
+        self.assertIn(f"Missing file of photo {self.photos[1].id}", err.getvalue())
+        # files already recorded aren't recorded twice
+        self.assertEqual(reconcile(grace_seconds=0)[0], [])
+
+        call_command("sweep_media", stdout=out)
+        self.assertFalse(os.path.isfile(self.orphan))
+        self.assertFalse(os.path.isfile(self.path(1)))
+        self.assertTrue(os.path.isfile(self.path(0)))
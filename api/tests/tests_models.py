@@ -1,4 +1,6 @@
 import os
+from PIL import Image
+from io import BytesIO
 
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -53,6 +55,61 @@ class PhotoTestCase(TestCase):
         self.assertRaises(ValidationError, photo.full_clean)
 
 
+class PhotoImageMetadataTestCase(TestCase):
+    def setUp(self) -> None:
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        image = Image.new("RGB", (120, 80), color=(0, 128, 255))
+        image_file = BytesIO()
+        image.save(image_file, "jpeg")
+        self.content = image_file.getvalue()
+        self.photo = Photo.objects.create(
+            author=self.u,
+            image=SimpleUploadedFile(
+                name="test_image.jpg", content=self.content, content_type="image/jpg"
+            ),
+            title="test title",
+        )
+
+    def tearDown(self) -> None:
+        if os.path.isfile("media/photos/test_title.jpg"):
+            os.remove("media/photos/test_title.jpg")
+
+    def test_metadata_extracted(self):
+        self.photo.refresh_from_db()
+        self.assertEqual(self.photo.width, 120)
+        self.assertEqual(self.photo.height, 80)
+        self.assertEqual(self.photo.image_format, "JPEG")
+        self.assertEqual(self.photo.image_size, len(self.content))
+        self.assertTrue(self.photo.placeholder.startswith("data:image/"))
+        self.assertLess(len(self.photo.placeholder), 1024)
+
+    def test_whole_file_saved(self):
+        with open("media/photos/test_title.jpg", "rb") as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_metadata_kept_after_update(self):
+        self.photo.description = "new description"
+        self.photo.save()
+        self.photo.refresh_from_db()
+        self.assertEqual(self.photo.width, 120)
+
+    def test_unreadable_image(self):
+        photo = Photo.objects.create(
+            author=self.u,
+            image=SimpleUploadedFile(
+                name="test_image.jpg", content=b"abc", content_type="image/jpg"
+            ),
+            title="unreadable",
+        )
+        self.assertEqual(photo.image_size, 3)
+        self.assertIsNone(photo.width)
+        os.remove(photo.image.path)
+
+
 class TagTestCase(TestCase):
     def setUp(self) -> None:
         self.t = Tag.objects.create(name="test")
@@ -152,6 +152,11 @@ class PhotoListSerializerTestCase(TestCase):
                 "title": "test title 2",
                 "image": "/media/photos/test_title_2.png",
                 "average_rating": None,
+                "width": 100,
+                "height": 100,
+                "image_format": "PNG",
+                "image_size": self.p2.image_size,
+                "placeholder": self.p2.placeholder,
             },
             {
                 "id": self.p1.id,
@@ -160,6 +165,11 @@ class PhotoListSerializerTestCase(TestCase):
                 "title": "test title 1",
                 "image": "/media/photos/test_title_1.png",
                 "average_rating": None,
+                "width": 100,
+                "height": 100,
+                "image_format": "PNG",
+                "image_size": self.p1.image_size,
+                "placeholder": self.p1.placeholder,
             },
         ]
 
@@ -1,6 +1,7 @@
 import os
 from PIL import Image
-from io import BytesIO
+from io import BytesIO, StringIO
+from django.core.management import call_command
 from django.db.models import Avg
 from rest_framework.test import APIClient, APITestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -155,13 +156,21 @@ class PhotoDeleteTestCase(APITestCase):
         self.non_author.force_authenticate(user=non_author)
         self.url = "/api/photos/"
 
+    def tearDown(self) -> None:
+        for title in ("test_title", "new_title"):
+            if os.path.isfile(f"media/photos/{title}.png"):
+                os.remove(f"media/photos/{title}.png")
+
     def test_author_can_delete(self):
         url = f"{self.url}{self.p.id}/"
         r = self.author.delete(url)
         self.assertNotEqual(r.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(os.path.isfile("media/photos/test_title.png"))
         self.assertEqual(Photo.objects.count(), 0)
+        # file is deleted by the sweeper
+        self.assertTrue(os.path.isfile("media/photos/test_title.png"))
+        call_command("sweep_media", stdout=StringIO())
+        self.assertFalse(os.path.isfile("media/photos/test_title.png"))
 
     def test_non_author_cant_delete(self):
         url = f"{self.url}{self.p.id}/"
@@ -180,8 +189,9 @@ class PhotoDeleteTestCase(APITestCase):
         r = self.author.delete(url)
         self.assertNotEqual(r.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(os.path.isfile("media/photos/new_title.png"))
         self.assertEqual(Photo.objects.count(), 0)
+        call_command("sweep_media", stdout=StringIO())
+        self.assertFalse(os.path.isfile("media/photos/new_title.png"))
 
     def test_tag_not_deleted(self):
         self.assertEqual(Tag.objects.count(), 1)
@@ -0,0 +1,142 @@
+import os
+import numpy as np
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework import status
+
+from .. import recommendations
+from ..models import Photo, PhotoNeighbor, Review
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class TopNeighborsTestCase(SimpleTestCase):
+    def test_matches_dense_cosine(self):
+        rng = np.random.default_rng(0)
+        size = 300
+        photo_ids = rng.integers(1, 60, size)
+        author_ids = rng.integers(1, 40, size)
+        ratings = rng.integers(1, 6, size).astype(np.float32)
+        # one rating per reviewer and photo
+        _, unique = np.unique(photo_ids * 1000 + author_ids, return_index=True)
+        photo_ids, author_ids, ratings = (
+            photo_ids[unique],
+            author_ids[unique],
+            ratings[unique],
+        )
+
+        ids, matrix = recommendations.build_matrix(photo_ids, author_ids, ratings)
+        dense = matrix.toarray()
+        expected = dense @ dense.T
+        np.fill_diagonal(expected, 0)
+
+        k = 5
+        for row, neighbors, scores in recommendations.top_neighbors(
+            matrix, k, chunk_size=7
+        ):
+            positive = np.sort(expected[row][expected[row] > 0])[::-1][:k]
+            np.testing.assert_allclose(scores, positive, rtol=1e-5)
+            np.testing.assert_allclose(expected[row][neighbors], scores, rtol=1e-5)
+
+    def test_ratings_centered_by_reviewer(self):
+        ids, matrix = recommendations.build_matrix(
+            np.array([1, 2, 1, 2]), np.array([1, 1, 2, 2]), np.array([5, 1, 4, 4.0])
+        )
+        # the second reviewer rated both photos alike
+        np.testing.assert_allclose(matrix.toarray(), [[1, 0], [-1, 0]])
+        self.assertEqual(matrix.nnz, 2)
+
+    def test_empty(self):
+        ids, matrix = recommendations.build_matrix(
+            np.array([], dtype=np.int64),
+            np.array([], dtype=np.int64),
+            np.array([], dtype=np.float32),
+        )
+        self.assertEqual(list(recommendations.top_neighbors(matrix, 5)), [])
+
+
+class RecommendedPhotosTestCase(APITestCase):
+    def setUp(self) -> None:
+        author = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        reviewers = [
+            User.objects.create_user(
+                username=f"reviewer{id}",
+                email=f"reviewer{id}@test.com",
+                password="reviewer123",
+            )
+            for id in range(3)
+        ]
+        self.photos = [
+            Photo.objects.create(
+                author=author,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            for id in range(4)
+        ]
+        ratings = {
+            0: {0: 5, 1: 4},
+            1: {0: 4, 1: 5},
+            # rated below their other ratings by both reviewers
+            2: {0: 1, 1: 2},
+            # photo 3 not reviewed
+        }
+        for photo, reviews in ratings.items():
+            for reviewer, rating in reviews.items():
+                Review.objects.create(
+                    author=reviewers[reviewer], photo=self.photos[photo], rating=rating
+                )
+
+    def tearDown(self) -> None:
+        for id in range(4):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def test_recommended(self):
+        call_command("build_recommendations", stdout=StringIO())
+
+        r = self.client.get(f"/api/photos/{self.photos[0].id}/recommended/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in r.data], [self.photos[1].id])
+        # ratings minus the reviewers' means (10/3 and 11/3), times 3
+        self.assertAlmostEqual(
+            r.data[0]["similarity"], 14 / (26**0.5 * 20**0.5), places=6
+        )
+        self.assertEqual(r.data[0]["title"], "test title 1")
+
+        for photo in self.photos[2:]:
+            r = self.client.get(f"/api/photos/{photo.id}/recommended/")
+            self.assertEqual(r.data, [])
+
+    def test_rebuild_replaces_neighbors(self):
+        self.assertEqual(recommendations.rebuild(k=1), 2)
+        self.assertEqual(
+            PhotoNeighbor.objects.get(photo=self.photos[1]).neighbor_id,
+            self.photos[0].id,
+        )
+        self.assertEqual(recommendations.rebuild(k=5), 2)
+        self.assertEqual(PhotoNeighbor.objects.count(), 2)
+
+    def test_photo_not_found(self):
+        r = self.client.get("/api/photos/99/recommended/")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,144 @@
+import os
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from .. import related_tags
+from ..models import Photo, Tag, TagCooccurrence
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+@override_settings(RELATED_TAGS_MIN_COUNT=1)
+class RelatedTagsTestCase(APITestCase):
+    def setUp(self) -> None:
+        author = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.tags = {
+            name: Tag.objects.create(name=name)
+            for name in ["nature", "forest", "tree", "city"]
+        }
+        self.photos = [
+            Photo.objects.create(
+                author=author,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            for id in range(5)
+        ]
+        photo_tags = [
+            ["nature", "forest", "tree"],
+            ["nature", "forest"],
+            ["nature", "city"],
+            ["city"],
+            ["city", "tree"],
+        ]
+        for photo, names in zip(self.photos, photo_tags):
+            photo.tags.add(*[self.tags[name] for name in names])
+
+    def tearDown(self) -> None:
+        for id in range(5):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def counts(self):
+        return set(
+            TagCooccurrence.objects.values_list("tag_id", "other_id", "count")
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.counts()
+        related_tags.rebuild()
+        self.assertEqual(incremental, self.counts())
+
+    def test_counts(self):
+        nature, forest = self.tags["nature"], self.tags["forest"]
+        self.assertIn((nature.id, nature.id, 3), self.counts())
+        self.assertIn((nature.id, forest.id, 2), self.counts())
+        self.assertIn((forest.id, nature.id, 2), self.counts())
+        self.assertMatchesRebuild()
+
+    def test_incremental_updates_match_rebuild(self):
+        photo = self.photos[0]
+        photo.tags.remove(self.tags["forest"], self.tags["city"])
+        self.assertMatchesRebuild()
+
+        photo.tags.add(self.tags["city"])
+        self.assertMatchesRebuild()
+
+        self.tags["nature"].photos.add(self.photos[3])
+        self.assertMatchesRebuild()
+
+        self.tags["nature"].photos.remove(self.photos[1])
+        self.assertMatchesRebuild()
+
+        photo.tags.clear()
+        self.assertMatchesRebuild()
+
+        self.tags["city"].photos.clear()
+        self.assertMatchesRebuild()
+
+    def test_photo_and_tag_deleted(self):
+        self.photos[0].delete()
+        self.assertMatchesRebuild()
+        self.tags["forest"].delete()
+        self.assertMatchesRebuild()
+
+    def test_related(self):
+        r = self.client.get("/api/tags/nature/related/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            r.data,
+            [
+                # 5 photos, 3 with nature, 2 with forest, 2 with both
+                {"name": "forest", "count": 2, "lift": 2 * 5 / (3 * 2)},
+                {"name": "tree", "count": 1, "lift": 1 * 5 / (3 * 2)},
+                {"name": "city", "count": 1, "lift": 1 * 5 / (3 * 3)},
+            ],
+        )
+
+    def test_photo_count_cached(self):
+        self.client.get("/api/tags/nature/related/")
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get("/api/tags/nature/related/")
+        self.assertEqual(r.data[0]["lift"], 2 * 5 / (3 * 2))
+        self.assertFalse([query for query in queries if "COUNT(" in query["sql"]])
+
+    def test_related_min_count_and_limit(self):
+        with self.settings(RELATED_TAGS_MIN_COUNT=2):
+            r = self.client.get("/api/tags/nature/related/")
+        self.assertEqual([item["name"] for item in r.data], ["forest"])
+
+        r = self.client.get("/api/tags/nature/related/", {"limit": 2})
+        self.assertEqual([item["name"] for item in r.data], ["forest", "tree"])
+
+    def test_tag_not_found(self):
+        r = self.client.get("/api/tags/missing/related/")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_build_command(self):
+        TagCooccurrence.objects.all().delete()
+        out = StringIO()
+        call_command("build_tag_cooccurrence", stdout=out)
+        self.assertIn("Stored 14 tag pairs", out.getvalue())
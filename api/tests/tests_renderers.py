@@ -0,0 +1,89 @@
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from .. import renderers
+from ..renderers import ORJSONParser, ORJSONRenderer
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.data = ReturnList(
+            [
+                OrderedDict(
+                    [
+                        ("id", 1),
+                        ("title", "zażółć gęślą jaźń \u2028"),
+                        ("average_rating", 4.5),
+                        ("price", Decimal("1.10")),
+                        ("label", gettext_lazy("Photo")),
+                        (
+                            "created_at",
+                            datetime.datetime(
+                                2023,
+                                5,
+                                1,
+                                12,
+                                30,
+                                15,
+                                123456,
+                                tzinfo=datetime.timezone.utc,
+                            ),
+                        ),
+                        ("day", datetime.date(2023, 5, 1)),
+                        ("description", None),
+                        ("tags", ["nature", "animals"]),
+                    ]
+                )
+            ],
+            serializer=None,
+        )
+
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(
+            ORJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+        )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_indent_falls_back_to_json_renderer(self):
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                ORJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+            )
+
+
+class ORJSONParserTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.body = '{"title": "gęś", "tags": ["a", "b"], "rating": 4}'.encode()
+
+    def test_same_output_as_json_parser(self):
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(self.body)),
+            JSONParser().parse(BytesIO(self.body)),
+        )
+
+    def test_invalid_json(self):
+        self.assertRaises(ParseError, ORJSONParser().parse, BytesIO(b"{invalid"))
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            data = ORJSONParser().parse(BytesIO(self.body))
+        self.assertEqual(data["title"], "gęś")
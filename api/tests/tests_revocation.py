@@ -0,0 +1,173 @@
+from datetime import timedelta
+from io import StringIO
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from ..authentication import user_cache
+from ..models import TokenRevocation
+from ..revocation import BloomFilter, revocation_filter
+
+User = get_user_model()
+
+
+class BloomFilterTestCase(TestCase):
+    def test_membership(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f"jti:{id}" for id in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"jti:other{id}" in bloom for id in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RevocationTestCase(APITestCase):
+    def setUp(self) -> None:
+        revocation_filter.clear()
+        user_cache.clear()
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.logout_url = "/api/auth/logout/"
+
+    def tearDown(self) -> None:
+        revocation_filter.clear()
+        user_cache.clear()
+
+    def login(self):
+        r = self.client.post(
+            "/api/auth/token/",
+            {"username": "testUser", "password": "testpassword123"},
+        )
+        return r.data["access"], r.data["refresh"]
+
+    def post(self, url, access, data=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data or {})
+
+    def refresh(self, refresh):
+        self.client.credentials()
+        return self.client.post("/api/auth/token/refresh/", {"refresh": refresh})
+
+    def test_logout(self):
+        access, refresh = self.login()
+        other_access, _ = self.login()
+        r = self.post(self.logout_url, access, {"refresh": refresh})
+        self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
+
+        r = self.post(self.logout_url, access)
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+        r = self.refresh(refresh)
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+        # other sessions are still logged in
+        r = self.post(self.logout_url, other_access)
+        self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_logout_refresh_of_another_user(self):
+        User.objects.create_user(username="otherUser", password="testpassword123")
+        r = self.client.post(
+            "/api/auth/token/",
+            {"username": "otherUser", "password": "testpassword123"},
+        )
+        access, _ = self.login()
+        r = self.post(self.logout_url, access, {"refresh": r.data["refresh"]})
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_all(self):
+        access, refresh = self.login()
+        r = self.post("/api/auth/revoke-all/", access)
+        self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        self.assertEqual(self.post(self.logout_url, access).status_code, 401)
+
+        # tokens issued after the revocation are valid
+        TokenRevocation.objects.update(revoked_at=timezone.now() - timedelta(seconds=2))
+        access, refresh = self.login()
+        self.assertEqual(self.refresh(refresh).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.post(self.logout_url, access).status_code, 204)
+
+    def test_no_query_for_valid_tokens(self):
+        access, _ = self.login()
+        self.post(self.logout_url, self.login()[0])
+        with CaptureQueriesContext(connection) as queries:
+            r = self.post(self.logout_url, access)
+        self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
+        # authentication makes no query, the first one is the logout's `update_or_create`
+        self.assertTrue(queries[0]["sql"].startswith("SAVEPOINT"))
+        self.assertFalse([query for query in queries if '"key" IN' in query["sql"]])
+
+    @override_settings(REVOCATION_SYNC_SECONDS=0)
+    def test_sync_revocations_of_other_processes(self):
+        access, _ = self.login()
+        self.post(self.logout_url, self.login()[0])
+        token = AccessToken(access)
+        TokenRevocation.objects.create(
+            key=f"jti:{token['jti']}",
+            revoked_at=timezone.now(),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(self.post(self.logout_url, access).status_code, 401)
+
+    @override_settings(REVOCATION_SYNC_SECONDS=0)
+    def test_sync_revocations_committed_late(self):
+        access, _ = self.login()
+        revoked_at = timezone.now()
+        TokenRevocation.objects.create(
+            id=100,
+            key="jti:other",
+            revoked_at=revoked_at,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.post(self.logout_url, self.login()[0])
+        # revoked before the last sync, with a lower id, committed after it
+        token = AccessToken(access)
+        TokenRevocation.objects.create(
+            id=10,
+            key=f"jti:{token['jti']}",
+            revoked_at=revoked_at,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(self.post(self.logout_url, access).status_code, 401)
+
+    @override_settings(REVOCATION_SYNC_SECONDS=0)
+    def test_sync_outside_lock(self):
+        locked = []
+
+        def record(execute, *args):
+            # revoked by another thread while the filter is synced
+            locked.append(revocation_filter.lock.locked())
+            if not locked[-1]:
+                revocation_filter.add(f"jti:during{len(locked)}")
+            return execute(*args)
+
+        with connection.execute_wrapper(record):
+            # builds the filter, then loads rows revoked since
+            revocation_filter.might_contain(["jti:other"])
+            revocation_filter.might_contain(["jti:other"])
+        # counted and read by the build, read by the load
+        self.assertEqual(locked, [False] * 3)
+        keys = [f"jti:during{index}" for index in range(1, 4)]
+        self.assertEqual(revocation_filter.might_contain(keys), keys)
+
+    def test_purge_command(self):
+        TokenRevocation.objects.create(
+            key="jti:expired",
+            revoked_at=timezone.now() - timedelta(days=2),
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+        access, _ = self.login()
+        self.post(self.logout_url, access)
+        out = StringIO()
+        call_command("purge_revoked_tokens", stdout=out)
+        self.assertIn("Deleted 1 token revocations.", out.getvalue())
+        self.assertEqual(TokenRevocation.objects.count(), 1)
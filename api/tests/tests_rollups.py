@@ -0,0 +1,189 @@
+import os
+from datetime import datetime, timezone
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from .. import rollups
+from ..models import Photo, Review, StatsBucket, Tag
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class RollupsTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.reviewers = [
+            User.objects.create_user(
+                username=f"reviewer{id}",
+                email=f"reviewer{id}@test.com",
+                password="reviewer123",
+            )
+            for id in range(3)
+        ]
+        self.nature = Tag.objects.create(name="nature")
+        self.city = Tag.objects.create(name="city")
+        self.photos = [
+            Photo.objects.create(
+                author=self.author,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            for id in range(3)
+        ]
+        self.photos[0].tags.add(self.nature)
+        self.photos[1].tags.add(self.nature, self.city)
+        self.url = "/api/stats/"
+
+    def tearDown(self) -> None:
+        for id in range(3):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def review(self, photo, reviewer, rating):
+        return Review.objects.create(
+            author=self.reviewers[reviewer], photo=photo, rating=rating
+        )
+
+    def buckets(self):
+        return set(
+            StatsBucket.objects.values_list(
+                "granularity", "tag_id", "start", *rollups.COUNTERS
+            )
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.buckets()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.buckets())
+
+    def test_bucket_start(self):
+        moment = datetime(2023, 5, 17, 13, 45, 12, tzinfo=timezone.utc)
+        self.assertEqual(
+            rollups.bucket_start(moment, StatsBucket.HOUR),
+            datetime(2023, 5, 17, 13, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            rollups.bucket_start(moment, StatsBucket.DAY),
+            datetime(2023, 5, 17, tzinfo=timezone.utc),
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        self.assertMatchesRebuild()
+        r = self.review(self.photos[0], 0, 5)
+        self.review(self.photos[0], 1, 3)
+        self.review(self.photos[1], 0, 4)
+        self.review(self.photos[2], 0, 1)
+        self.assertMatchesRebuild()
+
+        r.rating = 2
+        r.save()
+        self.assertMatchesRebuild()
+
+        self.photos[2].tags.add(self.city)
+        self.photos[1].tags.remove(self.nature)
+        self.assertMatchesRebuild()
+
+        self.nature.photos.clear()
+        self.city.photos.add(self.photos[0])
+        self.assertMatchesRebuild()
+
+        r.delete()
+        self.photos[1].delete()
+        self.assertMatchesRebuild()
+
+    def test_counters(self):
+        self.review(self.photos[0], 0, 5)
+        self.review(self.photos[0], 1, 3)
+        self.review(self.photos[2], 0, 5)
+        bucket = StatsBucket.objects.get(granularity=StatsBucket.DAY, tag=self.nature)
+        self.assertEqual(bucket.uploads, 2)
+        self.assertEqual(bucket.reviews, 2)
+        self.assertEqual(bucket.rating_sum, 8)
+        self.assertEqual((bucket.rating_3, bucket.rating_5), (1, 1))
+        bucket = StatsBucket.objects.get(granularity=StatsBucket.DAY, tag=None)
+        self.assertEqual((bucket.uploads, bucket.reviews, bucket.rating_5), (3, 3, 2))
+
+    def test_stats(self):
+        r = self.review(self.photos[0], 0, 5)
+        self.review(self.photos[1], 0, 4)
+        Photo.objects.filter(id=self.photos[1].id).update(
+            created_at=datetime(2023, 5, 16, 10, 30, tzinfo=timezone.utc)
+        )
+        Review.objects.filter(id=r.id).update(
+            created_at=datetime(2023, 5, 17, 13, 45, tzinfo=timezone.utc)
+        )
+        call_command("rebuild_stats", stdout=StringIO())
+
+        params = {"since": "2023-05-16T00:00:00Z", "until": "2023-05-18T00:00:00Z"}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "start": "2023-05-16T00:00:00Z",
+                    "uploads": 1,
+                    "reviews": 0,
+                    "rating_sum": 0,
+                    "average_rating": None,
+                    "ratings": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+                },
+                {
+                    "start": "2023-05-17T00:00:00Z",
+                    "uploads": 0,
+                    "reviews": 1,
+                    "rating_sum": 5,
+                    "average_rating": 5.0,
+                    "ratings": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 1},
+                },
+            ],
+        )
+
+        response = self.client.get(
+            self.url, {**params, "granularity": "hour", "tag": "nature"}
+        )
+        self.assertEqual(
+            [(item["start"], item["uploads"]) for item in response.json()],
+            [("2023-05-16T10:00:00Z", 1), ("2023-05-17T13:00:00Z", 0)],
+        )
+
+        response = self.client.get(self.url, {**params, "tag": "city"})
+        self.assertEqual(len(response.json()), 1)
+
+    def test_default_range(self):
+        self.review(self.photos[0], 0, 5)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["uploads"], 3)
+
+    def test_invalid_query(self):
+        response = self.client.get(self.url, {"granularity": "week"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            self.url,
+            {"granularity": "hour", "since": "2020-01-01T00:00:00Z"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"tag": "missing"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,153 @@
+import os
+import random
+from unittest import mock
+from PIL import Image, ImageDraw
+from io import BytesIO
+from rest_framework.test import APIClient, APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+
+from ..imaging import dhash, hamming_distance, to_signed
+from ..models import Photo
+from ..similarity import BKTree, photo_hash_index
+
+User = get_user_model()
+
+
+def create_image(size=(200, 150), shapes=0, format="png"):
+    image = Image.new("RGB", size, color=(255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    draw.ellipse((w * 0.1, h * 0.2, w * 0.5, h * 0.8), fill=(200, 30, 30))
+    if shapes:
+        draw.rectangle((w * 0.55, h * 0.1, w * 0.9, h * 0.5), fill=(30, 30, 200))
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+    image_file = BytesIO()
+    image.save(image_file, format)
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        f"test_image.{format}", image_file.read(), content_type=f"image/{format}"
+    )
+
+
+class BKTreeTestCase(SimpleTestCase):
+    def test_search_matches_brute_force(self):
+        rng = random.Random(0)
+        hashes = {id: to_signed(rng.getrandbits(64)) for id in range(500)}
+        base = hashes[0]
+        # near-duplicates of the first hash
+        for id in range(500, 520):
+            hashes[id] = base ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+
+        tree = BKTree()
+        for id, value in hashes.items():
+            tree.add(value, id)
+
+        for max_distance in (0, 2, 5, 20):
+            expected = sorted(
+                (hamming_distance(base, value), id)
+                for id, value in hashes.items()
+                if hamming_distance(base, value) <= max_distance
+            )
+            self.assertEqual(sorted(tree.search(base, max_distance)), expected)
+
+    def test_remove(self):
+        tree = BKTree()
+        tree.add(5, 1)
+        tree.add(5, 2)
+        tree.add(7, 3)
+        tree.remove(5, 1)
+        self.assertEqual(sorted(tree.search(5, 0)), [(0, 2)])
+        self.assertEqual(tree.size, 2)
+
+
+class DHashTestCase(SimpleTestCase):
+    def test_resized_and_reencoded_image_is_close(self):
+        original = dhash(Image.open(create_image()))
+        resized = dhash(Image.open(create_image(size=(400, 300), format="jpeg")))
+        different = dhash(Image.open(create_image(shapes=1)))
+        self.assertLessEqual(hamming_distance(original, resized), 4)
+        self.assertGreater(hamming_distance(original, different), 6)
+
+
+class SimilarPhotosTestCase(APITestCase):
+    def setUp(self) -> None:
+        photo_hash_index.clear()
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.p1 = Photo.objects.create(
+            author=self.u, image=create_image(), title="test title 1"
+        )
+        self.p2 = Photo.objects.create(
+            author=self.u,
+            image=create_image(size=(400, 300), format="jpeg"),
+            title="test title 2",
+        )
+        self.p3 = Photo.objects.create(
+            author=self.u, image=create_image(shapes=1), title="test title 3"
+        )
+        self.user = APIClient()
+        self.user.force_authenticate(user=self.u)
+
+    def tearDown(self) -> None:
+        photo_hash_index.clear()
+        for name in ("test_title_1.png", "test_title_2.jpeg", "test_title_3.png"):
+            if os.path.isfile(f"media/photos/{name}"):
+                os.remove(f"media/photos/{name}")
+
+    def test_similar_photos(self):
+        r = self.client.get(f"/api/photos/{self.p1.id}/similar/?distance=6")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in r.data], [self.p2.id])
+        self.assertLessEqual(r.data[0]["distance"], 6)
+        self.assertEqual(r.data[0]["title"], "test title 2")
+
+    def test_invalid_distance(self):
+        r = self.client.get(f"/api/photos/{self.p1.id}/similar/?distance=abc")
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        for distance in (-1, 17):
+            r = self.client.get(
+                f"/api/photos/{self.p1.id}/similar/?distance={distance}"
+            )
+            self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PHOTO_HASH_INDEX_TTL=0)
+    def test_rebuild(self):
+        tree = photo_hash_index.get_tree()
+        # the expired tree is searched while another thread rebuilds it
+        with photo_hash_index.build_lock:
+            self.assertIs(photo_hash_index.get_tree(), tree)
+
+        add = BKTree.add
+
+        def add_during_rebuild(tree, value, id):
+            if tree is not photo_hash_index.tree and id == self.p1.id:
+                # photo saved by another thread
+                photo_hash_index.add(12345, 0)
+            add(tree, value, id)
+
+        with mock.patch.object(BKTree, "add", add_during_rebuild):
+            rebuilt = photo_hash_index.get_tree()
+        self.assertIsNot(rebuilt, tree)
+        self.assertEqual(rebuilt.search(12345, 0), [(0, 0)])
+        self.assertEqual(tree.search(12345, 0), [(0, 0)])
+
+    @override_settings(PHOTO_DUPLICATE_POLICY="reject")
+    def test_near_duplicate_rejected(self):
+        data = {"image": create_image(size=(300, 225)), "title": "duplicate"}
+        r = self.user.post("/api/photos/", data, format="multipart")
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("image", r.data)
+
+    @override_settings(PHOTO_DUPLICATE_POLICY="warn")
+    def test_near_duplicate_warning(self):
+        data = {"image": create_image(size=(300, 225)), "title": "duplicate"}
+        r = self.user.post("/api/photos/", data, format="multipart")
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(r.data["near_duplicates"], [self.p1.id, self.p2.id])
+        os.remove("media/photos/duplicate.png")
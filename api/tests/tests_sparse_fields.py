@@ -0,0 +1,153 @@
+import os
+from PIL import Image
+from io import BytesIO
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from ..models import Photo, Tag, Review
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class SparseFieldsTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.u1 = User.objects.create_user(
+            username="testUser1",
+            email="testemail1@test.com",
+            password="testpassword123",
+        )
+        self.u2 = User.objects.create_user(
+            username="testUser2",
+            email="testemail2@test.com",
+            password="testpassword123",
+        )
+        self.photos = []
+        for title in ("test title 1", "test title 2"):
+            photo = Photo.objects.create(
+                author=self.u1, image=create_image(), title=title
+            )
+            photo.tags.add(Tag.objects.get_or_create(name="drf")[0])
+            self.photos.append(photo)
+        self.review = Review.objects.create(
+            author=self.u2, photo=self.photos[0], rating=4, body="test body"
+        )
+        self.client = APIClient()
+
+    def tearDown(self) -> None:
+        for title in ("test_title_1", "test_title_2"):
+            if os.path.isfile(f"media/photos/{title}.png"):
+                os.remove(f"media/photos/{title}.png")
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            r = self.client.get(url, params)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return r, [query["sql"] for query in context.captured_queries]
+
+    def test_photo_fields(self):
+        r, queries = self.get(
+            f"/api/photos/{self.photos[0].id}/", {"fields": "id,title"}
+        )
+        self.assertEqual(r.data, {"id": self.photos[0].id, "title": "test title 1"})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("AVG", queries[0])
+        self.assertNotIn("auth_user", queries[0])
+        self.assertNotIn('"description"', queries[0])
+
+    def test_photo_list_fields(self):
+        r, queries = self.get(
+            "/api/photos/", {"fields": "title,average_rating", "ordering": "title"}
+        )
+        self.assertEqual(
+            r.data,
+            [
+                {"title": "test title 1", "average_rating": 4.0},
+                {"title": "test title 2", "average_rating": None},
+            ],
+        )
+        self.assertEqual(len(queries), 1)
+
+    def test_ordering_by_annotation(self):
+        r, queries = self.get(
+            "/api/photos/", {"fields": "id", "ordering": "-average_rating"}
+        )
+        self.assertEqual(r.data[0]["id"], self.photos[0].id)
+
+    def test_photo_expand(self):
+        r, queries = self.get(
+            f"/api/photos/{self.photos[0].id}/",
+            {"fields": "id", "expand": "author,tags,reviews"},
+        )
+        self.assertEqual(r.data["author"], {"id": self.u1.id, "username": "testUser1"})
+        self.assertEqual(
+            r.data["tags"], [{"id": self.photos[0].tags.get().id, "name": "drf"}]
+        )
+        self.assertEqual(len(r.data["reviews"]), 1)
+        review = r.data["reviews"][0]
+        self.assertEqual(review["author"], "testUser2")
+        self.assertEqual(review["rating"], 4)
+        self.assertTrue(
+            review["url"].endswith(
+                f"/api/photos/{self.photos[0].id}/reviews/{self.review.id}/"
+            )
+        )
+        # photo with author, tags, reviews with their authors
+        self.assertEqual(len(queries), 3)
+
+    def test_photo_list_expand(self):
+        r, queries = self.get(
+            "/api/photos/", {"expand": "reviews", "ordering": "title"}
+        )
+        self.assertEqual(len(r.data), 2)
+        self.assertEqual(r.data[0]["average_rating"], 4.0)
+        self.assertEqual(len(r.data[0]["reviews"]), 1)
+        self.assertEqual(r.data[1]["reviews"], [])
+        self.assertEqual(len(queries), 2)
+
+    def test_review_fields_and_expand(self):
+        url = f"/api/photos/{self.photos[0].id}/reviews/"
+        r, queries = self.get(url, {"fields": "rating", "expand": "photo"})
+        self.assertEqual(r.data[0]["rating"], 4)
+        self.assertEqual(r.data[0]["photo"]["title"], "test title 1")
+        self.assertEqual(set(r.data[0]), {"rating", "photo"})
+
+        r, queries = self.get(
+            f"{url}{self.review.id}/", {"fields": "body", "expand": "author"}
+        )
+        self.assertEqual(
+            r.data,
+            {
+                "body": "test body",
+                "author": {"id": self.u2.id, "username": "testUser2"},
+            },
+        )
+
+    def test_unchanged_without_parameters(self):
+        r, _ = self.get(f"/api/photos/{self.photos[0].id}/", {})
+        self.assertEqual(r.data["author"], "testUser1")
+        self.assertEqual(r.data["tags"], ["drf"])
+        self.assertEqual(r.data["average_rating"], 4.0)
+        self.assertEqual(len(r.data["reviews"]), 1)
+
+    def test_unknown_fields(self):
+        url = f"/api/photos/{self.photos[0].id}/"
+        r = self.client.get(url, {"fields": "id,secret"})
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", str(r.data["fields"]))
+        r = self.client.get(url, {"expand": "title"})
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("title", str(r.data["expand"]))
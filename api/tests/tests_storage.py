@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APIClient, APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+
+from ..media_gc import reconcile
+from ..models import Photo
+from ..storage import shard, unshard
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class ShardedStorageTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_SHARDING=True
+        )
+        self.settings_override.enable()
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.user = APIClient()
+        self.user.force_authenticate(user=self.u)
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def stored(self, name):
+        return os.path.isfile(os.path.join(self.media_root, name))
+
+    def create_photo(self, title="test title"):
+        return Photo.objects.create(author=self.u, image=create_image(), title=title)
+
+    def test_shard(self):
+        name = shard("photos/test_title.png")
+        self.assertRegex(name, r"^photos/[0-9a-f]{2}/[0-9a-f]{2}/test_title\.png$")
+        self.assertEqual(unshard(name), "photos/test_title.png")
+        self.assertEqual(shard("other/test_title.png"), "other/test_title.png")
+
+    def test_upload(self):
+        r = self.user.post(
+            "/api/photos/", {"title": "test title", "image": create_image()}
+        )
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        photo = Photo.objects.get()
+        self.assertEqual(photo.image.name, "photos/test_title.png")
+        self.assertTrue(self.stored(shard("photos/test_title.png")))
+        self.assertFalse(self.stored("photos/test_title.png"))
+
+        r = self.client.get("/media/photos/test_title.png")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(r.streaming_content), photo.image.read())
+
+    def test_migrate_layout(self):
+        with override_settings(MEDIA_SHARDING=False):
+            photo = self.create_photo()
+        self.assertTrue(self.stored("photos/test_title.png"))
+        # read from the previous layout until files are moved
+        self.assertEqual(self.client.get(photo.image.url).status_code, 200)
+
+        out = StringIO()
+        call_command("migrate_media_layout", "--batch-size", "1", stdout=out)
+        self.assertIn("Moved 1 files to the sharded layout.", out.getvalue())
+        self.assertTrue(self.stored(shard("photos/test_title.png")))
+        self.assertFalse(self.stored("photos/test_title.png"))
+        self.assertEqual(self.client.get(photo.image.url).status_code, 200)
+
+        with override_settings(MEDIA_SHARDING=False):
+            call_command("migrate_media_layout", stdout=out)
+        self.assertTrue(self.stored("photos/test_title.png"))
+
+    def test_rename_after_patch(self):
+        photo = self.create_photo()
+        photo.title = "new title"
+        photo.save()
+        self.assertEqual(photo.image.name, "photos/new_title.png")
+        self.assertTrue(self.stored(shard("photos/new_title.png")))
+        self.assertFalse(self.stored(shard("photos/test_title.png")))
+
+    def test_rename_to_existing_name(self):
+        photo = self.create_photo()
+        # e.g. left by a deleted photo
+        existing = os.path.join(self.media_root, shard("photos/new_title.png"))
+        os.makedirs(os.path.dirname(existing))
+        with open(existing, "wb") as file:
+            file.write(b"existing")
+        photo.title = "new title"
+        photo.save()
+        self.assertTrue(photo.image.name.startswith("photos/new_title_"))
+        self.assertTrue(self.stored(shard(photo.image.name)))
+        self.assertFalse(self.stored(shard("photos/test_title.png")))
+        with open(existing, "rb") as file:
+            self.assertEqual(file.read(), b"existing")
+        self.assertEqual(Photo.objects.get(pk=photo.pk).image.name, photo.image.name)
+
+    def test_reconcile(self):
+        photo = self.create_photo()
+        orphans, dangling = reconcile(grace_seconds=0, dry_run=True)
+        self.assertEqual((orphans, dangling), ([], []))
+
+        photo.image.delete(save=False)
+        self.assertEqual(reconcile(grace_seconds=0, dry_run=True)[1], [photo.id])
@@ -86,6 +86,21 @@ class TagUrlsTestCase(APITestCase):
         data_str = str(r.data).replace("http://testserver", "")
         self.assertEqual(data_str, str(expected_data))
 
+    def test_list_limit(self):
+        r = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(len(r.data), 2)
+        r = self.client.get(self.url, {"limit": -1})
+        self.assertEqual(r.data, [])
+        for limit in ("abc", "1.5"):
+            r = self.client.get(self.url, {"limit": limit})
+            self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("limit", r.data)
+
+    def test_retrieve_ignores_limit(self):
+        r = self.client.get(f"{self.url}{self.t1.name}/", {"limit": 1})
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.data["name"], self.t1.name)
+
     def test_tag_not_found(self):
         url = f"{self.url}none/"
         r = self.client.get(url)
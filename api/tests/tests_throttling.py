@@ -0,0 +1,116 @@
+import os
+from unittest import mock
+from PIL import Image
+from io import BytesIO
+from rest_framework.test import APIClient, APITestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+
+from ..models import Photo
+from ..throttling import CostThrottle
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+@override_settings(
+    THROTTLE_BUCKETS={
+        "anon": {"capacity": 10, "rate": 1},
+        "user": {"capacity": 30, "rate": 1},
+    },
+    THROTTLE_COSTS={"default": 1, "list": 2, "search": 5, "create": 5},
+    THROTTLE_ENABLED=True,
+)
+@mock.patch.object(CostThrottle, "timer", return_value=1000.0)
+class CostThrottleTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.photo = Photo.objects.create(
+            author=self.u, image=create_image(), title="test title"
+        )
+        self.user = APIClient()
+        self.user.force_authenticate(user=self.u)
+
+    def tearDown(self) -> None:
+        cache.clear()
+        for title in ("test_title", "throttled_photo"):
+            if os.path.isfile(f"media/photos/{title}.png"):
+                os.remove(f"media/photos/{title}.png")
+
+    def test_headers(self, timer):
+        r = self.client.get(f"/api/photos/{self.photo.id}/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r["RateLimit-Limit"], "10")
+        self.assertEqual(r["RateLimit-Remaining"], "9")
+        self.assertEqual(r["RateLimit-Reset"], "1")
+        self.assertEqual(r["RateLimit-Policy"], "10;w=10")
+
+    def test_action_costs(self, timer):
+        r = self.client.get("/api/photos/")
+        self.assertEqual(r["RateLimit-Remaining"], "8")
+        r = self.client.get("/api/photos/", {"search": "test"})
+        self.assertEqual(r["RateLimit-Remaining"], "3")
+        self.assertEqual(r["RateLimit-Reset"], "7")
+
+    def test_view_costs(self, timer):
+        r = self.user.post(
+            "/api/photos/", {"title": "throttled photo", "image": create_image()}
+        )
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        # photo uploads cost 20 instead of the default 5 of "create"
+        self.assertEqual(r["RateLimit-Remaining"], "10")
+
+    def test_throttled(self, timer):
+        url = "/api/photos/"
+        for _ in range(5):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(r["Retry-After"], "2")
+        self.assertEqual(r["RateLimit-Remaining"], "0")
+
+        # denied requests aren't charged
+        timer.return_value += 2
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        r = self.client.get(f"/api/photos/{self.photo.id}/")
+        self.assertEqual(r.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_refill(self, timer):
+        self.client.get("/api/photos/", {"search": "test"})
+        timer.return_value += 3
+        r = self.client.get(f"/api/photos/{self.photo.id}/")
+        self.assertEqual(r["RateLimit-Remaining"], "7")
+        # buckets don't fill up beyond capacity
+        timer.return_value += 60
+        r = self.client.get(f"/api/photos/{self.photo.id}/")
+        self.assertEqual(r["RateLimit-Remaining"], "9")
+
+    def test_separate_buckets(self, timer):
+        for _ in range(5):
+            self.client.get("/api/photos/")
+        r = self.user.get("/api/photos/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r["RateLimit-Limit"], "30")
+        self.assertEqual(r["RateLimit-Remaining"], "28")
+
+    def test_forwarded_for_ignored(self, timer):
+        for index in range(6):
+            r = self.client.get("/api/photos/", HTTP_X_FORWARDED_FOR=f"10.0.0.{index}")
+        self.assertEqual(r.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
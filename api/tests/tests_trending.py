@@ -0,0 +1,168 @@
+import os
+from datetime import timedelta
+from PIL import Image
+from io import BytesIO, StringIO
+from rest_framework.test import APITestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from .. import trending
+from ..models import JobWatermark, Photo, Review
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class Log2AddTestCase(SimpleTestCase):
+    def test_log2_add(self):
+        self.assertAlmostEqual(trending.log2_add(3, 5), 5.321928094887363)
+        self.assertEqual(trending.log2_add(None, 5), 5)
+        # no overflow for large exponents
+        self.assertAlmostEqual(trending.log2_add(10000, 10000), 10001)
+
+
+@override_settings(TRENDING_LAG_SECONDS=0)
+class TrendingTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.author = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        self.reviewers = [
+            User.objects.create_user(
+                username=f"reviewer{id}",
+                email=f"reviewer{id}@test.com",
+                password="reviewer123",
+            )
+            for id in range(3)
+        ]
+        self.photos = [
+            Photo.objects.create(
+                author=self.author,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            for id in range(3)
+        ]
+        self.url = "/api/photos/trending/"
+
+    def tearDown(self) -> None:
+        for id in range(3):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def review(self, photo, reviewer, rating, days_ago=0):
+        r = Review.objects.create(
+            author=self.reviewers[reviewer], photo=photo, rating=rating
+        )
+        created_at = timezone.now() - timedelta(days=days_ago)
+        Review.objects.filter(id=r.id).update(created_at=created_at)
+        return r
+
+    def scores(self):
+        return dict(Photo.objects.values_list("id", "trending_score"))
+
+    def test_recent_reviews_trend(self):
+        # many good but old reviews
+        for reviewer in range(3):
+            self.review(self.photos[0], reviewer, 5, days_ago=10)
+        # fewer recent reviews
+        self.review(self.photos[1], 0, 4)
+        self.review(self.photos[1], 1, 4)
+        self.review(self.photos[2], 0, 2)
+        trending.update_scores()
+
+        r = self.client.get(self.url)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in r.data],
+            [self.photos[1].id, self.photos[2].id, self.photos[0].id],
+        )
+        self.assertEqual(r.data[0]["title"], "test title 1")
+
+    def test_photos_without_reviews_excluded(self):
+        self.review(self.photos[0], 0, 5)
+        trending.update_scores()
+        r = self.client.get(self.url)
+        self.assertEqual([item["id"] for item in r.data], [self.photos[0].id])
+
+    def test_incremental_updates_match_reset(self):
+        self.review(self.photos[0], 0, 5, days_ago=2)
+        self.review(self.photos[1], 0, 3, days_ago=1)
+        self.assertEqual(trending.update_scores(batch_size=1), 2)
+
+        self.review(self.photos[0], 1, 4)
+        self.review(self.photos[2], 0, 1)
+        self.assertEqual(trending.update_scores(), 2)
+        self.assertEqual(trending.update_scores(), 0)
+        incremental = self.scores()
+
+        trending.reset_scores()
+        self.assertEqual(set(self.scores().values()), {None})
+        trending.update_scores()
+        for id, score in self.scores().items():
+            self.assertAlmostEqual(score, incremental[id])
+
+    def test_watermark(self):
+        r = self.review(self.photos[0], 0, 5)
+        trending.update_scores()
+        watermark = JobWatermark.objects.get(name=trending.WATERMARK_NAME)
+        self.assertEqual(watermark.value, r.id)
+
+    @override_settings(TRENDING_LAG_SECONDS=60)
+    def test_recent_reviews_left_to_next_run(self):
+        old = self.review(self.photos[0], 0, 5, days_ago=1)
+        self.review(self.photos[1], 0, 5)
+        self.review(self.photos[2], 0, 5, days_ago=1)
+        self.assertEqual(trending.update_scores(), 1)
+        watermark = JobWatermark.objects.get(name=trending.WATERMARK_NAME)
+        self.assertEqual(watermark.value, old.id)
+        with override_settings(TRENDING_LAG_SECONDS=0):
+            self.assertEqual(trending.update_scores(), 2)
+
+    def test_updated_and_deleted_reviews(self):
+        first = self.review(self.photos[0], 0, 5, days_ago=1)
+        self.review(self.photos[0], 1, 3)
+        second = self.review(self.photos[1], 0, 2)
+        trending.update_scores()
+        self.assertEqual(trending.recompute_changed_scores(), 0)
+
+        first.rating = 1
+        first.save()
+        second.delete()
+        # not added yet, read as it is by `update_scores`
+        third = self.review(self.photos[2], 0, 4)
+        third.rating = 2
+        third.save()
+        self.assertEqual(trending.recompute_changed_scores(), 3)
+        trending.update_scores()
+        recomputed = self.scores()
+        self.assertIsNone(recomputed[self.photos[1].id])
+
+        trending.reset_scores()
+        trending.update_scores()
+        for id, score in self.scores().items():
+            self.assertAlmostEqual(score, recomputed[id])
+
+    def test_update_trending_command(self):
+        self.review(self.photos[0], 0, 5)
+        out = StringIO()
+        call_command("update_trending", stdout=out)
+        self.assertIn("Processed 1 reviews", out.getvalue())
+        call_command("update_trending", "--reset", stdout=out)
+        self.assertIsNotNone(Photo.objects.get(id=self.photos[0].id).trending_score)
@@ -0,0 +1,114 @@
+import os
+from PIL import Image
+from io import BytesIO
+from django.db.models import Avg, Count
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..models import Photo, Review, Tag
+from ..serializers import (
+    PhotoListSerializer,
+    PhotoListValuesSerializer,
+    ReviewListSerializer,
+    ReviewListValuesSerializer,
+    TagSerializer,
+    TagValuesSerializer,
+    ValuesListSerializer,
+)
+
+User = get_user_model()
+
+
+def create_image():
+    image = Image.new("RGB", (100, 100), color=(255, 0, 0))
+    image_file = BytesIO()
+    image.save(image_file, "png")
+    image_file.seek(0)
+    return SimpleUploadedFile(
+        "test_image.png", image_file.read(), content_type="image/png"
+    )
+
+
+class ValuesSerializersTestCase(TestCase):
+    def setUp(self) -> None:
+        u = User.objects.create_user(
+            username="testUser",
+            email="testemail@test.com",
+            password="testpassword123",
+        )
+        reviewer = User.objects.create_user(
+            username="reviewer",
+            email="reviewer@test.com",
+            password="reviewer123",
+        )
+        t1 = Tag.objects.create(name="nature")
+        t2 = Tag.objects.create(name="animals")
+        Tag.objects.create(name="empty")
+        for id in range(3):
+            p = Photo.objects.create(
+                author=u,
+                image=create_image(),
+                title=f"test title {id}",
+                description=f"test description {id}",
+            )
+            p.tags.add(t1)
+            if id:
+                p.tags.add(t2)
+                Review.objects.create(
+                    author=reviewer, photo=p, rating=id + 2, body=f"review {id}"
+                )
+        Review.objects.create(author=u, photo=p, rating=1)
+        self.photo = p
+        self.request = Request(APIRequestFactory().get("/api/photos/"))
+
+    def tearDown(self) -> None:
+        for id in range(3):
+            if os.path.isfile(f"media/photos/test_title_{id}.png"):
+                os.remove(f"media/photos/test_title_{id}.png")
+
+    def assertSameOutput(self, serializer_class, values_serializer_class, queryset):
+        for context in ({"request": None}, {"request": self.request}):
+            expected = serializer_class(queryset, many=True, context=context).data
+            data = values_serializer_class(queryset, context=context).data
+            self.assertEqual(data, expected)
+            self.assertEqual(
+                JSONRenderer().render(data), JSONRenderer().render(expected)
+            )
+
+    def test_photo_list(self):
+        photos = Photo.objects.annotate(average_rating=Avg("reviews__rating"))
+        self.assertSameOutput(
+            PhotoListSerializer, PhotoListValuesSerializer, photos.order_by("id")
+        )
+
+    def test_review_list(self):
+        reviews = self.photo.reviews.order_by("-created_at")
+        self.assertSameOutput(ReviewListSerializer, ReviewListValuesSerializer, reviews)
+
+    def test_tag_list(self):
+        tags = Tag.objects.annotate(number_of_photos=Count("photos"))
+        self.assertSameOutput(TagSerializer, TagValuesSerializer, tags.order_by("id"))
+
+    def test_default_row_mapper(self):
+        class TagNamesSerializer(ValuesListSerializer):
+            fields = ["id", "name"]
+
+        tags = Tag.objects.order_by("id")
+        self.assertEqual(
+            TagNamesSerializer(tags).data,
+            [{"id": tag.id, "name": tag.name} for tag in tags],
+        )
+
+    def test_photo_list_queries(self):
+        photos = Photo.objects.annotate(average_rating=Avg("reviews__rating"))
+        with self.assertNumQueries(1):
+            PhotoListValuesSerializer(photos, context={"request": None}).data
+
+    def test_tag_list_queries(self):
+        tags = Tag.objects.annotate(number_of_photos=Count("photos"))
+        with self.assertNumQueries(2):
+            TagValuesSerializer(tags, context={"request": None}).data
@@ -0,0 +1,135 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+class CostThrottle(BaseThrottle):
+    """
+    Token bucket throttle charging each request the cost of its action.
+
+    Every client has a bucket of `capacity` tokens refilled at `rate` tokens
+    per second, configured per scope ("anon" or "user") in `THROTTLE_BUCKETS`.
+    Costs of actions are set in `THROTTLE_COSTS` and can be overridden with
+    a `throttle_costs` dict on views; list requests with a 'search' query
+    parameter are charged as "search".
+
+    Buckets are kept in the `THROTTLE_CACHE` cache as a single integer,
+    the time in milliseconds at which the bucket would be full again (GCRA),
+    advanced atomically with `cache.incr`, so buckets can be shared by all
+    workers through a shared cache backend. Concurrent requests refilling
+    an idle bucket may be charged twice, never let through for free.
+    Requests are let through when `THROTTLE_ENABLED` is false.
+    """
+
+    timer = time.time
+
+    def get_scope(self, request):
+        return "user" if request.user and request.user.is_authenticated else "anon"
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return super().get_ident(request)
+
+    def get_cost(self, request, view):
+        action = getattr(view, "action", None) or request.method.lower()
+        if action == "list" and request.query_params.get("search"):
+            action = "search"
+        costs = {**settings.THROTTLE_COSTS, **getattr(view, "throttle_costs", {})}
+        return costs.get(action, costs["default"])
+
+    def charge(self, cache, key, ticks, now, timeout):
+        """
+        Adds `ticks` to the bucket's full time, starting from `now` for
+        buckets already full, and returns the new full time.
+        """
+
+        cache.add(key, now, timeout)
+        try:
+            full_at = cache.incr(key, ticks)
+        except ValueError:
+            # expired between `add` and `incr`
+            cache.add(key, now, timeout)
+            full_at = cache.incr(key, ticks)
+        if full_at - ticks < now:
+            # the bucket refilled since it was last charged
+            full_at = cache.incr(key, now - (full_at - ticks))
+        # buckets left alone for a whole window are full again
+        cache.touch(key, timeout)
+        return full_at
+
+    def get_bucket(self, request):
+        """
+        Returns the cache key, capacity and milliseconds per token
+        of the request's bucket.
+        """
+
+        scope = self.get_scope(request)
+        capacity = settings.THROTTLE_BUCKETS[scope]["capacity"]
+        interval = 1000 / settings.THROTTLE_BUCKETS[scope]["rate"]
+        return f"throttle:{scope}:{self.get_ident(request)}", capacity, interval
+
+    def set_headers(self, request, capacity, interval, full_at, now):
+        window = round(capacity * interval)
+        remaining = math.floor((window - (full_at - now)) / interval)
+        # read by `RateLimitHeadersMiddleware`
+        request._request.rate_limit_headers = {
+            "RateLimit-Limit": str(capacity),
+            "RateLimit-Remaining": str(max(remaining, 0)),
+            "RateLimit-Reset": str(math.ceil(max(full_at - now, 0) / 1000)),
+            "RateLimit-Policy": f"{capacity};w={math.ceil(window / 1000)}",
+        }
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        key, capacity, interval = self.get_bucket(request)
+        cost = min(self.get_cost(request, view), capacity)
+        window = round(capacity * interval)
+        cache = caches[settings.THROTTLE_CACHE]
+
+        now = int(self.timer() * 1000)
+        ticks = round(cost * interval)
+        full_at = self.charge(cache, key, ticks, now, math.ceil(window / 1000) + 1)
+        allowed = full_at - now <= window
+        self.wait_time = 0
+        if not allowed:
+            # denied requests aren't charged
+            full_at = cache.decr(key, ticks)
+            self.wait_time = (full_at + ticks - now - window) / 1000
+        self.set_headers(request, capacity, interval, full_at, now)
+        return allowed
+
+    def update_headers(self, request):
+        """
+        Sets rate limit headers of an allowed request from its bucket as it
+        is now, after requests made on its behalf were charged to it.
+        """
+
+        if not settings.THROTTLE_ENABLED:
+            return
+        key, capacity, interval = self.get_bucket(request)
+        now = int(self.timer() * 1000)
+        full_at = max(caches[settings.THROTTLE_CACHE].get(key, now), now)
+        self.set_headers(request, capacity, interval, full_at, now)
+
+    def wait(self):
+        return self.wait_time
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Adds rate limit headers computed by `CostThrottle` to responses.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        for header, value in getattr(request, "rate_limit_headers", {}).items():
+            response[header] = value
+        return response
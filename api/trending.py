@@ -0,0 +1,162 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import JobWatermark, Photo, Review, TrendingChange
+
+WATERMARK_NAME = "trending"
+
+
+def review_weight(created_at, rating):
+    """
+    Returns log2 of the contribution of a review to the trending score.
+
+    A review is worth its rating, halved every `TRENDING_HALF_LIFE_HOURS`.
+    Instead of decaying old reviews, new reviews are scaled up by
+    2 ** (hours since `TRENDING_EPOCH` / half-life), which keeps
+    the order of photos the same while stored scores never change
+    with time. Scores are kept in log2 space so they don't overflow.
+    """
+
+    hours = (created_at - settings.TRENDING_EPOCH).total_seconds() / 3600
+    return hours / settings.TRENDING_HALF_LIFE_HOURS + math.log2(rating)
+
+
+def log2_add(a, b):
+    """
+    Returns log2(2 ** a + 2 ** b) without computing the powers.
+    """
+
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def update_scores(batch_size=5000):
+    """
+    Adds reviews created since the last run to trending scores of photos.
+    Each batch is committed together with the watermark, an interrupted
+    run resumes after the last committed batch.
+
+    The watermark is the id of the last added review, reviews created in
+    the last `TRENDING_LAG_SECONDS` are left to the next run, so that
+    reviews committed after later ones aren't skipped.
+    Returns number of processed reviews.
+    """
+
+    cutoff = timezone.now() - timedelta(seconds=settings.TRENDING_LAG_SECONDS)
+    processed = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = JobWatermark.objects.select_for_update().get_or_create(
+                name=WATERMARK_NAME
+            )
+            reviews = list(
+                Review.objects.filter(id__gt=watermark.value)
+                .order_by("id")
+                .values_list("id", "photo_id", "created_at", "rating")[:batch_size]
+            )
+            for index, (_, _, created_at, _) in enumerate(reviews):
+                if created_at > cutoff:
+                    # stop at the first review that may still be followed by
+                    # uncommitted reviews with lower ids
+                    reviews = reviews[:index]
+                    break
+            if not reviews:
+                return processed
+
+            weights = {}
+            for _, photo_id, created_at, rating in reviews:
+                weights[photo_id] = log2_add(
+                    weights.get(photo_id), review_weight(created_at, rating)
+                )
+            photos = list(
+                Photo.objects.filter(id__in=weights).only("id", "trending_score")
+            )
+            for photo in photos:
+                photo.trending_score = log2_add(photo.trending_score, weights[photo.id])
+            Photo.objects.bulk_update(photos, ["trending_score"])
+
+            watermark.value = reviews[-1][0]
+            watermark.save(update_fields=["value", "updated_at"])
+            processed += len(reviews)
+
+
+def record_change(review):
+    """
+    Marks the score of the photo of an updated or deleted review for
+    recomputing. Scores are sums of review weights that can't be subtracted
+    reliably in log2 space, they're recomputed from the remaining reviews.
+    """
+
+    TrendingChange.objects.create(photo_id=review.photo_id)
+
+
+def recompute_changed_scores(batch_size=1000):
+    """
+    Recomputes scores of photos marked by `record_change` from their reviews
+    already added by `update_scores`, later reviews are left to it.
+    Returns number of recomputed photos.
+    """
+
+    recomputed = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = JobWatermark.objects.select_for_update().get_or_create(
+                name=WATERMARK_NAME
+            )
+            changes = list(
+                TrendingChange.objects.order_by("id").values_list("id", "photo_id")[
+                    :batch_size
+                ]
+            )
+            if not changes:
+                return recomputed
+
+            scores = {photo_id: None for _, photo_id in changes}
+            reviews = Review.objects.filter(
+                photo_id__in=scores, id__lte=watermark.value
+            ).values_list("photo_id", "created_at", "rating")
+            for photo_id, created_at, rating in reviews.iterator():
+                scores[photo_id] = log2_add(
+                    scores[photo_id], review_weight(created_at, rating)
+                )
+            photos = list(
+                Photo.objects.filter(id__in=scores).only("id", "trending_score")
+            )
+            for photo in photos:
+                photo.trending_score = scores[photo.id]
+            Photo.objects.bulk_update(photos, ["trending_score"])
+
+            TrendingChange.objects.filter(id__in=[id for id, _ in changes]).delete()
+            recomputed += len(photos)
+
+
+@transaction.atomic
+def reset_scores():
+    """
+    Clears trending scores, the watermark and changes to recompute,
+    needed after `TRENDING_HALF_LIFE_HOURS` or `TRENDING_EPOCH` change.
+    """
+
+    Photo.objects.filter(trending_score__isnull=False).update(trending_score=None)
+    JobWatermark.objects.filter(name=WATERMARK_NAME).delete()
+    TrendingChange.objects.all().delete()
+
+
+def get_trending(limit):
+    """
+    Returns ids of the top `limit` trending photos, read from the score index.
+    """
+
+    return list(
+        Photo.objects.filter(trending_score__isnull=False)
+        .order_by("-trending_score", "-id")
+        .values_list("id", flat=True)[:limit]
+    )
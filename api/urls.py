@@ -11,6 +11,16 @@ urlpatterns = [
     # jwt
     path("auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("auth/logout/", views.LogoutView.as_view(), name="logout"),
+    path("auth/revoke-all/", views.RevokeAllView.as_view(), name="revoke_all"),
+    # database connection pool metrics
+    path("metrics/db-pool/", views.DatabasePoolStatsView.as_view(), name="db-pool"),
+    # uploads and reviews per hour or day
+    path("stats/", views.StatsView.as_view(), name="stats"),
+    # bulk export of photos and reviews
+    path("export/", views.ExportView.as_view(), name="export"),
+    # several requests in one round trip
+    path("batch/", views.BatchView.as_view(), name="batch"),
 ]
 
 # photos and tags urls
@@ -23,3 +33,8 @@ urlpatterns += router.urls
 reviews_router = SimpleRouter()
 reviews_router.register("reviews", views.ReviewViewSet, basename="review")
 urlpatterns += [path("photos/<int:photo_id>/", include(reviews_router.urls))]
+
+# live review events of a photo
+urlpatterns += [
+    path("photos/<int:photo_id>/events/", views.photo_events, name="photo-events")
+]
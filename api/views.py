@@ -1,16 +1,158 @@
 from rest_framework import filters
-from django.db.models import Avg, Count
-from rest_framework import permissions
+from django.conf import settings
+from django.http import Http404, HttpResponseNotAllowed, StreamingHttpResponse
+from django.db.models import Count
+from rest_framework import mixins, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from . import serializers
-from .models import Photo, Tag
+from core.db.pool import pool_stats
 
+from . import (
+    batch,
+    events,
+    export,
+    leaderboards,
+    related_tags,
+    revocation,
+    rollups,
+    serializers,
+    trending,
+)
+from .models import Photo, PhotoNeighbor, Tag
+from .similarity import photo_hash_index
 
-class PhotoViewSet(ModelViewSet):
+
+class ValuesListMixin:
+    """
+    Serializes list action with `values_serializer_class`,
+    a `serializers.ValuesListSerializer` that skips model instantiation.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.values_serializer_class(
+            queryset, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+
+class ListLimitMixin:
+    """
+    Limits results of list action if 'limit' query parameter is given.
+    """
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get("limit"):
+            limit = get_limit(request, None, maximum=len(response.data))
+            response.data = response.data[:limit]
+        return response
+
+
+class SparseFieldsViewMixin:
+    """
+    Returns only fields listed in 'fields' query parameter and expands
+    relations listed in 'expand' on list and retrieve actions, reading
+    only the columns, related objects and annotations these fields need,
+    see `serializers.SparseFieldsMixin`. Lists requested without them
+    are still serialized by `ValuesListMixin`.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    def get_sparse_options(self):
+        """
+        Returns `(fields, expand)` for sparse actions, fields is None
+        to return all of them. Returns None for other actions and lists
+        without 'fields' and 'expand'.
+        """
+
+        if getattr(self, "action", None) not in self.sparse_actions:
+            return None
+        params = self.request.query_params
+        if self.action == "list" and "fields" not in params and "expand" not in params:
+            return None
+        return get_names(self.request, "fields"), get_names(self.request, "expand") or []
+
+    def get_serializer(self, *args, **kwargs):
+        options = self.get_sparse_options()
+        if options is not None:
+            kwargs["fields"], kwargs["expand"] = options
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        options = self.get_sparse_options()
+        if options is not None:
+            fields, expand = options
+            serializer = self.get_serializer_class()(
+                fields=fields, expand=expand, context=self.get_serializer_context()
+            )
+            # annotations used for ordering but not returned
+            ordering = get_names(self.request, filters.OrderingFilter.ordering_param) or []
+            queryset = serializer.prepare_queryset(
+                queryset, also=[name.lstrip("-") for name in ordering]
+            )
+        return super().filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if self.get_sparse_options() is None:
+            return super().list(request, *args, **kwargs)
+        return mixins.ListModelMixin.list(self, request, *args, **kwargs)
+
+
+def get_names(request, param):
+    """
+    Returns comma-separated names given with `param` query parameter,
+    or None if it's missing.
+    """
+
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_limit(request, default, maximum=None):
+    """
+    Returns number of results requested with 'limit' query parameter,
+    at most `maximum`, `RESULTS_MAX_LIMIT` by default.
+    """
+
+    if maximum is None:
+        maximum = settings.RESULTS_MAX_LIMIT
+    try:
+        limit = int(request.query_params.get("limit", default))
+    except ValueError:
+        raise ValidationError({"limit": "A valid integer is required."})
+    return max(0, min(limit, maximum))
+
+
+def leaderboard_response(view, tag=None):
+    """
+    Returns top photos of the global or a tag leaderboard,
+    number of photos is set with 'limit' query parameter.
+    """
+
+    limit = get_limit(view.request, settings.LEADERBOARD_SIZE)
+    entries = leaderboards.get_top(tag=tag, limit=limit)
+    serializer = serializers.LeaderboardValuesSerializer(
+        entries, context=view.get_serializer_context()
+    )
+    return Response(serializer.data)
+
+
+class PhotoViewSet(
+    ListLimitMixin, SparseFieldsViewMixin, ValuesListMixin, ModelViewSet
+):
     """
     ViewSet for Photo instances management.
     """
@@ -18,19 +160,39 @@ class PhotoViewSet(ModelViewSet):
     # exclude `put` HTTP method
     http_method_names = [m for m in ModelViewSet.http_method_names if m != "put"]
 
-    queryset = Photo.objects.annotate(average_rating=Avg("reviews__rating"))
+    queryset = Photo.objects.all()
+    values_serializer_class = serializers.PhotoListValuesSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ["title", "description", "author__username", "tags__name"]
     ordering_fields = ["created_at", "average_rating", "title"]
     ordering = ["-created_at"]
     filterset_fields = ["created_at", "updated_at", "id", "author__username", "title", "tags__name"]
+    throttle_costs = {"create": 20, "similar": 5}
+
+    def get_queryset(self):
+        """
+        Annotates photos with their average rating. Sparse fieldsets
+        get it from the serializer only when it's requested.
+        """
+
+        queryset = super().get_queryset()
+        if self.get_sparse_options() is None:
+            queryset = queryset.annotate(average_rating=serializers.AVERAGE_RATING)
+        return queryset
 
     def get_permissions(self):
         """
         Sets permission depending on the action.
         """
 
-        if self.action in ("list", "retrieve"):
+        if self.action in (
+            "list",
+            "retrieve",
+            "similar",
+            "recommended",
+            "top",
+            "trending",
+        ):
             permission_classes = [permissions.AllowAny]
         elif self.action in ("update", "partial_update", "destroy"):
             permission_classes = [IsAuthor]
@@ -45,7 +207,7 @@ class PhotoViewSet(ModelViewSet):
 
         if self.action == "create":
             return serializers.PhotoCreateSerializer
-        if self.action == "list":
+        if self.action in ("list", "similar", "recommended", "top", "trending"):
             return serializers.PhotoListSerializer
         if self.action in ("retrieve", "destroy"):
             return serializers.PhotoDetailSerializer
@@ -56,26 +218,103 @@ class PhotoViewSet(ModelViewSet):
         """
         Assigns authenticated user to the photo instance.
         """
-        serializer.save(author=self.request.user)
+        serializer.save(author_id=self.request.user.id)
 
-    def finalize_response(self, request, response, *args, **kwargs):
+    @action(detail=True)
+    def similar(self, request, pk=None):
         """
-        Limits results if 'limit' query parameter is given.
+        Returns near-duplicates of the photo, ordered by Hamming distance
+        of their perceptual hashes. Maximum distance is set with
+        'distance' query parameter, up to `PHOTO_SIMILARITY_MAX_DISTANCE`.
         """
 
-        limit = self.request.query_params.get("limit")
-        if limit:
-            response.data = response.data[: int(limit)]
-        return super().finalize_response(request, response, *args, **kwargs)
+        photo = self.get_object()
+        try:
+            max_distance = int(
+                request.query_params.get(
+                    "distance", getattr(settings, "PHOTO_SIMILARITY_DISTANCE", 10)
+                )
+            )
+        except ValueError:
+            raise ValidationError({"distance": "A valid integer is required."})
+        limit = getattr(settings, "PHOTO_SIMILARITY_MAX_DISTANCE", 16)
+        if not 0 <= max_distance <= limit:
+            raise ValidationError(
+                {"distance": f"Ensure this value is between 0 and {limit}."}
+            )
+        if photo.phash is None:
+            return Response([])
+
+        distances = {
+            id: distance
+            for distance, id in photo_hash_index.search(photo.phash, max_distance)
+            if id != photo.id
+        }
+        photos = self.get_queryset().filter(id__in=distances)
+        data = serializers.PhotoListValuesSerializer(
+            photos, context=self.get_serializer_context()
+        ).data
+        for item in data:
+            item["distance"] = distances[item["id"]]
+        data.sort(key=lambda item: (item["distance"], item["id"]))
+        return Response(data)
+
+    @action(detail=True)
+    def recommended(self, request, pk=None):
+        """
+        Returns photos rated alike by reviewers of the photo,
+        ordered by similarity, see `recommendations`.
+        """
 
+        photo = self.get_object()
+        limit = get_limit(request, settings.RECOMMENDATION_NEIGHBORS)
+        scores = dict(
+            PhotoNeighbor.objects.filter(photo=photo)
+            .order_by("-score")
+            .values_list("neighbor_id", "score")[:limit]
+        )
+        photos = self.get_queryset().filter(id__in=scores)
+        data = serializers.PhotoListValuesSerializer(
+            photos, context=self.get_serializer_context()
+        ).data
+        for item in data:
+            item["similarity"] = scores[item["id"]]
+        data.sort(key=lambda item: (-item["similarity"], item["id"]))
+        return Response(data)
+
+    @action(detail=False)
+    def top(self, request):
+        """
+        Returns the best rated photos, ranked by Bayesian average rating.
+        """
 
-class TagViewSet(ReadOnlyModelViewSet):
+        return leaderboard_response(self)
+
+    @action(detail=False)
+    def trending(self, request):
+        """
+        Returns photos with most and best rated recent reviews,
+        see `trending.review_weight`.
+        """
+
+        ids = trending.get_trending(get_limit(request, settings.TRENDING_SIZE))
+        photos = self.get_queryset().filter(id__in=ids)
+        data = serializers.PhotoListValuesSerializer(
+            photos, context=self.get_serializer_context()
+        ).data
+        positions = {id: position for position, id in enumerate(ids)}
+        data.sort(key=lambda item: positions[item["id"]])
+        return Response(data)
+
+
+class TagViewSet(ListLimitMixin, ValuesListMixin, ReadOnlyModelViewSet):
     """
     ViewSet for Tag instances.
     """
 
     queryset = Tag.objects.annotate(number_of_photos=Count("photos"))
     serializer_class = serializers.TagSerializer
+    values_serializer_class = serializers.TagValuesSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ["name", "photos__title"]
     ordering_fields = ["name", "number_of_photos"]
@@ -83,24 +322,40 @@ class TagViewSet(ReadOnlyModelViewSet):
     filterset_fields = ["id", "name", "photos__title"]
     lookup_field = "name"
 
-    def finalize_response(self, request, response, *args, **kwargs):
+    @action(detail=True)
+    def top(self, request, name=None):
         """
-        Limits results if 'limit' query parameter is given.
+        Returns the best rated photos with the tag,
+        ranked by Bayesian average rating.
         """
 
-        limit = self.request.query_params.get("limit")
-        if limit:
-            response.data = response.data[: int(limit)]
-        return super().finalize_response(request, response, *args, **kwargs)
+        tag = get_object_or_404(Tag, name=name)
+        return leaderboard_response(self, tag=tag)
 
+    @action(detail=True)
+    def related(self, request, name=None):
+        """
+        Returns tags used together with the tag more often than by chance,
+        ranked by lift, see `related_tags`.
+        """
+
+        tag = get_object_or_404(Tag, name=name)
+        related = related_tags.get_related(
+            tag,
+            limit=get_limit(request, settings.RELATED_TAGS_SIZE),
+            min_count=settings.RELATED_TAGS_MIN_COUNT,
+        )
+        return Response(related)
 
-class ReviewViewSet(ModelViewSet):
+
+class ReviewViewSet(SparseFieldsViewMixin, ValuesListMixin, ModelViewSet):
     """
     ViewSet for Review instances management.
     """
 
     # exclude `put` HTTP method
     http_method_names = [m for m in ModelViewSet.http_method_names if m != "put"]
+    values_serializer_class = serializers.ReviewListValuesSerializer
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
     ordering_fields = ["created_at", "rating"]
     ordering = ["-created_at"]
@@ -149,12 +404,147 @@ class ReviewViewSet(ModelViewSet):
         """
 
         photo = get_object_or_404(Photo, pk=self.kwargs["photo_id"])
-        if self.request.user == photo.author:
+        if self.request.user.id == photo.author_id:
             raise PermissionDenied()
-        if photo.reviews.filter(author=self.request.user):
+        if photo.reviews.filter(author_id=self.request.user.id).exists():
             raise PermissionDenied()
 
-        serializer.save(author=self.request.user, photo=photo)
+        serializer.save(author_id=self.request.user.id, photo=photo)
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    Returns database connection pool metrics of the current process.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class StatsView(APIView):
+    """
+    Returns numbers of uploads and reviews per hour or day,
+    globally or for photos with a tag, read from precomputed buckets.
+    """
+
+    def get(self, request):
+        query = serializers.StatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        tag = None
+        if "tag" in params:
+            tag = get_object_or_404(Tag, name=params["tag"])
+        buckets = rollups.get_buckets(
+            params["granularity"], params["since"], params["until"], tag=tag
+        )
+        return Response(buckets)
+
+
+class ExportView(APIView):
+    """
+    Streams all photos or reviews as NDJSON or CSV, optionally only
+    those created or updated since 'updated_since'.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_costs = {"get": 50}
+
+    def get(self, request):
+        query = serializers.ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        _, content_type = export.OUTPUTS[params["output"]]
+        response = StreamingHttpResponse(
+            export.export(
+                params["resource"],
+                params["output"],
+                updated_since=params.get("updated_since"),
+                chunk_size=settings.EXPORT_CHUNK_SIZE,
+            ),
+            content_type=content_type,
+        )
+        filename = f"{params['resource']}.{params['output']}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BatchView(APIView):
+    """
+    Executes a list of API requests as the authenticated user
+    in one round trip, see `batch.execute`.
+    """
+
+    def post(self, request):
+        serializer = serializers.BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        responses = batch.execute(request, params["requests"], atomic=params["atomic"])
+        # sub-requests were charged to the bucket of the batch
+        for throttle in self.get_throttles():
+            if hasattr(throttle, "update_headers"):
+                throttle.update_headers(request)
+        if params["atomic"] and responses[-1]["status"] >= 400:
+            return Response(
+                {
+                    "detail": f"Request {len(responses) - 1} failed, all changes were rolled back.",
+                    "responses": responses,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"responses": responses})
+
+
+class LogoutView(APIView):
+    """
+    Revokes the access token of the request and the given refresh token.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = serializers.LogoutSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        revocation.revoke_token(request.auth)
+        if "refresh" in serializer.validated_data:
+            revocation.revoke_token(serializer.validated_data["refresh"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RevokeAllView(APIView):
+    """
+    Revokes all access and refresh tokens of the authenticated user,
+    logging out all their sessions.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        revocation.revoke_user(request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+async def photo_events(request, photo_id):
+    """
+    Streams Server-Sent Events of reviews created, updated and deleted
+    on the photo, with its new average rating, see `events.stream`.
+    Streams are held open, so they're meant to be served by ASGI servers.
+    """
+
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not await Photo.objects.filter(pk=photo_id).aexists():
+        raise Http404()
+    response = StreamingHttpResponse(
+        events.stream(photo_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # sent as they come by nginx
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 class IsAuthor(permissions.BasePermission):
@@ -164,4 +554,4 @@ class IsAuthor(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
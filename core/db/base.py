@@ -0,0 +1,91 @@
+import time
+from functools import partial
+
+from django.db.utils import OperationalError
+from django.db.backends.postgresql import base
+from psycopg import IsolationLevel, pq
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend taking connections from a per-process pool.
+
+    Connections are given back to the pool when Django closes them, which
+    it does at the end of every request, so they're reused by later requests
+    whichever thread serves them. Pool options are read from
+    `OPTIONS["pool"]`: `min_size`, `max_size` and `timeout` (seconds to wait
+    for a connection). Connections idle for `CONN_MAX_AGE` seconds are closed.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(
+            self.alias,
+            {
+                "max_idle": self.settings_dict["CONN_MAX_AGE"],
+                **self.settings_dict["OPTIONS"].get("pool", {}),
+            },
+        )
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        """
+        Takes a connection from the pool, waiting for one to be given back
+        when `max_size` connections are in use.
+        """
+
+        pool = self.pool
+        connection = pool.getconn(
+            partial(super().get_new_connection, conn_params),
+            check=self.check_connection if self.health_check_enabled else None,
+        )
+        if connection is None:
+            raise OperationalError(
+                f"No database connection available for '{self.alias}' "
+                f"within {pool.timeout} seconds."
+            )
+        # set by `get_new_connection` for new connections
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def check_connection(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except self.Database.Error:
+            return False
+        return True
+
+    def connect(self):
+        super().connect()
+        # given back to the pool by `close_old_connections` at the end of the
+        # request, connections of threads not serving requests are only
+        # given back when closed
+        self.close_at = time.monotonic()
+
+    def is_usable(self):
+        usable = super().is_usable()
+        if not usable:
+            self.pool.health_check_failed()
+        return usable
+
+    def _close(self):
+        connection = self.connection
+        # connections left in a transaction or broken aren't reused
+        reusable = (
+            not connection.closed
+            and not connection.broken
+            and connection.info.transaction_status == pq.TransactionStatus.IDLE
+        )
+        with self.wrap_database_errors:
+            self.pool.putconn(connection, reusable=reusable)
@@ -0,0 +1,199 @@
+import threading
+import time
+
+# taken from the pool instead of a connection when a new one may be opened
+NEW = object()
+
+
+class ConnectionPool:
+    """
+    Per-process pool of database connections shared by all threads.
+
+    Connections are taken from the pool when Django connects and given
+    back when it closes them, so they outlive the threads that used them.
+    At most `max_size` connections are open at the same time, others wait
+    at most `timeout` seconds for one to be given back. Connections idle
+    for more than `max_idle` seconds are closed, except `min_size` of them.
+    Utilization and wait time metrics are collected.
+    """
+
+    def __init__(self, alias, min_size=0, max_size=None, timeout=30.0, max_idle=None):
+        self.alias = alias
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._condition = threading.Condition()
+        # (connection, time it was given back), most recently given back last
+        self._idle = []
+        self.size = 0
+        self.in_use = 0
+        self.peak = 0
+        self.opened = 0
+        self.closed = 0
+        self.timeouts = 0
+        self.health_check_failures = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.connect_time_total = 0.0
+
+    def getconn(self, connect, check=None):
+        """
+        Returns an idle connection, or a new one made by `connect()` when
+        none is idle and fewer than `max_size` are open. Idle connections
+        failing `check(connection)` are closed and replaced. Returns `None`
+        when no connection became available within `timeout` seconds.
+        """
+
+        start = time.monotonic()
+        while True:
+            connection = self._checkout(start)
+            if connection is None:
+                return None
+            if connection is not NEW:
+                if check is None or check(connection):
+                    return connection
+                self.health_check_failed()
+                self._discard(connection)
+                continue
+            connect_start = time.monotonic()
+            try:
+                connection = connect()
+            except Exception:
+                with self._condition:
+                    self.size -= 1
+                    self.in_use -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self.opened += 1
+                self.connect_time_total += time.monotonic() - connect_start
+            return connection
+
+    def _checkout(self, start):
+        while True:
+            with self._condition:
+                expired = self._pop_expired()
+                if not expired:
+                    return self._take(start)
+            # closed outside the lock
+            for connection in expired:
+                self._close(connection)
+
+    def _take(self, start):
+        deadline = start + self.timeout
+        while True:
+            if self._idle:
+                connection, _ = self._idle.pop()
+                break
+            if self.max_size is None or self.size < self.max_size:
+                self.size += 1
+                connection = NEW
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.timeouts += 1
+                self.wait_time_total += self.timeout
+                self.wait_time_max = max(self.wait_time_max, self.timeout)
+                return None
+            self._condition.wait(remaining)
+        waited = time.monotonic() - start
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        return connection
+
+    def _pop_expired(self):
+        if self.max_idle is None or len(self._idle) <= self.min_size:
+            return []
+        cutoff = time.monotonic() - self.max_idle
+        count = 0
+        for _, returned_at in self._idle[: len(self._idle) - self.min_size]:
+            if returned_at > cutoff:
+                break
+            count += 1
+        expired = [connection for connection, _ in self._idle[:count]]
+        del self._idle[:count]
+        return expired
+
+    def putconn(self, connection, reusable=True):
+        """
+        Gives back a connection returned by `getconn()`,
+        closing it unless it's `reusable`.
+        """
+
+        if not reusable:
+            self._discard(connection)
+            return
+        with self._condition:
+            self.in_use -= 1
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self, connection):
+        with self._condition:
+            self.in_use -= 1
+        self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        finally:
+            with self._condition:
+                self.size -= 1
+                self.closed += 1
+                self._condition.notify()
+
+    def health_check_failed(self):
+        with self._condition:
+            self.health_check_failures += 1
+
+    def stats(self):
+        with self._condition:
+            attempts = self.opened + self.timeouts
+            return {
+                "alias": self.alias,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self.size,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                "peak": self.peak,
+                "utilization": self.in_use / self.max_size if self.max_size else None,
+                "opened": self.opened,
+                "closed": self.closed,
+                "timeouts": self.timeouts,
+                "health_check_failures": self.health_check_failures,
+                "wait_time_avg": self.wait_time_total / attempts if attempts else 0.0,
+                "wait_time_max": self.wait_time_max,
+                "connect_time_avg": (
+                    self.connect_time_total / self.opened if self.opened else 0.0
+                ),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """
+    Returns the `ConnectionPool` of a given database alias,
+    creating it from `options` on first use.
+    """
+
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(alias, **options)
+        return _pools[alias]
+
+
+def pool_stats():
+    """
+    Returns metrics of all connection pools of the current process.
+    """
+
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
@@ -0,0 +1,92 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+# set by `ReplicaRoutingMiddleware` for the duration of a request
+use_replica = ContextVar("use_replica", default=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to one of the `DATABASE_REPLICAS` when the current request allows it
+    and everything else to the primary database.
+    """
+
+    primary = "default"
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas or not use_replica.get():
+            return self.primary
+        # reads inside a transaction must see its own writes
+        if connections[self.primary].in_atomic_block:
+            return self.primary
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allows reads from replicas for safe-method requests handled by viewsets.
+
+    After a write, the client is pinned to the primary database
+    for `REPLICA_PIN_SECONDS` so that it does not read stale data.
+    """
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+    cookie_name = "primary_db_until"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+        if request.method not in self.safe_methods and response.status_code < 400:
+            pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+            response.set_cookie(
+                self.cookie_name,
+                str(time.time() + pin_seconds),
+                max_age=pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Enables replica reads only for viewset actions of safe-method requests.
+        """
+
+        # `actions` is set on views created by `ViewSetMixin.as_view()`
+        is_viewset = getattr(view_func, "actions", None) is not None
+        if is_viewset and request.method in self.safe_methods:
+            use_replica.set(not self.is_pinned(request))
+
+    def is_pinned(self, request):
+        """
+        Returns `True` when the client wrote data within the pin window.
+        """
+
+        try:
+            pinned_until = float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            return False
+        return pinned_until > time.time()
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.streaming.AsyncStreamingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -35,6 +36,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.db.routers.ReplicaRoutingMiddleware",
+    "api.throttling.RateLimitHeadersMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -61,12 +64,58 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        # PostgreSQL backend with a per-process connection pool, see `core.db`
+        "ENGINE": "core.db",
         "NAME": os.environ.get("POSTGRES_NAME"),
         "USER": os.environ.get("POSTGRES_USER"),
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": "db",
         "PORT": 5432,
+        # seconds idle connections are kept in the pool, checked before reuse
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+            # server-side prepared statements for queries executed repeatedly
+            "server_side_binding": True,
+            "prepare_threshold": int(os.environ.get("DB_PREPARE_THRESHOLD", 5)),
+            "pool": {
+                "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 20)),
+                "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            },
+        },
+    }
+}
+
+# Read replicas, comma separated hosts, e.g. "replica1,replica2"
+DATABASE_REPLICAS = []
+for index, host in enumerate(os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")):
+    if host.strip():
+        alias = f"replica_{index}"
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+        DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.db.routers.PrimaryReplicaRouter"]
+
+# seconds for which a client reads from the primary database after a write
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+
+# Cache, local memory by default. Rate limits are only shared by workers
+# with a shared backend updating counters atomically, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://127.0.0.1:6379, or memcached with PyMemcacheCache.
+# The database and file caches don't increment atomically.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     }
 }
 
@@ -108,11 +157,64 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+# seconds for which clients may cache photos
+MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", 3600))
+
+# photos with a content hash in their name are cached as immutable
+MEDIA_IMMUTABLE_PATTERN = r"[0-9a-f]{16,}\.\w+$"
+
+# "X-Accel-Redirect" (nginx) or "X-Sendfile" (Apache, lighttpd)
+# to let the front proxy send photos, empty to send them from Django
+MEDIA_OFFLOAD_HEADER = os.environ.get("MEDIA_OFFLOAD_HEADER", "")
+# internal location mapped to MEDIA_ROOT, used with X-Accel-Redirect
+MEDIA_OFFLOAD_PREFIX = "/protected-media/"
+
+STORAGES = {
+    "default": {"BACKEND": "api.storage.PhotoStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+# store photos in photos/ab/cd/ directories, move existing files with
+# `manage.py migrate_media_layout` after changing it
+MEDIA_SHARDING = os.environ.get("MEDIA_SHARDING", "false").lower() == "true"
+
+# formats photos are sent in to clients accepting them, in order of preference,
+# AVIF requires the pillow-avif-plugin package
+MEDIA_ENCODINGS = ["avif", "webp"]
+MEDIA_ENCODING_CACHE_DIR = os.path.join(MEDIA_ROOT, "encoded")
+# bytes of encoded photos kept, least recently used are deleted first
+MEDIA_ENCODING_CACHE_SIZE = int(os.environ.get("MEDIA_ENCODING_CACHE_SIZE", 1024**3))
+MEDIA_ENCODING_WORKERS = 2
+# photos waiting to be encoded, others are encoded on later requests
+MEDIA_ENCODING_QUEUE_SIZE = 100
+# seconds originals are cached for by clients accepting an encoding not made yet
+MEDIA_ENCODING_PENDING_MAX_AGE = 60
+
+# Uploaded images, checked from their headers before being decoded
+IMAGE_ALLOWED_FORMATS = ["JPEG", "PNG", "WEBP", "GIF"]
+IMAGE_MAX_WIDTH = 12000
+IMAGE_MAX_HEIGHT = 12000
+IMAGE_MAX_PIXELS = 50_000_000
+
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ]
+        "api.authentication.ClaimsJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.throttling.CostThrottle",
+    ],
+    # proxies in front of the app whose X-Forwarded-For entries are trusted,
+    # clients are identified by their connection's address when 0
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 
 # JWT settings
@@ -120,7 +222,116 @@ from datetime import timedelta
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
+    "TOKEN_OBTAIN_SERIALIZER": "api.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "api.authentication.RevocationTokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "api.authentication.ClaimsUser",
+}
+# seconds for which authenticated users are cached per process
+USER_CACHE_TTL = 60
+USER_CACHE_SIZE = 10000
+
+# Token revocation
+# seconds after which revocations made by other processes are loaded
+REVOCATION_SYNC_SECONDS = 5
+# seconds of revocations read again at each sync, longer than transactions
+# revoking tokens and the clock skew between processes
+REVOCATION_SYNC_OVERLAP = 60
+# seconds after which the Bloom filter of revoked tokens is rebuilt without expired tokens
+REVOCATION_FILTER_TTL = 3600
+REVOCATION_FILTER_CAPACITY = 10000
+# share of tokens checked in the database without being revoked
+REVOCATION_FILTER_ERROR_RATE = 0.001
+
+# Near-duplicate photos
+# Hamming distance of perceptual hashes used by /api/photos/<id>/similar/
+PHOTO_SIMILARITY_DISTANCE = 10
+# largest 'distance' accepted, searches within larger distances visit most of the tree
+PHOTO_SIMILARITY_MAX_DISTANCE = 16
+# "allow", "warn" (list near-duplicates in the response) or "reject" uploads
+PHOTO_DUPLICATE_POLICY = os.environ.get("PHOTO_DUPLICATE_POLICY", "warn")
+PHOTO_DUPLICATE_DISTANCE = 6
+# seconds after which the in-memory hash index is rebuilt from the database
+PHOTO_HASH_INDEX_TTL = 300
+
+# maximum 'limit' of ranked results, e.g. leaderboards or related tags
+RESULTS_MAX_LIMIT = 100
+
+# Leaderboards
+# Bayesian average prior: photos start with `WEIGHT` virtual reviews rated `MEAN`
+LEADERBOARD_PRIOR_WEIGHT = 5
+LEADERBOARD_PRIOR_MEAN = 3.0
+# default number of returned photos
+LEADERBOARD_SIZE = 10
+
+# Trending photos
+from datetime import datetime, timezone
+
+# time after which a review counts half as much
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", 24))
+# reference time of trending scores, scores only grow, keep it fixed
+TRENDING_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+TRENDING_SIZE = 20
+# seconds after which reviews are added to scores, longer than transactions
+# creating reviews, which may commit after reviews with higher ids
+TRENDING_LAG_SECONDS = 60
+
+# Recommended photos
+# number of neighbors stored per photo by `build_recommendations`
+RECOMMENDATION_NEIGHBORS = 20
+
+# Related tags
+# minimum number of photos tagged with both tags, rarer pairs have unreliable lift
+RELATED_TAGS_MIN_COUNT = 2
+RELATED_TAGS_SIZE = 10
+# seconds for which the number of photos used in lifts is cached
+RELATED_TAGS_PHOTO_COUNT_TTL = 300
+
+# Stats rollups
+# number of buckets returned by /api/stats/ when no time range is given
+STATS_DEFAULT_BUCKETS = 30
+STATS_MAX_BUCKETS = 1000
+
+# Bulk export
+# number of rows read, joined and encoded at once by exports
+EXPORT_CHUNK_SIZE = 1000
+
+# Batch requests
+# maximum number of sub-requests of a batch
+BATCH_MAX_REQUESTS = 20
+# threads running read-only sub-requests in parallel, 1 runs them in order
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", 4))
+
+# Review events
+# send events to streams of all processes with Postgres LISTEN/NOTIFY
+EVENTS_NOTIFY = os.environ.get("EVENTS_NOTIFY", "false").lower() == "true"
+# events waiting for a stream before its client is disconnected
+EVENTS_QUEUE_SIZE = 100
+EVENTS_KEEPALIVE_SECONDS = 15
+# streams end after this time, Django doesn't notice disconnected clients
+EVENTS_STREAM_SECONDS = 300
+# delay before clients reconnect
+EVENTS_RETRY_MILLISECONDS = 3000
+EVENTS_RECONNECT_SECONDS = 1
+
+# Rate limiting
+# token buckets holding up to `capacity` tokens, refilled with `rate` tokens per second
+THROTTLE_BUCKETS = {
+    "anon": {"capacity": 120, "rate": 2},
+    "user": {"capacity": 300, "rate": 5},
+}
+# tokens charged per view action, or per HTTP method for views without actions
+THROTTLE_COSTS = {
+    "default": 1,
+    "list": 2,
+    "search": 5,
+    "create": 5,
+    "partial_update": 2,
+    "destroy": 2,
 }
+THROTTLE_CACHE = "default"
+# disabled for tests by `TEST_RUNNER`, buckets would be shared by all tests of a run
+THROTTLE_ENABLED = True
+TEST_RUNNER = "core.test_runner.TestRunner"
 
 # Flash Accounts settings
 FLASH_SETTINGS = {
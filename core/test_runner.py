@@ -0,0 +1,18 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs tests with `THROTTLE_ENABLED` false, so that tests don't share
+    rate limit buckets. Tests of throttling enable it with `override_settings`.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.throttle_override = override_settings(THROTTLE_ENABLED=False)
+        self.throttle_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.throttle_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from api.media import serve_photo
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     # api endpoints
@@ -11,6 +13,15 @@ urlpatterns = [
     path("", include("frontend.urls")),
 ]
 
-# media files in development
+# uploaded photos
+urlpatterns += [
+    re_path(
+        rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>photos/.+)$",
+        serve_photo,
+        name="media-photo",
+    ),
+]
+
+# other media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)